@@ -1,6 +1,7 @@
 from __future__ import annotations
 import abc
-from typing import Any, Callable, Literal, Type
+from types import MappingProxyType
+from typing import Any, Callable, Collection, Literal, Mapping, Type
 
 
 Timing = Literal["pre", "post"]
@@ -58,6 +59,7 @@ class Controller:
         self.__history: list[str] = list()
         self.__last_symbol: str = "- "
         self.__waiting: int = 0
+        self.__actions_after_batch: dict[str, Callable[[], None]] = dict()
 
     @property
     def any_undo(self) -> bool:
@@ -81,6 +83,17 @@ class Controller:
         else:
             self.__last_symbol = "x "
 
+    def add_action_after_batch(self, owner_id: str, action: Callable[[], None]) -> None:
+        # the action is called after each batch of commands is run, undone or redone
+        self.__actions_after_batch[owner_id] = action
+
+    def remove_action_after_batch(self, owner_id: str) -> None:
+        self.__actions_after_batch.pop(owner_id, None)
+
+    def _run_actions_after_batch(self) -> None:
+        for action in list(self.__actions_after_batch.values()):
+            action()
+
     def clear_history(self) -> None:
         self.__history.clear()
 
@@ -104,6 +117,7 @@ class Controller:
             if cmd.message.strip() != "":
                 self._write_to_history(f"{self.__last_symbol} {cmd.message}")
         self._switch_last_symbol()
+        self._run_actions_after_batch()
 
     def undo(self) -> None:
         if not self.__undo_stack:
@@ -115,6 +129,7 @@ class Controller:
                 self._write_to_history(f"{self.__last_symbol}Undo: {cmd.message}")
         self.__redo_stack.append(batch)
         self._switch_last_symbol()
+        self._run_actions_after_batch()
 
     def redo(self) -> None:
         if not self.__redo_stack:
@@ -126,6 +141,7 @@ class Controller:
                 self._write_to_history(f"{self.__last_symbol}Redo: {cmd.message}")
         self.__undo_stack.append(batch)
         self._switch_last_symbol()
+        self._run_actions_after_batch()
 
     def _write_to_history(self, record: str) -> None:
         if record.strip() == "":
@@ -141,6 +157,7 @@ class Controller:
             cmd.undo()
             if cmd.message.strip() != "":
                 self.__history.append(f"{self.__last_symbol}Undo: {cmd.message}")
+        self._run_actions_after_batch()
 
     def _go(self) -> None:
         if self.__waiting > 0:
@@ -178,38 +195,86 @@ class Controller:
 
 class Composed_Command(abc.ABC):
 
+    # Shared by all composed commands without hooks of the given timing. The hook tables are
+    # copied on the first write, so that e.g. items created from a template do not allocate
+    # their own empty tables until a per-instance hook is actually added.
+    _NO_HOOKS: Mapping[str, Any] = MappingProxyType({})
+
     @abc.abstractstaticmethod
     def cmd_type(*args) -> Type[Command]:
         return Command  # pragma: no cover
 
     def __init__(self) -> None:
-        self.composed_pre: dict[str, tuple[Callable[[Any], Any], Composed_Command]] = dict()
-        self.pre: dict[str, Callable[[Any], Command]] = dict()
-        self.post: dict[str, Callable[[Any], Command]] = dict()
-        self.composed_post: dict[str, tuple[Callable[[Any], Any], Composed_Command]] = dict()
+        self._composed_pre: Mapping[str, tuple[Callable[[Any], Any], Composed_Command]] = (
+            Composed_Command._NO_HOOKS
+        )
+        self._pre: Mapping[str, Callable[[Any], Command]] = Composed_Command._NO_HOOKS
+        self._post: Mapping[str, Callable[[Any], Command]] = Composed_Command._NO_HOOKS
+        self._composed_post: Mapping[str, tuple[Callable[[Any], Any], Composed_Command]] = (
+            Composed_Command._NO_HOOKS
+        )
+
+    @property
+    def composed_pre(self) -> dict[str, tuple[Callable[[Any], Any], Composed_Command]]:
+        if self._composed_pre is Composed_Command._NO_HOOKS:
+            self._composed_pre = dict()
+        return self._composed_pre  # type: ignore
+
+    @property
+    def pre(self) -> dict[str, Callable[[Any], Command]]:
+        if self._pre is Composed_Command._NO_HOOKS:
+            self._pre = dict()
+        return self._pre  # type: ignore
+
+    @property
+    def post(self) -> dict[str, Callable[[Any], Command]]:
+        if self._post is Composed_Command._NO_HOOKS:
+            self._post = dict()
+        return self._post  # type: ignore
+
+    @property
+    def composed_post(self) -> dict[str, tuple[Callable[[Any], Any], Composed_Command]]:
+        if self._composed_post is Composed_Command._NO_HOOKS:
+            self._composed_post = dict()
+        return self._composed_post  # type: ignore
+
+    @property
+    def has_hooks(self) -> bool:
+        return bool(self._composed_pre or self._pre or self._post or self._composed_post)
 
     @abc.abstractmethod
     def __call__(self, data: Any) -> tuple[Command, ...]:
 
-        pre: list[Command] = list()
-        for converter, composed_cmd in self.composed_pre.values():
-            converted_data = converter(data)
-            pre.extend(composed_cmd(converted_data))
-
-        for func in self.pre.values():
-            cmd = func(data)
-            pre.append(cmd)
+        if not self.has_hooks:
+            return (self.cmd_type()(data),)
 
+        pre = self.pre_commands(data)
         main = self.cmd_type()(data)
-        post: list[Command] = []
-        for func in self.post.values():
-            cmd = func(data)
-            post.append(cmd)
-
-        for converter, composed_cmd in self.composed_post.values():
-            post.extend(composed_cmd(converter(data)))
+        post = self.post_commands(data)
         return *pre, main, *post
 
+    def pre_commands(self, data: Any, exclude: Collection[str] = ()) -> list[Command]:
+        pre: list[Command] = list()
+        for owner_id, (converter, composed_cmd) in self._composed_pre.items():
+            if owner_id not in exclude:
+                pre.extend(composed_cmd(converter(data)))
+
+        for owner_id, func in self._pre.items():
+            if owner_id not in exclude:
+                pre.append(func(data))
+        return pre
+
+    def post_commands(self, data: Any, exclude: Collection[str] = ()) -> list[Command]:
+        post: list[Command] = list()
+        for owner_id, func in self._post.items():
+            if owner_id not in exclude:
+                post.append(func(data))
+
+        for owner_id, (converter, composed_cmd) in self._composed_post.items():
+            if owner_id not in exclude:
+                post.extend(composed_cmd(converter(data)))
+        return post
+
     @abc.abstractmethod
     def add(self, owner_id: str, creator: Callable[[Any], Command], timing: Timing) -> None:
 
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import dataclasses
+from typing import Any, Callable, Optional
+
+from te_tree.core.item import Item
+from te_tree.core.observer import Tree_Observer
+
+
+@dataclasses.dataclass(frozen=True)
+class Aggregate:
+    """Rollup over a subtree. The 'value' is taken from every item of the subtree (including its
+    root) and the values are reduced by 'combine'. Aggregates are identified by their labels."""
+
+    label: str
+    value: Callable[[Item], Any] = dataclasses.field(compare=False)
+    combine: Callable[[list[Any]], Any] = dataclasses.field(compare=False, default=sum)
+
+
+def count(itype: Optional[str] = None) -> Aggregate:
+    if itype is None:
+        return Aggregate("count", lambda item: 1)
+    return Aggregate(f"count:{itype}", lambda item: int(item.itype == itype))
+
+
+def total(label: str) -> Aggregate:
+    return Aggregate(
+        f"total:{label}", lambda item: item(label) if item.has_attribute(label) else 0
+    )
+
+
+class Aggregate_Cache(Tree_Observer):
+    """Computes the aggregates lazily and keeps them until some item in the subtree changes.
+    A change invalidates only the cached values on the path from the changed item to the root."""
+
+    def __init__(self, root: Item) -> None:
+        super().__init__(root, any_attribute=True)
+        self._cache: dict[Item, dict[Aggregate, Any]] = dict()
+        self.start()
+
+    def __call__(self, item: Item, aggregate: Aggregate) -> Any:
+        if item not in self._watched:
+            raise Aggregate_Cache.ItemNotObserved(item.name)
+        if aggregate in self._cache.get(item, {}):
+            return self._cache[item][aggregate]
+
+        is_cached = lambda i: aggregate in self._cache.get(i, {})
+        for descendant in item.postorder(prune=is_cached):
+            entry = self._cache.setdefault(descendant, dict())
+            if aggregate in entry:
+                continue
+            values = [aggregate.value(descendant)]
+            values.extend(self._cache[child][aggregate] for child in descendant.children)
+            entry[aggregate] = aggregate.combine(values)
+        return self._cache[item][aggregate]
+
+    def _invalidate(self, item: Item) -> None:
+        # if an item has no cached values, none of its ancestors can have any
+        while not item.is_null() and self._cache.pop(item, None):
+            item = item.parent
+
+    def _removed(self, item: Item) -> None:
+        self._cache.pop(item, None)
+
+    def _attached(self, parent: Item, child: Item) -> None:
+        self._invalidate(parent)
+
+    def _detached(self, parent: Item, child: Item) -> None:
+        self._invalidate(parent)
+
+    def _changed(self, item: Item, label: str) -> None:
+        self._invalidate(item)
+
+    class ItemNotObserved(Exception):
+        pass
@@ -1,6 +1,9 @@
 from __future__ import annotations
-from decimal import Decimal, getcontext
-from typing import Literal, Any, Callable, get_args
+from decimal import Decimal, InvalidOperation, getcontext
+import functools
+import re
+from types import MappingProxyType
+from typing import Literal, Any, Callable, Mapping, get_args
 import abc
 import dataclasses
 
@@ -22,6 +25,8 @@ class Dependency(abc.ABC):
         func: Callable[[Any], Any],
         *inputs: AbstractAttribute,
         label: str = "",
+        validate: bool = True,
+        update: bool = True,
     ):
         self._output = output
         self.func = func
@@ -31,9 +36,10 @@ class Dependency(abc.ABC):
         self._inputs = list(inputs)
         if self._output.dependent:
             raise Attribute.DependencyAlreadyAssigned
-        self._check_input_types()
-        self._check_for_dependency_cycle(self._output, path=self._output.name)
-        self._set_up_command(*self._inputs)
+        if validate:
+            self._check_input_types()
+            self._check_for_dependency_cycle(self._output, path=self._output.name)
+        self._set_up_command(*self._inputs, update=update)
 
     @abc.abstractmethod
     def release(self) -> None:
@@ -92,8 +98,9 @@ class Dependency(abc.ABC):
     def _set_output_value(self, *args) -> Command:
         return Set_Attr(self._data_converter(*args), custom_message=self.__label)
 
-    def _set_up_command(self, *inputs: AbstractAttribute):
-        self._output.factory.run(self._set_output_value())
+    def _set_up_command(self, *inputs: AbstractAttribute, update: bool = True):
+        if update:
+            self._output.factory.run(self._set_output_value())
         self._add_set_up_command_to_input(*inputs)
 
     def __call__(self, *values) -> Any:
@@ -236,18 +243,7 @@ class Append_To_Attribute_List(Command):
         return f"Append attribute to list | Attribute '{self.data.attribute.name}' appended to '{self.data.alist.name}'."
 
     def run(self) -> None:
-        self.data.alist._add(self.data.attribute)
-
-        def get_list_set_data(data: Set_Attr_Data) -> Set_Attr_Data:
-            value_getter = lambda: self.data.alist.value + [data.value()]
-            return Set_Attr_Data(self.data.alist, value_getter)
-
-        self.data.attribute.command["set"].add_composed(
-            owner_id=self.data.alist.id,
-            data_converter=get_list_set_data,
-            cmd=self.data.alist.command["set"],
-            timing="post",
-        )
+        self.data.alist._link(self.data.attribute)
 
     def undo(self) -> None:
         self.data.alist._remove(self.data.attribute)
@@ -263,6 +259,63 @@ class Append_To_Attribute_List(Command):
         ] = self.composed_post_set
 
 
+@dataclasses.dataclass
+class Edit_AttrList_Many_Data:
+    alist: Attribute_List
+    attributes: list[AbstractAttribute]
+
+
+@dataclasses.dataclass
+class Extend_Attribute_List(Command):
+    data: Edit_AttrList_Many_Data
+    composed_post_sets: list[tuple[Callable, Composed_Command]] = dataclasses.field(init=False)
+
+    @property
+    def message(self) -> str:
+        return f"Extend attribute list | {len(self.data.attributes)} attribute(s) appended to '{self.data.alist.name}'."
+
+    def run(self) -> None:
+        for attribute in self.data.attributes:
+            self.data.alist._link(attribute)
+
+    def undo(self) -> None:
+        self.data.alist._remove_many(self.data.attributes)
+        self.composed_post_sets = [
+            attribute.command["set"].composed_post.pop(self.data.alist.id)
+            for attribute in self.data.attributes
+        ]
+
+    def redo(self) -> None:
+        for attribute, composed_post_set in zip(self.data.attributes, self.composed_post_sets):
+            self.data.alist._add(attribute)
+            attribute.command["set"].composed_post[self.data.alist.id] = composed_post_set
+
+
+@dataclasses.dataclass
+class Remove_Many_From_Attribute_List(Command):
+    data: Edit_AttrList_Many_Data
+    composed_post_sets: list[tuple[Callable, Composed_Command]] = dataclasses.field(init=False)
+
+    @property
+    def message(self) -> str:
+        return f"Remove attributes from list | {len(self.data.attributes)} attribute(s) removed from '{self.data.alist.name}'."
+
+    def run(self) -> None:
+        self.data.alist._remove_many(self.data.attributes)
+        self.composed_post_sets = [
+            attribute.command["set"].composed_post.pop(self.data.alist.id)
+            for attribute in self.data.attributes
+        ]
+
+    def undo(self) -> None:
+        for attribute, composed_post_set in zip(self.data.attributes, self.composed_post_sets):
+            self.data.alist._add(attribute)
+            attribute.command["set"].composed_post[self.data.alist.id] = composed_post_set
+
+    def redo(self) -> None:
+        self.run()
+
+
 @dataclasses.dataclass
 class Remove_From_Attribute_List(Command):
     data: Edit_AttrList_Data
@@ -337,8 +390,12 @@ class AbstractAttribute(abc.ABC):
         func: Callable[[Any], Any],
         *attributes: AbstractAttribute,
         label: str = "",
+        validate: bool = True,
+        update: bool = True,
     ) -> Dependency:
-        self._dependency = DependencyImpl(self, func, *attributes, label=label)
+        self._dependency = DependencyImpl(
+            self, func, *attributes, label=label, validate=validate, update=update
+        )
         return self._dependency
 
     def break_dependency(self) -> None:
@@ -397,7 +454,9 @@ class Attribute_List(AbstractAttribute):
     ) -> None:
 
         super().__init__(factory, atype, name)
-        self._attributes: list[AbstractAttribute] = list()
+        self.__attributes: list[AbstractAttribute] = list()
+        # adds the attributes of the items not yet loaded, see the Item's deferred children
+        self._loader: Callable[[], None] | None = None
         self._set_commands: dict[str, Callable[[Set_Attr_Data], Command]] = dict()
 
         if isinstance(init_attributes, list):
@@ -406,6 +465,13 @@ class Attribute_List(AbstractAttribute):
                 attr.set(attr_value)
                 self.append(attr)
 
+    @property
+    def _attributes(self) -> list[AbstractAttribute]:
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            loader()
+        return self.__attributes
+
     @property
     def value(self) -> list[Any]:
         return [attr.value for attr in self._attributes]
@@ -419,7 +485,12 @@ class Attribute_List(AbstractAttribute):
     ) -> Dependency:
         if any([item.dependent for item in self._attributes]):
             raise Attribute_List.ItemIsAlreadyDependent
-        super().add_dependency(func, *attributes)
+        super().add_dependency(
+            func,
+            *attributes,
+            validate=kwargs.get("validate", True),
+            update=kwargs.get("update", True),
+        )
         for item in self._attributes:
             item._dependency = self._dependency
         return self._dependency
@@ -468,6 +539,20 @@ class Attribute_List(AbstractAttribute):
     def _add(self, attributes: AbstractAttribute) -> None:
         self._attributes.append(attributes)
 
+    def _link(self, attribute: AbstractAttribute) -> None:
+        self._add(attribute)
+
+        def get_list_set_data(data: Set_Attr_Data) -> Set_Attr_Data:
+            value_getter = lambda: self.value + [data.value()]
+            return Set_Attr_Data(self, value_getter)
+
+        attribute.command["set"].add_composed(
+            owner_id=self.id,
+            data_converter=get_list_set_data,
+            cmd=self.command["set"],
+            timing="post",
+        )
+
     @staticmethod
     def _check_hierarchy_collision(alist: Attribute_List, root_list: Attribute_List) -> None:
         if alist is root_list:
@@ -479,12 +564,21 @@ class Attribute_List(AbstractAttribute):
     def _remove(self, attributes: AbstractAttribute) -> None:
         self._attributes.remove(attributes)
 
+    def _remove_many(self, attributes: list[AbstractAttribute]) -> None:
+        removed = set(attributes)
+        self._attributes[:] = [attr for attr in self._attributes if attr not in removed]
+
+    def _reorder(self, attributes: list[AbstractAttribute]) -> None:
+        self._attributes[:] = attributes
+
     def _value_update(self, values: dict[AbstractAttribute, Any], msg: str = "") -> None:
+        # only the attributes with changed values are updated, so that e.g. setting a single
+        # item's attribute does not notify all of its siblings through their parent's list
         for attr in self._attributes:
             if isinstance(attr, Attribute_List):
                 vals = {attr: value for attr, value in zip(attr.attributes, values[attr])}
                 attr._value_update(vals)
-            else:
+            elif not _same_value(attr.value, values[attr]):
                 attr._value_update(values[attr])
 
     def __iter__(self) -> Iterator[AbstractAttribute]:
@@ -515,6 +609,11 @@ class Attribute_List(AbstractAttribute):
         pass
 
 
+def _same_value(value: Any, other: Any) -> bool:
+    # the type distinguishes e.g. the equal integer and float values
+    return type(value) is type(other) and value == other
+
+
 Command_Type = Literal["set"]
 from typing import Set, List
 
@@ -522,6 +621,10 @@ from typing import Set, List
 class Attribute(AbstractAttribute):
     default_value: Any = ""
     minimum_value: Any = ""
+    # shared by the attributes never printed, the cache is allocated on the first print
+    _NO_PRINTED: Mapping[tuple[tuple[str, Any], ...], tuple[tuple[Any, ...], str]] = (
+        MappingProxyType({})
+    )
 
     def __init__(
         self,
@@ -541,6 +644,10 @@ class Attribute(AbstractAttribute):
         self._actions: list[Callable[[Attribute], None]] = list()
 
         self._actions_on_set: dict[str, Callable[[], None]] = dict()
+        # printed values for the print options, each stored with the state it was printed for
+        self._printed: Mapping[tuple[tuple[str, Any], ...], tuple[tuple[Any, ...], str]] = (
+            Attribute._NO_PRINTED
+        )
 
     @property
     def value(self) -> Any:
@@ -575,11 +682,36 @@ class Attribute(AbstractAttribute):
     def print(self, *options) -> str:
         pass  # pragma: no cover
 
+    def print_cached(self, **options) -> str:
+        """Prints the value as the 'print' method does, but reuses the printed string until the
+        value, the options or the locale change."""
+        key = tuple(sorted(options.items()))
+        state = self._print_state()
+        cached = self._printed.get(key)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        printed = self.print(**options)
+        if self._printed is Attribute._NO_PRINTED:
+            self._printed = dict()
+        self._printed[key] = (state, printed)  # type: ignore
+        return printed
+
+    def _print_state(self) -> tuple[Any, ...]:
+        # the type distinguishes e.g. the equal integer and float values printed differently
+        return (type(self._value), self._value, self.factory.locale_code)
+
     def read(self, text: str, overwrite_dependent: bool = False) -> None:
         value = self.__class__.value_from_text(text=text)
         if self.is_valid(value):
             self.set(value, overwrite_dependent)
 
+    def _read_raw(self, text: str) -> None:
+        self._hard_set(self.__class__.value_from_text(text=text))
+
+    def _raw_reader(self) -> Callable[[Any, str], None]:
+        """Returns the function reading the text into any attribute of the same template."""
+        return type(self)._read_raw
+
     def set(self, value: Any, overwrite_dependent: bool = False) -> None:
         if not overwrite_dependent and self._dependency is not DependencyImpl.NULL:
             return
@@ -619,6 +751,8 @@ class Attribute(AbstractAttribute):
 
     def _value_update(self, value: Any, msg: str = "") -> None:
         self._value = value
+        if self._printed:
+            self._printed.clear()  # type: ignore
         self._run_actions_after_setting_the_value()
 
     def _run_actions_after_setting_the_value(self) -> None:
@@ -885,6 +1019,9 @@ class Monetary_Attribute(Number_Attribute):
         "JPY": Currency("JPY", "¥", decimals=0),
     }
 
+    def _print_state(self) -> tuple[Any, ...]:
+        return super()._print_state() + (self.factory.currency_code,)
+
     def prefer_symbol_before_value(self) -> bool:
         preferred_by: set[Locale_Code] = {"en_us"}
         return self.factory.locale_code in preferred_by
@@ -945,13 +1082,15 @@ class Monetary_Attribute(Number_Attribute):
     VALUE_PATTERN = "(?P<value>[0-9]+([\.\,][0-9]*)?)"
     SYMBOL_FIRST = f"({SYMBOL_PATTERN}{VALUE_PATTERN})"
     VALUE_FIRST = f"({VALUE_PATTERN}[ \t{NBSP}]?{SYMBOL_PATTERN})"
+    _SYMBOL_FIRST_RE = re.compile(SYMBOL_FIRST)
+    _VALUE_FIRST_RE = re.compile(VALUE_FIRST)
 
     @staticmethod
     def _extract_sign_symbol_and_value(text: str) -> tuple[str, str, str]:
         sign, text = Monetary_Attribute._extract_sign(text)
-        thematch = re.match(Monetary_Attribute.SYMBOL_FIRST, text)
+        thematch = Monetary_Attribute._SYMBOL_FIRST_RE.match(text)
         if thematch is None:
-            thematch = re.match(Monetary_Attribute.VALUE_FIRST, text)
+            thematch = Monetary_Attribute._VALUE_FIRST_RE.match(text)
         if thematch is None:
             raise Monetary_Attribute.CannotExtractValue(text)
         if thematch["symbol"] not in get_args(Currency_Symbol):
@@ -1023,7 +1162,6 @@ class Name_Attribute(Attribute):
 
 
 import datetime
-import re
 
 
 class Date_Attribute(Attribute):
@@ -1040,6 +1178,8 @@ class Date_Attribute(Attribute):
 
     YMD_PATT = YEARPATT + SEPARATOR + MONTHPATT + SEPARATOR + DAYPATT
     DMY_PATT = DAYPATT + SEPARATOR + MONTHPATT + SEPARATOR + YEARPATT
+    _YMD_RE = re.compile(YMD_PATT)
+    _DMY_RE = re.compile(DMY_PATT)
 
     def _is_type_valid(self, value: Any) -> bool:
         return isinstance(value, datetime.date)
@@ -1054,9 +1194,9 @@ class Date_Attribute(Attribute):
     @staticmethod
     def _extract_date_from_string(text: str) -> None | dict:
         text = Date_Attribute._remove_spaces(text)
-        date_match = re.fullmatch(Date_Attribute.YMD_PATT, text)
+        date_match = Date_Attribute._YMD_RE.fullmatch(text)
         if date_match is None:
-            date_match = re.fullmatch(Date_Attribute.DMY_PATT, text)
+            date_match = Date_Attribute._DMY_RE.fullmatch(text)
         if date_match is None:
             return None
         return date_match.groupdict()
@@ -1162,11 +1302,15 @@ class Choice_Attribute(Attribute):
         return result
 
     def read(self, text: str, overwrite_dependent: bool = False) -> None:
+        self.set(self._option_from_text(text), overwrite_dependent)
+
+    def _read_raw(self, text: str) -> None:
+        self._value = self.__options[self._option_from_text(text)]
+
+    def _option_from_text(self, text: str) -> str:
         text = text.strip()
-        for op in self.__options:
-            if op == text:
-                self.set(op, overwrite_dependent)
-                return
+        if text in self.__options:
+            return text
         raise Choice_Attribute.UndefinedOption(
             f"Unknown option: '{text}'; available options are: {self.options}"
         )
@@ -1261,6 +1405,11 @@ class Quantity(Real_Attribute):
     UNIT_PATTERN = f"([a-zA-Zα-ωΑ-Ω°%‰‱]+[{EXPONENT_SYMBOLS}]*)+"
     PREFIX_PATTERN = "([TGMkhdcmμnp]?|da)"
     COMPLETE_UNIT_PATTERN = PREFIX_PATTERN + UNIT_PATTERN
+    _QUANTITY_RE = re.compile(
+        f"(?P<value>[\S]+)[ \t({NBSP})]?" + f"(?P<possible_scaled_unit>{COMPLETE_UNIT_PATTERN})"
+    )
+    _PREFIX_RE = re.compile(PREFIX_PATTERN)
+    _UNIT_RE = re.compile(UNIT_PATTERN)
 
     def __init__(
         self,
@@ -1411,37 +1560,67 @@ class Quantity(Real_Attribute):
         else:
             return str_val
 
+    def _print_state(self) -> tuple[Any, ...]:
+        return super()._print_state() + (self.__unit.symbol, self.__prefix)
+
     def read(self, text: str, overwrite_dependent: bool = False) -> None:
+        self._read_quantity(text, lambda value: self.set(value, overwrite_dependent))
+
+    def _raw_reader(self) -> Callable[[Any, str], None]:
+        # The attributes of the same template have the same units, so the unit, the prefix and
+        # the scales of each scaled unit found in the texts are resolved only once.
+        scaled: dict[str, tuple[str, str, Unit, Decimal, Decimal]] = dict()
+
+        def read(attribute: Quantity, text: str) -> None:
+            value, unit, prefix, converted = self._parse_quantity(text, scaled)
+            if attribute.is_valid(value):
+                attribute.set_unit(unit)
+                attribute.set_prefix(prefix)
+                attribute._hard_set(converted)
+
+        return read
+
+    def _read_quantity(self, text: str, setter: Callable[[Decimal], None]) -> None:
+        value, unit, prefix, converted = self._parse_quantity(text, dict())
+        if self.is_valid(value):
+            self.set_unit(unit)
+            self.set_prefix(prefix)
+            setter(converted)
+
+    def _parse_quantity(
+        self, text: str, scaled: dict[str, tuple[str, str, Unit, Decimal, Decimal]]
+    ) -> tuple[Decimal, str, str, Decimal]:
+        # Returns the read value, the unit and the prefix found in the text and the value
+        # converted to the default scaled unit. The resolved scaled units are kept in 'scaled'.
         text = text.strip()
         if text == "":
             raise Quantity.BlankText(text)
-        matchobj = re.fullmatch(
-            f"(?P<value>[\S]+)[ \t({NBSP})]?"
-            + f"(?P<possible_scaled_unit>{Quantity.COMPLETE_UNIT_PATTERN})",
-            text,
-        )
+        matchobj = Quantity._QUANTITY_RE.fullmatch(text)
         if matchobj is None:
             raise Quantity.CannotExtractQuantity(text)
-
-        read_data = matchobj.groupdict()
-        possible_scaled_unit = read_data["possible_scaled_unit"]
-        prefix, unit = Quantity._separate_prefix_from_unit(possible_scaled_unit)
-        if unit not in self.__units:
-            raise Quantity.UnknownUnitInText(text)
-
-        read_data["value"] = read_data["value"].strip().replace(",", ".")
-        read_data["value"] = self.remove_thousands_separators(read_data["value"])
+        possible_scaled_unit = matchobj["possible_scaled_unit"]
+        if possible_scaled_unit not in scaled:
+            prefix, unit = Quantity._separate_prefix_from_unit(possible_scaled_unit)
+            if unit not in self.__units:
+                raise Quantity.UnknownUnitInText(text)
+            unit_data = self.__units[unit]
+            if prefix not in unit_data.exponents:
+                raise self._reading_exception
+            scaled[possible_scaled_unit] = (
+                unit,
+                prefix,
+                unit_data,
+                Decimal(10) ** Decimal(unit_data.exponents[prefix]),
+                Decimal(10) ** Decimal(-unit_data.exponents[unit_data.default_prefix]),
+            )
+        unit, prefix, unit_data, scale, default_scale = scaled[possible_scaled_unit]
+        value_text = self.remove_thousands_separators(matchobj["value"].strip().replace(",", "."))
         try:
-            value = Decimal(read_data["value"])
-            if self.is_valid(value):
-                self.set_unit(unit)
-                self.set_prefix(prefix)
-                value *= Decimal(10) ** Decimal(self.__units[unit].exponents[prefix])
-                value = self.__units[unit].to_basic(value)
-                value *= Decimal(10) ** Decimal(-self.__unit.exponents[self.__unit.default_prefix])
-                self.set(value, overwrite_dependent)
-        except:
+            value = Decimal(value_text)
+            converted = unit_data.to_basic(value * scale) * default_scale
+        except (InvalidOperation, ValueError):
             raise self._reading_exception
+        return value, unit, prefix, converted
 
     def read_only_value(self, text: str, overwrite_dependent: bool = False) -> None:
         super().read(text, overwrite_dependent)
@@ -1530,6 +1709,7 @@ class Quantity(Real_Attribute):
     WHOLE_UNITS = ["ppm", "mol", "Gy", "Torr", "hp", "ft", "min", "mph"]
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def _separate_prefix_from_unit(possible_scaled_unit: str) -> tuple[str, str]:
         for whole_unit in Quantity.WHOLE_UNITS:
             for k in range(len(possible_scaled_unit), -1, -1):
@@ -1544,8 +1724,8 @@ class Quantity(Real_Attribute):
         while (unit_match is None or prefix_match is None) and (-k) < n:
             k -= 1
             prefix, unit = possible_scaled_unit[:k], possible_scaled_unit[k:]
-            prefix_match = re.fullmatch(Quantity.PREFIX_PATTERN, prefix)
-            unit_match = re.fullmatch(Quantity.UNIT_PATTERN, unit)
+            prefix_match = Quantity._PREFIX_RE.fullmatch(prefix)
+            unit_match = Quantity._UNIT_RE.fullmatch(unit)
         return prefix, unit
 
     class BlankText(Exception):
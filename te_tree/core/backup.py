@@ -0,0 +1,191 @@
+from __future__ import annotations
+import hashlib
+from collections import Counter
+import os
+import time
+from typing import BinaryIO, Iterable, Iterator
+import zlib
+
+
+def _gear_table() -> tuple[int, ...]:
+    # fixed pseudo-random values of the bytes, so that the boundaries never change between runs
+    return tuple(
+        int.from_bytes(hashlib.sha256(bytes([b])).digest()[:8], "little") for b in range(256)
+    )
+
+
+class Backup_Store:
+    """Keeps the backed-up versions of the files as lists of chunks. Each chunk is stored only
+    once, under the hash of its content, so the versions differing only in a few items share
+    nearly all of their chunks.
+
+    The chunk boundaries depend only on the content: a chunk ends after the byte, where the gear
+    rolling hash of the preceding bytes meets the boundary condition. Changing a few bytes of
+    the file thus changes only the chunks containing them, also for the binary files. The number
+    of versions using each chunk is kept, so removing a version does not read the others. The
+    counts are appended to the references file when a version is added, so that adding a version
+    does not rewrite the counts of all the chunks; removing versions rewrites the file with
+    the summed counts.
+
+    The files waiting to be added (e.g. by a background thread) are kept in the pending folder."""
+
+    CHUNK_DIR = "chunks"
+    VERSION_DIR = "versions"
+    PENDING_DIR = "pending"
+    REFS_FILE = "refs"
+    MIN_CHUNK_SIZE = 2048
+    MAX_CHUNK_SIZE = 65536
+    # the high bits of the hash depend on the last 64 bytes, the chunk ends after 8 KiB on average
+    BOUNDARY_MASK = 0x1FFF << 51
+    GEAR = _gear_table()
+
+    def __init__(self, dirpath: str) -> None:
+        self._dirpath = dirpath
+
+    def add(self, filepath: str, name: str) -> str:
+        """Stores the content of the file as a new version of the 'name' and returns the version."""
+        hashes: list[str] = list()
+        with open(filepath, "rb") as file:
+            for chunk in self._chunks(file):
+                hashes.append(self._store_chunk(chunk))
+        version_dir = os.path.join(self._dirpath, self.VERSION_DIR, name)
+        os.makedirs(version_dir, exist_ok=True)
+        version = str(time.time_ns())
+        while os.path.isfile(os.path.join(version_dir, version)):
+            version = str(int(version) + 1)
+        # the references are counted before the version is written, so that an interrupted
+        # backup can leave an unused chunk, but never a version with a removed chunk
+        self._append_refs(Counter(hashes).items())
+        self._write_atomically(
+            os.path.join(version_dir, version), "".join(h + "\n" for h in hashes).encode("ascii")
+        )
+        return version
+
+    def pending_path(self, name: str) -> str:
+        """Path for the file to be added later as a version of the 'name'."""
+        pending_dir = os.path.join(self._dirpath, self.PENDING_DIR)
+        os.makedirs(pending_dir, exist_ok=True)
+        return os.path.join(pending_dir, f"{time.time_ns()} {name}")
+
+    def versions(self, name: str) -> list[str]:
+        """Versions of the 'name' from the oldest to the newest."""
+        version_dir = os.path.join(self._dirpath, self.VERSION_DIR, name)
+        if not os.path.isdir(version_dir):
+            return []
+        return sorted((v for v in os.listdir(version_dir) if v.isdigit()), key=int)
+
+    @staticmethod
+    def time_of(version: str) -> float:
+        return int(version) / 1e9
+
+    def restore(self, name: str, version: str, file: BinaryIO) -> None:
+        """Writes the content of the version to the file."""
+        for chunk_hash in self._manifest(name, version):
+            with open(self._chunk_path(chunk_hash), "rb") as chunk:
+                file.write(zlib.decompress(chunk.read()))
+
+    def remove(self, name: str, *versions: str) -> None:
+        """Removes the versions and the chunks not used by any other version."""
+        if not versions:
+            return
+        refs = self._refs()
+        released: list[str] = list()
+        for version in versions:
+            released.extend(self._manifest(name, version))
+            os.remove(os.path.join(self._dirpath, self.VERSION_DIR, name, version))
+        unused: list[str] = list()
+        for chunk_hash in released:
+            refs[chunk_hash] = refs.get(chunk_hash, 1) - 1
+            if refs[chunk_hash] <= 0:
+                refs.pop(chunk_hash)
+                unused.append(chunk_hash)
+        self._write_refs(refs)
+        for chunk_hash in unused:
+            if os.path.isfile(self._chunk_path(chunk_hash)):
+                os.remove(self._chunk_path(chunk_hash))
+
+    def _chunks(self, file: BinaryIO) -> Iterator[bytes]:
+        gear, mask = self.GEAR, self.BOUNDARY_MASK
+        rest = b""
+        while True:
+            data = rest + file.read(self.MAX_CHUNK_SIZE)
+            if not data:
+                return
+            if len(data) <= self.MIN_CHUNK_SIZE:
+                yield data
+                return
+            end = min(len(data), self.MAX_CHUNK_SIZE)
+            h = 0
+            # the bytes before the minimum size cannot end the chunk; only the last 64 of them
+            # affect the hash
+            for i in range(self.MIN_CHUNK_SIZE - 64, end):
+                h = ((h << 1) + gear[data[i]]) & 0xFFFFFFFFFFFFFFFF
+                if i >= self.MIN_CHUNK_SIZE and not h & mask:
+                    end = i + 1
+                    break
+            yield data[:end]
+            rest = data[end:]
+
+    def _refs(self) -> dict[str, int]:
+        # the numbers of the versions' references to the chunks; counted from the versions, if
+        # the store was created without them
+        path = os.path.join(self._dirpath, self.REFS_FILE)
+        refs: dict[str, int] = dict()
+        if os.path.isfile(path):
+            with open(path, "r") as file:
+                for line in file:
+                    # the line left unfinished by an interrupted backup (whose version has not
+                    # been written) is skipped or counted, so a chunk is never released early
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1].isdigit():
+                        refs[parts[0]] = refs.get(parts[0], 0) + int(parts[1])
+            return refs
+        version_root = os.path.join(self._dirpath, self.VERSION_DIR)
+        if os.path.isdir(version_root):
+            for name in os.listdir(version_root):
+                for version in self.versions(name):
+                    for chunk_hash in self._manifest(name, version):
+                        refs[chunk_hash] = refs.get(chunk_hash, 0) + 1
+        return refs
+
+    def _append_refs(self, counts: Iterable[tuple[str, int]]) -> None:
+        path = os.path.join(self._dirpath, self.REFS_FILE)
+        if not os.path.isfile(path):
+            self._write_refs(self._refs())
+        with open(path, "a+b") as file:
+            lines = "".join(f"{h} {n}\n" for h, n in counts).encode("ascii")
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    # the unfinished line is ended, so that it is not joined with the new one
+                    lines = b"\n" + lines
+            file.write(lines)
+
+    def _write_refs(self, refs: dict[str, int]) -> None:
+        os.makedirs(self._dirpath, exist_ok=True)
+        self._write_atomically(
+            os.path.join(self._dirpath, self.REFS_FILE),
+            "".join(f"{h} {n}\n" for h, n in refs.items()).encode("ascii"),
+        )
+
+    def _chunk_path(self, chunk_hash: str) -> str:
+        return os.path.join(self._dirpath, self.CHUNK_DIR, chunk_hash[:2], chunk_hash)
+
+    def _manifest(self, name: str, version: str) -> list[str]:
+        with open(os.path.join(self._dirpath, self.VERSION_DIR, name, version), "r") as file:
+            return file.read().split()
+
+    def _store_chunk(self, chunk: bytes) -> str:
+        chunk_hash = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(chunk_hash)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_atomically(path, zlib.compress(chunk))
+        return chunk_hash
+
+    @staticmethod
+    def _write_atomically(path: str, content: bytes) -> None:
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
@@ -0,0 +1,399 @@
+from __future__ import annotations
+import dataclasses
+import datetime
+from decimal import Decimal
+import mmap
+import struct
+from typing import Any, Callable, get_args
+
+from te_tree.core.attributes import AbstractAttribute, AttributeType, Choice_Attribute, Quantity
+from te_tree.core.item import Item, ItemCreator
+from te_tree.utils.naming import strip_and_join_spaces
+
+
+MAGIC = b"TETB"
+INDEXED_MAGIC = b"TETI"
+VERSION = 1
+ATTRIBUTE_TYPES: tuple[str, ...] = get_args(AttributeType)
+
+
+@dataclasses.dataclass(frozen=True)
+class Binary_Tree:
+    """Contents of the binary file. The items are listed in preorder as (template index, name,
+    number of children) and their attribute values are stored in columns, one column for each
+    attribute of each template."""
+
+    templates: tuple[tuple[str, tuple[tuple[str, str], ...]], ...]
+    items: tuple[tuple[int, str, int], ...]
+    columns: tuple[tuple[tuple[Any, ...], ...], ...]
+
+    @staticmethod
+    def collect(root: Item, creator: ItemCreator) -> Binary_Tree:
+        template_indices: dict[str, int] = dict()
+        templates: list[tuple[str, tuple[tuple[str, str], ...]]] = list()
+        columns: list[list[list[Any]]] = list()
+        items: list[tuple[int, str, int]] = list()
+        for item in root.preorder(formal=True):
+            creator._check_template_exists_for_item(item)
+            if item.itype not in template_indices:
+                labels = creator.get_template(item.itype).attribute_info.keys()
+                attributes = tuple((label, item.attribute(label).type) for label in labels)
+                template_indices[item.itype] = len(templates)
+                templates.append((item.itype, attributes))
+                columns.append([list() for _ in attributes])
+            index = template_indices[item.itype]
+            items.append((index, item.name, len(item.children) + len(item.formal_children)))
+            for (label, _), column in zip(templates[index][1], columns[index]):
+                column.append(raw_value(item.attribute(label)))
+        return Binary_Tree(
+            tuple(templates),
+            tuple(items),
+            tuple(tuple(tuple(column) for column in template_columns) for template_columns in columns),
+        )
+
+    class NotBinaryCase(Exception):
+        pass
+
+    class UnsupportedVersion(Exception):
+        pass
+
+
+def raw_value(attribute: AbstractAttribute) -> Any:
+    if isinstance(attribute, Quantity):
+        return (attribute.value, attribute.unit, attribute.prefix)
+    elif isinstance(attribute, Choice_Attribute):
+        return strip_and_join_spaces(str(attribute.value))
+    return attribute.value
+
+
+def set_raw_value(attribute: AbstractAttribute, value: Any) -> None:
+    if isinstance(attribute, Quantity):
+        value, unit, prefix = value
+        attribute.set_unit(unit)
+        attribute.set_prefix(prefix)
+        attribute._hard_set(value)
+    elif isinstance(attribute, Choice_Attribute):
+        attribute._read_raw(value)
+    else:
+        attribute._hard_set(value)
+
+
+def encode(tree: Binary_Tree) -> bytes:
+    writer = _Writer()
+    writer.templates(tree.templates)
+    writer.varint(len(tree.items))
+    for template_index, name, child_count in tree.items:
+        writer.varint(template_index)
+        writer.string(name)
+        writer.varint(child_count)
+    for (_, attributes), template_columns in zip(tree.templates, tree.columns):
+        for (_, atype), column in zip(attributes, template_columns):
+            for value in column:
+                writer.value(atype, value)
+    return writer.content()
+
+
+def decode(content: bytes) -> Binary_Tree:
+    reader = _Reader(content)
+    templates = reader.templates()
+    items = tuple(
+        (reader.varint(), reader.string(), reader.varint()) for _ in range(reader.varint())
+    )
+    counts = [0] * len(templates)
+    for template_index, _, _ in items:
+        counts[template_index] += 1
+    columns = tuple(
+        tuple(
+            tuple(reader.value(atype) for _ in range(count)) for _, atype in attributes
+        )
+        for (_, attributes), count in zip(templates, counts)
+    )
+    return Binary_Tree(templates, items, columns)
+
+
+def encode_indexed(tree: Binary_Tree) -> bytes:
+    # The records are written in the reversed preorder, so that the offsets of the children
+    # are known when their parent's record is written. The root's offset follows the templates.
+    writer = _Inline_Writer()
+    writer.templates(tree.templates)
+    root_offset_position = writer.position()
+    writer.u64(0)
+
+    children: list[list[int]] = [list() for _ in tree.items]
+    column_index: list[int] = list()
+    counts = [0] * len(tree.templates)
+    stack: list[list[int]] = list()  # the item and the number of its children yet to come
+    for i, (template_index, _, child_count) in enumerate(tree.items):
+        column_index.append(counts[template_index])
+        counts[template_index] += 1
+        while stack and stack[-1][1] == 0:
+            stack.pop()
+        if stack:
+            children[stack[-1][0]].append(i)
+            stack[-1][1] -= 1
+        stack.append([i, child_count])
+
+    offsets = [0] * len(tree.items)
+    for i in reversed(range(len(tree.items))):
+        template_index, name, _ = tree.items[i]
+        offsets[i] = writer.position()
+        writer.varint(template_index)
+        writer.string(name)
+        attributes = tree.templates[template_index][1]
+        for (_, atype), column in zip(attributes, tree.columns[template_index]):
+            writer.value(atype, column[column_index[i]])
+        writer.varint(len(children[i]))
+        for child in children[i]:
+            writer.u64(offsets[child])
+    if offsets:
+        writer.set_u64(root_offset_position, offsets[0])
+    return writer.content()
+
+
+class Indexed_File:
+    """Random access to the records of the indexed binary file. Each record holds the name and
+    values of a single item and the offsets of the records of its children. The content may be
+    memory-mapped, as only the requested records are read. The loaders of the records still to
+    be read are kept and the mapping is closed as soon as the last of them is run, so that
+    the file can be replaced (on Windows, a mapped file cannot)."""
+
+    def __init__(self, content: bytes | mmap.mmap) -> None:
+        self._content = content
+        self._reader = _Inline_Reader(content)
+        self.templates = self._reader.templates()
+        self.root_offset = self._reader.u64()
+        self._pending: dict[int, Callable[[], Any]] = dict()
+
+    @property
+    def closed(self) -> bool:
+        return isinstance(self._content, mmap.mmap) and self._content.closed
+
+    def defer(self, offset: int, load: Callable[[], Any]) -> None:
+        """Keeps the loader of the children of the record at the offset."""
+        self._pending[offset] = load
+
+    def loaded(self, offset: int) -> None:
+        """Marks the children of the record as read and closes the file after the last ones."""
+        self._pending.pop(offset, None)
+        if not self._pending:
+            self.close()
+
+    def load_all(self) -> None:
+        """Runs all the pending loaders (including those deferred by them), closing the file."""
+        while self._pending:
+            offset, load = next(iter(self._pending.items()))
+            load()
+            self._pending.pop(offset, None)
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._content, mmap.mmap) and not self._content.closed:
+            self._content.close()
+
+    def record(self, offset: int) -> tuple[int, str, tuple[Any, ...], tuple[int, ...]]:
+        reader = self._reader
+        reader.seek(offset)
+        template_index = reader.varint()
+        name = reader.string()
+        values = tuple(reader.value(atype) for _, atype in self.templates[template_index][1])
+        child_offsets = tuple(reader.u64() for _ in range(reader.varint()))
+        return template_index, name, values, child_offsets
+
+
+class _Writer:
+    """Writes the body and collects the string table, which precedes the body in the file."""
+
+    magic = MAGIC
+
+    def __init__(self) -> None:
+        self._body = bytearray()
+        self._strings: dict[str, int] = dict()
+
+    def content(self) -> bytes:
+        return bytes(self._header() + self._string_table() + self._body)
+
+    def _header(self) -> bytearray:
+        header = bytearray(self.magic)
+        header.append(VERSION)
+        return header
+
+    def _string_table(self) -> bytearray:
+        table = _Inline_Writer()
+        table.varint(len(self._strings))
+        for text in self._strings:
+            table.string(text)
+        return table._body
+
+    def templates(self, templates: tuple[tuple[str, tuple[tuple[str, str], ...]], ...]) -> None:
+        self.varint(len(templates))
+        for itype, attributes in templates:
+            self.string(itype)
+            self.varint(len(attributes))
+            for label, atype in attributes:
+                self.string(label)
+                self.varint(ATTRIBUTE_TYPES.index(atype))
+
+    def varint(self, n: int) -> None:
+        while n > 0x7F:
+            self._body.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self._body.append(n)
+
+    def signed(self, n: int) -> None:
+        self.varint(n * 2 if n >= 0 else -n * 2 - 1)
+
+    def string(self, text: str) -> None:
+        if text not in self._strings:
+            self._strings[text] = len(self._strings)
+        self.varint(self._strings[text])
+
+    def number(self, value: int | float | Decimal) -> None:
+        if isinstance(value, int):
+            self._body.append(0)
+            self.signed(int(value))
+        elif isinstance(value, float):
+            self._body.append(1)
+            self._body.extend(struct.pack("<d", value))
+        elif value.is_finite():
+            sign, digits, exponent = value.as_tuple()
+            self._body.append(2)
+            self.varint(int("".join(map(str, digits))) * 2 + sign)
+            self.signed(int(exponent))
+        else:
+            self._body.append(3)
+            self.string(str(value))
+
+    def value(self, atype: str, value: Any) -> None:
+        if atype == "bool":
+            self._body.append(int(bool(value)))
+        elif atype in ("integer", "real", "money"):
+            self.number(value)
+        elif atype == "quantity":
+            self.number(value[0])
+            self.string(value[1])
+            self.string(value[2])
+        elif atype == "date":
+            self.varint(value.toordinal())
+        else:
+            self.string(value)
+
+
+class _Inline_Writer(_Writer):
+    """Writes the strings directly into the body, so that each part of the body can be read
+    separately."""
+
+    magic = INDEXED_MAGIC
+
+    def content(self) -> bytes:
+        return bytes(self._header() + self._body)
+
+    def position(self) -> int:
+        return len(self.magic) + 1 + len(self._body)
+
+    def string(self, text: str) -> None:
+        encoded = text.encode("utf-8")
+        self.varint(len(encoded))
+        self._body.extend(encoded)
+
+    def u64(self, n: int) -> None:
+        self._body.extend(struct.pack("<Q", n))
+
+    def set_u64(self, position: int, n: int) -> None:
+        struct.pack_into("<Q", self._body, position - len(self.magic) - 1, n)
+
+
+class _Reader:
+
+    magic = MAGIC
+
+    def __init__(self, content: bytes | mmap.mmap) -> None:
+        if content[: len(self.magic)] != self.magic:
+            raise Binary_Tree.NotBinaryCase(content[: len(self.magic)])
+        if content[len(self.magic)] != VERSION:
+            raise Binary_Tree.UnsupportedVersion(content[len(self.magic)])
+        self._content = content
+        self._pos = len(self.magic) + 1
+        self._strings: list[str] = self._string_table()
+
+    def _string_table(self) -> list[str]:
+        return [self._inline_string() for _ in range(self.varint())]
+
+    def _inline_string(self) -> str:
+        length = self.varint()
+        self._pos += length
+        return self._content[self._pos - length : self._pos].decode("utf-8")
+
+    def templates(self) -> tuple[tuple[str, tuple[tuple[str, str], ...]], ...]:
+        templates: list[tuple[str, tuple[tuple[str, str], ...]]] = list()
+        for _ in range(self.varint()):
+            itype = self.string()
+            attributes = tuple(
+                (self.string(), ATTRIBUTE_TYPES[self.varint()]) for _ in range(self.varint())
+            )
+            templates.append((itype, attributes))
+        return tuple(templates)
+
+    def byte(self) -> int:
+        self._pos += 1
+        return self._content[self._pos - 1]
+
+    def varint(self) -> int:
+        n, shift = 0, 0
+        while True:
+            b = self.byte()
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def signed(self) -> int:
+        n = self.varint()
+        return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+    def string(self) -> str:
+        return self._strings[self.varint()]
+
+    def number(self) -> int | float | Decimal:
+        tag = self.byte()
+        if tag == 0:
+            return self.signed()
+        elif tag == 1:
+            self._pos += 8
+            return struct.unpack("<d", self._content[self._pos - 8 : self._pos])[0]
+        elif tag == 2:
+            n = self.varint()
+            exponent = self.signed()
+            digits = tuple(int(d) for d in str(n // 2))
+            return Decimal((n % 2, digits, exponent))
+        else:
+            return Decimal(self.string())
+
+    def value(self, atype: str) -> Any:
+        if atype == "bool":
+            return bool(self.byte())
+        elif atype in ("integer", "real", "money"):
+            return self.number()
+        elif atype == "quantity":
+            return (self.number(), self.string(), self.string())
+        elif atype == "date":
+            return datetime.date.fromordinal(self.varint())
+        else:
+            return self.string()
+
+
+class _Inline_Reader(_Reader):
+
+    magic = INDEXED_MAGIC
+
+    def _string_table(self) -> list[str]:
+        return []
+
+    def seek(self, position: int) -> None:
+        self._pos = position
+
+    def string(self) -> str:
+        return self._inline_string()
+
+    def u64(self) -> int:
+        self._pos += 8
+        return struct.unpack("<Q", self._content[self._pos - 8 : self._pos])[0]
@@ -5,6 +5,8 @@ import abc
 import re
 from functools import partial
 import os
+import queue
+import threading
 
 import xml.etree.ElementTree as et
 
@@ -16,11 +18,16 @@ from te_tree.core.item import (
     Template,
     Attribute_Data_Constructor,
     FileType,
+    Backup_Retention,
     freeatt,
     freeatt_child,
     freeatt_parent,
 )  # keep these imports to be further imported elsewhere
 from te_tree.core.attributes import Locale_Code, Currency_Code
+from te_tree.core.query import Query_Engine, Condition
+from te_tree.core.aggregates import Aggregate, Aggregate_Cache
+from te_tree.core.table import Item_Table
+from te_tree.core.sqlite_store import SQLite_Store
 
 
 CASE_TYPE_LABEL = "__Case__"
@@ -224,6 +231,9 @@ class Editor:
         self._actions_on_selection: dict[str, list[Callable[[], None]]] = dict()
 
         self._merging_rules: dict[str, dict[str, _MergeFunc]] = case_template.merging_rules.copy()
+        self._query = Query_Engine(self._root)
+        self._aggregates: Optional[Aggregate_Cache] = None
+        self._store: Optional[SQLite_Store] = None
 
     @property
     def attributes(self) -> dict[str, dict[str, Any]]:
@@ -269,6 +279,25 @@ class Editor:
     def selection_is_groupable(self) -> bool:
         return self.is_groupable(self._selection)
 
+    def aggregate(self, item: Item, aggregate: Aggregate) -> Any:
+        if self._aggregates is None:
+            self._aggregates = Aggregate_Cache(self._root)
+        return self._aggregates(item, aggregate)
+
+    def add_index(self, attribute_label: str) -> None:
+        self._query.add_index(attribute_label)
+
+    def remove_index(self, attribute_label: str) -> None:
+        self._query.remove_index(attribute_label)
+
+    def query(
+        self,
+        *conditions: Condition,
+        itype: Optional[str | tuple[str, ...]] = None,
+        scope: Optional[Item] = None,
+    ) -> list[Item]:
+        return self._query(*conditions, itype=itype, scope=scope)
+
     def add_action_on_selection(self, owner_id: str, action: Callable[[], None]) -> None:
         if owner_id not in self._actions_on_selection:
             self._actions_on_selection[owner_id] = list()
@@ -284,7 +313,7 @@ class Editor:
         )
         return can_paste_under or can_paste_next_to
 
-    def _cases(self) -> set[Item]:
+    def _cases(self) -> list[Item]:
         return self._root.children.copy()
 
     def can_save_as_item(self, item: Item) -> bool:
@@ -377,8 +406,9 @@ class Editor:
                     self.insertable,
                     name=self._lang.label("Miscellaneous", "new_group"),
                 )
-                for item in items:
-                    orig_parent.pass_to_new_parent(item, new_parent)
+                grouped = [child for child in orig_parent.children if child in items]
+                orig_parent.leave_many(*grouped)
+                new_parent.adopt_many(*grouped)
                 return new_parent
 
             return move_under_group_parent()
@@ -389,8 +419,9 @@ class Editor:
 
         @self._creator._controller.single_cmd()
         def do_ungrouping() -> None:
-            for child in item.children:
-                item.pass_to_new_parent(child, item.parent)
+            children = item.children
+            item.leave_many(*children)
+            item.parent.adopt_many(*children)
             item.parent.leave(item)
 
         do_ungrouping()
@@ -407,6 +438,35 @@ class Editor:
 
         return load_and_adopt()
 
+    def export_table(self, filepath: str, *items: Item) -> None:
+        # without the items given, the selected items are exported
+        if not items:
+            items = tuple(self._selection)
+        table = self._item_table()
+        if filepath.endswith(".parquet"):
+            table.export_parquet(filepath, *items)
+        else:
+            table.export_csv(filepath, *items)
+
+    def import_table(self, parent: Item, filepath: str) -> list[Item]:
+        # the items are built without running any command and are all adopted in a single one,
+        # after checking that none of them is refused by the parent
+        table = self._item_table()
+        if filepath.endswith(".parquet"):
+            items = table.import_parquet(filepath, self._creator)
+        else:
+            items = table.import_csv(filepath, self._creator)
+        for item in items:
+            if not parent._can_be_parent_of_item_type(item):
+                raise Editor.InvalidChildTypeUnderGivenParent(
+                    f"Parent type: {parent.itype}, child type: {item.itype}."
+                )
+        parent.adopt_many(*items)
+        return items
+
+    def _item_table(self) -> Item_Table:
+        return Item_Table({label: info["atype"] for label, info in self._attributes.items()})
+
     @staticmethod
     def is_case(item: Item) -> bool:
         if item is None or item.is_null():
@@ -438,6 +498,54 @@ class Editor:
 
         return load_case_and_add_to_editor()
 
+    def load_cases(
+        self, dirpath: str, names: list[str], ftype: FileType, max_workers: Optional[int] = None
+    ) -> list[Item]:
+        # the files are parsed in parallel, the cases are added to the editor at once
+        @self._creator._controller.single_cmd()
+        def load_cases_and_add_to_editor() -> list[Item]:
+            files = [(dirpath, name, ftype) for name in names]
+            cases = self._creator.load_many(files, max_workers)
+            self._root.adopt_many(*cases)
+            return cases
+
+        return load_cases_and_add_to_editor()
+
+    def use_store(self, filepath: str) -> None:
+        """Opens the SQLite store, to which the changes of the stored cases are committed after
+        each command."""
+        self.close_store()
+        self._store = SQLite_Store(filepath, self._creator)
+
+    def close_store(self) -> None:
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def store_case(self, case: Item) -> None:
+        if not self.is_case(case):
+            raise Editor.CannotSaveAsItem(case.name)
+        self._opened_store().add(case)
+
+    def stored_case_names(self) -> list[str]:
+        return self._opened_store().case_names()
+
+    def load_case_from_store(self, name: str) -> Item:
+        store = self._opened_store()
+
+        @self._creator._controller.single_cmd()
+        def load_case_and_add_to_editor() -> Item:
+            case = store.load(name)
+            self._root.adopt(case)
+            return case
+
+        return load_case_and_add_to_editor()
+
+    def _opened_store(self) -> SQLite_Store:
+        if self._store is None:
+            raise Editor.NoStoreIsUsed
+        return self._store
+
     def merge_selection(self) -> Item:
         return self.merge(*self._selection)
 
@@ -459,7 +567,7 @@ class Editor:
             merge_result = self.new(parent, itype)
             # parent must leave the original items
             _set_merged_item_attributes(items, merge_result)
-            parent.leave(*items)
+            parent.leave_many(*items)
             return merge_result
 
         return new_merged_item()
@@ -521,13 +629,32 @@ class Editor:
 
     def remove_case(self, case: Item) -> None:
         self._root.leave(case)
+        self._creator.forget_saved_changes(case)
 
-    def save(self, item: Item, filetype: FileType) -> None:
+    def save(self, item: Item, filetype: FileType, incremental: bool = False) -> None:
+        # the incremental save keeps the serialized subtrees of the saved item in memory
         if Editor.is_case(item) or self.can_save_as_item(item):
             self._creator.save(
                 item,
                 filetype,
                 backup_folder_name=self._lang.label("Miscellaneous", "backup_folder_name"),
+                incremental=incremental,
+            )
+        else:
+            raise Editor.CannotSaveAsItem(item.name, item.itype)
+
+    def save_in_background(
+        self,
+        item: Item,
+        filetype: FileType,
+        on_done: Optional[Callable[[Optional[Exception]], None]] = None,
+    ) -> threading.Thread:
+        if Editor.is_case(item) or self.can_save_as_item(item):
+            return self._creator.save_in_background(
+                item,
+                filetype,
+                backup_folder_name=self._lang.label("Miscellaneous", "backup_folder_name"),
+                on_done=on_done,
             )
         else:
             raise Editor.CannotSaveAsItem(item.name, item.itype)
@@ -566,6 +693,12 @@ class Editor:
         self._selection.clear()
         self._run_actions_on_selection()
 
+    def set_backup_retention(self, retention: Backup_Retention) -> None:
+        self._creator.set_backup_retention(retention)
+
+    def set_backup_deduplication(self, deduplicate: bool) -> None:
+        self._creator.set_backup_deduplication(deduplicate)
+
     def set_dir_path(self, dirpath: str) -> None:
         self._creator.set_dir_path(dirpath)
 
@@ -595,6 +728,9 @@ class Editor:
     class InvalidChildTypeUnderGivenParent(Exception):
         pass
 
+    class NoStoreIsUsed(Exception):
+        pass
+
     class UndefinedTemplate(ItemCreator.UndefinedTemplate):
         pass
 
@@ -680,6 +816,10 @@ class EditorUI(abc.ABC):
         self._item_menu = item_menu
         self._item_window = item_window
         self._caseview = caseview
+        # the background saves put here the saved case and the raised exception (or None)
+        self._finished_saves: queue.SimpleQueue[tuple[Item, Optional[Exception]]] = (
+            queue.SimpleQueue()
+        )
         self._compose()
         if lang is None:
             lang = Lang_Object.get_lang_object()
@@ -745,7 +885,23 @@ class EditorUI(abc.ABC):
         if not self._editor.does_file_exist(case, "xml"):
             self.save_case_to_xml(case)
         else:
-            self._editor.save(case, "xml")
+            self._editor.save_in_background(
+                case, "xml", on_done=lambda error: self._finished_saves.put((case, error))
+            )
+
+    def report_finished_saves(self) -> None:
+        # The background saves finish on the worker threads. This has to be called from the UI
+        # thread (repeatedly, as the UI polls the saves), so the errors are shown by the UI.
+        while not self._finished_saves.empty():
+            case, error = self._finished_saves.get()
+            if error is not None:
+                self._show_error(
+                    self._lang.label("Miscellaneous", "saving_failed"), f"{case.name}: {error}"
+                )
+
+    @abc.abstractmethod
+    def _show_error(self, title: str, message: str) -> None:
+        pass
 
     @abc.abstractmethod
     def _get_xml_path(self) -> tuple[str, str]:
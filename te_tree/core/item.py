@@ -1,10 +1,17 @@
 from __future__ import annotations
-from typing import Any, Callable, Optional, Literal
+from typing import Any, BinaryIO, Callable, Collection, Iterator, Optional, Literal, TYPE_CHECKING
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 import dataclasses
 import abc
 
+import gzip
+import heapq
 import shutil
+import threading
 import time
+import weakref
+import xml.etree.ElementTree as et
 
 from te_tree.cmd.commands import (
     Command,
@@ -18,11 +25,23 @@ from te_tree.core.attributes import (
     attribute_factory,
     Attribute,
     Attribute_List,
+    Set_Attr,
     Set_Attr_Data,
     Attribute_Data_Constructor,
 )
 from te_tree.core.attributes import Edit_AttrList_Data
+from te_tree.core.attributes import (
+    Edit_AttrList_Many_Data,
+    Extend_Attribute_List,
+    Remove_Many_From_Attribute_List,
+)
 from te_tree.core.attributes import NBSP
+from te_tree.core.xml_writer import write_xml
+from te_tree.core.backup import Backup_Store
+
+if TYPE_CHECKING:  # pragma: no cover
+    from te_tree.core.xml_chunks import Xml_Chunk_Cache
+    from te_tree.core.binary import Binary_Tree, Indexed_File
 
 
 def freeatt(label: str) -> Template.FreeAttribute:
@@ -69,7 +88,91 @@ class Template:
         owner: Template.AttributeOwner
 
 
-FileType = Literal["xml"]
+# the 'gz' and 'zst' suffixes mark the files compressed by the gzip and zstandard
+FileType = Literal["xml", "bin", "ibin", "xml.gz", "xml.zst", "bin.gz", "bin.zst"]
+XML_Record = tuple[str, dict[str, str], int]
+# the content of the saved file, either the bytes or the function writing them to the file
+File_Content = bytes | Callable[[BinaryIO], None]
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _file_format(ftype: FileType) -> str:
+    return ftype.split(".")[0]
+
+
+def _zstandard() -> Any:
+    # the zstandard is needed only for reading and writing the zstandard-compressed files
+    try:
+        import zstandard
+    except ImportError:
+        raise ItemCreator.CompressionNotAvailable("zstandard")
+    return zstandard
+
+
+def _open_case_file(filepath: str) -> BinaryIO:
+    # The compressed file is recognized by its first bytes and decompressed while being read.
+    file = open(filepath, "rb")
+    magic = file.read(len(ZSTD_MAGIC))
+    file.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        file.close()
+        return gzip.open(filepath, "rb")
+    elif magic == ZSTD_MAGIC:
+        try:
+            return _zstandard().ZstdDecompressor().stream_reader(file)
+        except ItemCreator.CompressionNotAvailable:
+            file.close()
+            raise
+    return file
+
+
+def _compressed(content: File_Content, ftype: FileType) -> File_Content:
+    # the content is written through the compressor, it is never compressed as a whole in memory
+    compression = ftype.split(".")[1] if "." in ftype else ""
+    if not compression:
+        return content
+
+    def write(file: BinaryIO) -> None:
+        stream: Any
+        if compression == "gz":
+            stream = gzip.GzipFile(filename="", mode="wb", fileobj=file, mtime=0)
+        else:
+            stream = _zstandard().ZstdCompressor().stream_writer(file, closefd=False)
+        with stream:
+            if isinstance(content, bytes):
+                stream.write(content)
+            else:
+                content(stream)
+
+    return write
+
+
+def _parse_case_file(filepath: str, ftype: FileType) -> Any:
+    # Runs in the worker processes. The file is parsed into a form not depending on the
+    # templates, from which the items are then built by the creator.
+    if _file_format(ftype) == "bin":
+        from te_tree.core.binary import decode
+
+        with _open_case_file(filepath) as file:
+            return decode(file.read())
+    elif ftype == "ibin":
+        # only the root is read when loading the indexed file, so there is nothing to parse
+        return None
+    # the elements are listed in preorder as (tag, attributes, number of children)
+    records: list[list[Any]] = list()
+    open_records: list[int] = list()
+    with _open_case_file(filepath) as file:
+        for event, xml_elem in et.iterparse(file, events=("start", "end")):
+            if event == "start":
+                if open_records:
+                    records[open_records[-1]][2] += 1
+                open_records.append(len(records))
+                records.append([xml_elem.tag, dict(xml_elem.attrib), 0])
+            else:
+                open_records.pop()
+                xml_elem.clear()
+    return [(tag, attrib, child_count) for tag, attrib, child_count in records]
 from te_tree.core.attributes import Locale_Code, AttributeType, Currency_Code
 
 
@@ -84,8 +187,24 @@ class ItemCreator:
         self._controller = Controller()
         self._attrfac = attribute_factory(self._controller, locale_code, currency_code)
         self.__templates: dict[str, Template] = {}
+        self.__template_bindings: dict[str, dict[str, Item.BindingInfo]] = {}
+        self.__validated_templates: set[str] = set()
         self.__file_path: str = "."
         self.__ignore_duplicit_names = ignore_duplicit_names
+        self.__xml_chunk_caches: dict[Item, Xml_Chunk_Cache] = dict()
+        self.__save_lock = threading.Lock()
+        self.__backup_retention = Backup_Retention()
+        self.__deduplicate_backups: bool = False
+        # the replaced files are added to the backup store one by one, after they are replaced
+        self.__backup_worker: Optional[ThreadPoolExecutor] = None
+        self.__backups: list[Future] = list()
+        self.__raw_readers: dict[str, tuple[tuple[str, Callable[[Any, str], None]], ...]] = {}
+        # the memory-mapped indexed files with some of the items not yet built
+        self.__indexed_files: weakref.WeakValueDictionary[str, Indexed_File] = (
+            weakref.WeakValueDictionary()
+        )
+        self.__saves_started: int = 0
+        self.__last_written_save: dict[str, int] = dict()
 
     @property
     def templates(self) -> tuple[str, ...]:
@@ -147,28 +266,209 @@ class ItemCreator:
 
     import xml.etree.ElementTree as et
     import os
+    import mmap
 
     def load(self, dirpath: str, name: str, ftype: FileType) -> Item:
         filepath = self._create_and_check_filepath(dirpath, name, ftype)
-        root_elem = self.et.parse(filepath).getroot()
-        loaded_item = self._build_item_from_xml(root_elem)
+        if _file_format(ftype) == "bin":
+            return self._build_items_from_binary_file(filepath)
+        elif ftype == "ibin":
+            return self._build_items_from_indexed_file(filepath)
+        loaded_item = self._build_items_from_xml_file(filepath)
         return loaded_item
 
-    def _build_item_from_xml(self, xml_elem: et.Element) -> Item:
-        self._check_template_is_available(xml_elem.tag)
-        item = self.from_template(xml_elem.tag)
-        item.rename(xml_elem.attrib["name"])
-        self._read_attribute_values_from_xml_elem(item, xml_elem)
+    def load_many(
+        self, files: list[tuple[str, str, FileType]], max_workers: Optional[int] = None
+    ) -> list[Item]:
+        # The files given as (dirpath, name, file type) are parsed concurrently by a pool of
+        # processes. The items are built from the parsed content on the calling thread.
+        filepaths = [self._create_and_check_filepath(*file) for file in files]
+        ftypes = [ftype for _, _, ftype in files]
+        if len(files) < 2:
+            parsed = list(map(_parse_case_file, filepaths, ftypes))
+        else:
+            with ProcessPoolExecutor(max_workers) as executor:
+                parsed = list(executor.map(_parse_case_file, filepaths, ftypes))
+        items: list[Item] = list()
+        for filepath, ftype, content in zip(filepaths, ftypes, parsed):
+            if _file_format(ftype) == "bin":
+                items.append(self._build_items_from_binary_tree(content))
+            elif ftype == "ibin":
+                items.append(self._build_items_from_indexed_file(filepath))
+            else:
+                items.append(self._build_items_from_xml_records(content))
+        return items
+
+    def _build_items_from_binary_file(self, filepath: str) -> Item:
+        # imported here, as the binary format refers to the items defined in this module
+        from te_tree.core.binary import decode
+
+        with _open_case_file(filepath) as file:
+            return self._build_items_from_binary_tree(decode(file.read()))
+
+    def _build_items_from_binary_tree(self, tree: Binary_Tree) -> Item:
+        from te_tree.core.binary import set_raw_value
+
+        # the items are built in the same way as when loading the XML file, the stack holds
+        # the items still waiting for some of their children
+        stack: list[tuple[Item, int, list[Item]]] = list()
+        built: list[Item] = list()
+        loaded_item: Item = ItemImpl.NULL
+        value_index = [0] * len(tree.templates)
+        for template_index, name, child_count in tree.items:
+            itype, attributes = tree.templates[template_index]
+            self._check_template_is_available(itype)
+            parent = stack[-1][0] if stack else None
+            item = self._from_template(itype, name, parent, update=False)
+            k = value_index[template_index]
+            value_index[template_index] += 1
+            for (label, atype), column in zip(attributes, tree.columns[template_index]):
+                if item.has_attribute(label) and item.attribute(label).type == atype:
+                    set_raw_value(item.attribute(label), column[k])
+
+            if stack:
+                stack[-1][2].append(item)
+            else:
+                loaded_item = item
+            stack.append((item, child_count, list()))
+            while stack and len(stack[-1][2]) == stack[-1][1]:
+                finished, _, children = stack.pop()
+                finished._attach_children(children)
+                built.append(finished)
+        self._update_dependent_values(built)
+        return loaded_item
+
+    def _build_items_from_indexed_file(self, filepath: str) -> Item:
+        # Only the root is built. The children of each item are built when they are accessed for
+        # the first time, reading their records from the memory-mapped file. The dependent values
+        # are stored in the file, so they are not computed again.
+        # The file stays mapped only until all the children are built, e.g. by saving the case
+        # or by starting a tree observer (walking the whole tree). Before the file is replaced
+        # by saving another case under its name, the rest of the items is built.
+        from te_tree.core.binary import Indexed_File
+
+        with open(filepath, "rb") as file:
+            content = self.mmap.mmap(file.fileno(), 0, access=self.mmap.ACCESS_READ)
+        indexed = Indexed_File(content)
+        root = self._build_indexed_item(indexed, indexed.root_offset)
+        if root.has_children():
+            self.__indexed_files[self.os.path.abspath(filepath)] = indexed
+        else:
+            indexed.close()
+        return root
+
+    def _build_indexed_item(
+        self, indexed: Indexed_File, offset: int, parent: Optional[Item] = None
+    ) -> Item:
+        from te_tree.core.binary import set_raw_value
+
+        template_index, name, values, child_offsets = indexed.record(offset)
+        itype, attributes = indexed.templates[template_index]
+        self._check_template_is_available(itype)
+        item = self._from_template(itype, name, parent, update=False)
+        for (label, atype), value in zip(attributes, values):
+            if item.has_attribute(label) and item.attribute(label).type == atype:
+                set_raw_value(item.attribute(label), value)
+        if child_offsets:
+
+            def load_children() -> list[Item]:
+                children = [self._build_indexed_item(indexed, k, item) for k in child_offsets]
+                indexed.loaded(offset)
+                return children
+
+            item._defer_children(load_children)
+            indexed.defer(offset, item._load_deferred_children)
+        return item
+
+    def _build_items_from_xml_file(self, filepath: str) -> Item:
+        # The items are built while the file is being parsed and the consumed elements are
+        # discarded, so that the whole element tree is never held in memory. No commands are run:
+        # the raw values are read, the dependencies are wired without updating their outputs and
+        # the children are attached to their parent after all of them have been built.
+        # The dependent values are computed only once, after the whole tree is built.
+        items: list[Item] = list()
+        children: list[list[Item]] = list()
+        elements: list[et.Element] = list()
+        built: list[Item] = list()
+        loaded_item: Item = ItemImpl.NULL
+        with _open_case_file(filepath) as file:
+            for event, xml_elem in self.et.iterparse(file, events=("start", "end")):
+                if event == "start":
+                    parent = items[-1] if items else None
+                    items.append(self._build_item_from_xml(xml_elem, parent))
+                    children.append(list())
+                    elements.append(xml_elem)
+                    continue
+                item = items.pop()
+                item._attach_children(children.pop())
+                built.append(item)
+                elements.pop()
+                if elements:
+                    elements[-1].remove(xml_elem)
+                    children[-1].append(item)
+                else:
+                    loaded_item = item
+                xml_elem.clear()
+        self._update_dependent_values(built)
+        return loaded_item
 
-        @self._controller.single_cmd()
-        def build_and_adopt():
-            child = self._build_item_from_xml(sub_elem)
-            item.adopt(child)
+    def _build_items_from_xml_records(self, records: list[XML_Record]) -> Item:
+        # the same as loading the XML file, the stack holds the items still waiting for some
+        # of their children
+        stack: list[tuple[Item, int, list[Item]]] = list()
+        built: list[Item] = list()
+        loaded_item: Item = ItemImpl.NULL
+        for tag, attrib, child_count in records:
+            self._check_template_is_available(tag)
+            parent = stack[-1][0] if stack else None
+            item = self._from_template(tag, attrib["name"], parent, update=False)
+            self._read_attribute_values(item, attrib)
+            if stack:
+                stack[-1][2].append(item)
+            else:
+                loaded_item = item
+            stack.append((item, child_count, list()))
+            while stack and len(stack[-1][2]) == stack[-1][1]:
+                finished, _, children = stack.pop()
+                finished._attach_children(children)
+                built.append(finished)
+        self._update_dependent_values(built)
+        return loaded_item
 
-        for sub_elem in xml_elem:
-            build_and_adopt()
+    def _build_item_from_xml(self, xml_elem: et.Element, parent: Optional[Item] = None) -> Item:
+        self._check_template_is_available(xml_elem.tag)
+        item = self._from_template(xml_elem.tag, xml_elem.attrib["name"], parent, update=False)
+        self._read_attribute_values_from_xml_elem(item, xml_elem)
         return item
 
+    @staticmethod
+    def _update_dependent_values(items: list[Item]) -> None:
+        # Every dependent attribute is set only after all of its dependent inputs have been set.
+        waiting: dict[AbstractAttribute, int] = dict()
+        for item in items:
+            for attr in item.attributes.values():
+                if attr.dependent:
+                    waiting[attr] = 0
+        dependents: dict[AbstractAttribute, list[AbstractAttribute]] = dict()
+        for output in waiting:
+            inputs = list(output.dependency._inputs)
+            while inputs:
+                input = inputs.pop()
+                if isinstance(input, Attribute_List):
+                    inputs.extend(input.attributes)
+                elif input in waiting:
+                    waiting[output] += 1
+                    dependents.setdefault(input, list()).append(output)
+
+        ready = deque(output for output, n in waiting.items() if n == 0)
+        while ready:
+            output = ready.popleft()
+            Set_Attr(output.dependency._data_converter()).run()
+            for dependent in dependents.get(output, ()):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
     def _create_and_check_filepath(self, dirpath: str, name: str, ftype: FileType) -> str:
         filepath = dirpath + "/" + name + "." + ftype
         if self.os.path.isfile(filepath):
@@ -183,28 +483,275 @@ class ItemCreator:
     def _read_attribute_values_from_xml_elem(
         self, loaded_item: Item, xml_elem: et.Element
     ) -> None:
-        for attr_name in loaded_item.attributes:
-            if attr_name in xml_elem.attrib:
-                loaded_item.attributes[attr_name].read(
-                    xml_elem.attrib[attr_name], overwrite_dependent=True
-                )
+        self._read_attribute_values(loaded_item, xml_elem.attrib)
+
+    def _read_attribute_values(self, loaded_item: Item, attrib: dict[str, str]) -> None:
+        for label, read in self._raw_readers(loaded_item):
+            text = attrib.get(label)
+            if text is not None:
+                read(loaded_item.attribute(label), text)
+
+    def _raw_readers(self, item: Item) -> tuple[tuple[str, Callable[[Any, str], None]], ...]:
+        # The readers are made from the attributes of the first loaded item of each template
+        # and reused for every other loaded item of the template. Most of them only convert
+        # the text, the readers of the quantities resolve each scaled unit only once.
+        if item.itype not in self.__raw_readers:
+            self.__raw_readers[item.itype] = tuple(
+                (label, attr._raw_reader()) for label, attr in item.attributes.items()
+            )
+        return self.__raw_readers[item.itype]
+
+    def save(
+        self,
+        item: Item,
+        filetype: FileType,
+        backup_folder_name: str = "",
+        incremental: bool = False,
+    ) -> None:
+        content: File_Content
+        if _file_format(filetype) == "bin":
+            from te_tree.core.binary import Binary_Tree, encode
 
-    def save(self, item: Item, filetype: FileType, backup_folder_name: str = "") -> None:
-        xml_tree = self.et.ElementTree(self._create_xml_items_hierarchy(item))
-        self.et.indent(xml_tree, space="\t")
-        filename = item.name + "." + filetype
-        filepath = self.os.path.join(self.file_path, filename)
+            content = encode(Binary_Tree.collect(item, self))
+        elif filetype == "ibin":
+            from te_tree.core.binary import Binary_Tree, encode_indexed
+
+            content = encode_indexed(Binary_Tree.collect(item, self))
+        elif incremental:
+            content = self._xml_chunk_cache(item).write
+        else:
+            content = lambda file: self._write_xml(file, item)
+        filepath = self.os.path.join(self.file_path, item.name + "." + filetype)
+        with self.__save_lock:
+            self.__saves_started += 1
+            self._write_file(self.file_path, item.name, filetype, backup_folder_name, content)
+            self.__last_written_save[filepath] = self.__saves_started
+
+    def save_in_background(
+        self,
+        item: Item,
+        filetype: FileType,
+        backup_folder_name: str = "",
+        on_done: Optional[Callable[[Optional[Exception]], None]] = None,
+    ) -> threading.Thread:
+        # Only the snapshot is taken on the caller's thread. The snapshot is serialized and
+        # written by a worker thread, which reports the result (None or the raised exception)
+        # through 'on_done'. A snapshot older than the last written one is never written.
+        dirpath, name = self.file_path, item.name
+        filepath = self.os.path.join(dirpath, name + "." + filetype)
+        # the items of the replaced file are built on the caller's thread, not by the worker
+        self._load_indexed_file(filepath)
+        serialize: Callable[[], File_Content]
+        if _file_format(filetype) == "bin":
+            from te_tree.core.binary import Binary_Tree, encode
+
+            tree = Binary_Tree.collect(item, self)
+            serialize = lambda: encode(tree)
+        elif filetype == "ibin":
+            from te_tree.core.binary import Binary_Tree, encode_indexed
+
+            indexed_tree = Binary_Tree.collect(item, self)
+            serialize = lambda: encode_indexed(indexed_tree)
+        else:
+            snapshot = self.snapshot(item)
+            # the snapshot is streamed to the file, when the file is written
+            serialize = lambda: (lambda file: self._write_snapshot_xml(file, snapshot))
+        with self.__save_lock:
+            self.__saves_started += 1
+            order = self.__saves_started
+
+        def write_snapshot() -> None:
+            try:
+                content = serialize()
+                with self.__save_lock:
+                    if self.__last_written_save.get(filepath, 0) < order:
+                        self._write_file(dirpath, name, filetype, backup_folder_name, content)
+                        self.__last_written_save[filepath] = order
+            except Exception as error:
+                if on_done is None:
+                    raise
+                on_done(error)
+                return
+            if on_done is not None:
+                on_done(None)
+
+        thread = threading.Thread(target=write_snapshot, daemon=True)
+        thread.start()
+        return thread
+
+    def snapshot(self, item: Item) -> Item_Snapshot:
+        snapshots: dict[Item, Item_Snapshot] = dict()
+        for descendant in item.postorder(formal=True):
+            self._check_template_exists_for_item(descendant)
+            snapshots[descendant] = Item_Snapshot(
+                descendant.itype,
+                tuple(self._get_printed_attributes(descendant).items()),
+                tuple(
+                    snapshots.pop(child)
+                    for child in descendant.children + descendant.formal_children
+                ),
+            )
+        return snapshots[item]
+
+    def _write_snapshot_xml(self, file: BinaryIO, snapshot: Item_Snapshot) -> None:
+        write_xml(file, snapshot, lambda s: (s.itype, dict(s.attributes)), lambda s: s.children)
+
+    def _write_xml(self, file: BinaryIO, item: Item) -> None:
+        write_xml(file, item, self._xml_element, lambda item: item.children + item.formal_children)
+
+    def _xml_element(self, item: Item) -> tuple[str, dict[str, str]]:
+        self._check_template_exists_for_item(item)
+        return item.itype, self._get_printed_attributes(item)
+
+    def _write_file(
+        self,
+        dirpath: str,
+        name: str,
+        filetype: FileType,
+        backup_folder_name: str,
+        content: File_Content,
+        compress: bool = True,
+    ) -> None:
+        # The content is written to a temporary file first, which then replaces the target file,
+        # so that the target file is never left partially written. The replaced file is kept
+        # as the backup without copying it.
+        filepath = self.os.path.join(dirpath, name + "." + filetype)
         if backup_folder_name.strip() == "":
             backup_folder_name = "backup"
-        if self.does_file_exist(item, filetype):
-            backup_folder_path = self.os.path.join(self.file_path, backup_folder_name, item.name)
+        temp_filepath = filepath + ".tmp"
+        if compress:
+            content = _compressed(content, filetype)
+        try:
+            with open(temp_filepath, "wb") as file:
+                if isinstance(content, bytes):
+                    file.write(content)
+                else:
+                    content(file)
+                file.flush()
+                self.os.fsync(file.fileno())
+        except Exception:
+            # the content is streamed, so the temporary file may be left partially written
+            if self.os.path.isfile(temp_filepath):
+                self.os.remove(temp_filepath)
+            raise
+        self._load_indexed_file(filepath)
+        pending_backup = ""
+        if self.os.path.isfile(filepath) and self.__deduplicate_backups:
+            store = self._backup_store(dirpath, backup_folder_name)
+            pending_backup = store.pending_path(name + "." + filetype)
+            self._back_up(filepath, pending_backup)
+        elif self.os.path.isfile(filepath):
+            backup_folder_path = self.os.path.join(dirpath, backup_folder_name, name)
             if not self.os.path.isdir(backup_folder_path):
                 self.os.makedirs(backup_folder_path)
-            shutil.copyfile(
+            self._back_up(
                 filepath,
-                self.os.path.join(backup_folder_path, self._backup_file_name(item, filetype)),
+                self.os.path.join(backup_folder_path, self._backup_file_name(name, filetype)),
             )
-        xml_tree.write(filepath, encoding="UTF-8")
+            self._remove_outdated_backups(backup_folder_path)
+        self.os.replace(temp_filepath, filepath)
+        if pending_backup:
+            self._back_up_to_store_in_background(store, pending_backup, name + "." + filetype)
+
+    def _load_indexed_file(self, filepath: str) -> None:
+        indexed = self.__indexed_files.pop(self.os.path.abspath(filepath), None)
+        if indexed is not None:
+            # the mapped file cannot be replaced (on Windows), so the rest of its items is built
+            indexed.load_all()
+
+    def _backup_store(self, dirpath: str, backup_folder_name: str) -> Backup_Store:
+        if backup_folder_name.strip() == "":
+            backup_folder_name = "backup"
+        return Backup_Store(self.os.path.join(dirpath, backup_folder_name, ".store"))
+
+    def _back_up_to_store_in_background(
+        self, store: Backup_Store, pending_filepath: str, filename: str
+    ) -> None:
+        # The replaced file is only linked to the pending file, when saving. The chunking of the
+        # file is left to the worker thread, so it neither delays the save nor holds the lock.
+        if self.__backup_worker is None:
+            self.__backup_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+        self.__backups = [b for b in self.__backups if not b.done() or b.exception()]
+        self.__backups.append(
+            self.__backup_worker.submit(self._back_up_to_store, store, pending_filepath, filename)
+        )
+
+    def _back_up_to_store(self, store: Backup_Store, filepath: str, filename: str) -> None:
+        store.add(filepath, filename)
+        self.os.remove(filepath)
+        versions = {v: store.time_of(v) for v in store.versions(filename)}
+        store.remove(filename, *self.__backup_retention.outdated(versions, time.time()))
+
+    def wait_for_backups(self) -> None:
+        """Waits until the replaced files are added to the backup store. Raises the first
+        exception raised when adding any of them."""
+        backups, self.__backups = self.__backups, list()
+        for backup in backups:
+            backup.result()
+
+    def backup_versions(
+        self, name: str, filetype: FileType, backup_folder_name: str = ""
+    ) -> list[str]:
+        self.wait_for_backups()
+        store = self._backup_store(self.file_path, backup_folder_name)
+        return store.versions(name + "." + filetype)
+
+    def restore_backup(
+        self, name: str, filetype: FileType, version: str, backup_folder_name: str = ""
+    ) -> None:
+        # the restored version replaces the file, which is backed up as any other saved file
+        self.wait_for_backups()
+        store = self._backup_store(self.file_path, backup_folder_name)
+        filename = name + "." + filetype
+        if version not in store.versions(filename):
+            raise ItemCreator.BackupDoesNotExist(filename, version)
+        with self.__save_lock:
+            self.__saves_started += 1
+            self._write_file(
+                self.file_path,
+                name,
+                filetype,
+                backup_folder_name,
+                lambda file: store.restore(filename, version, file),
+                compress=False,
+            )
+            self.__last_written_save[self.os.path.join(self.file_path, filename)] = (
+                self.__saves_started
+            )
+
+    def _back_up(self, filepath: str, backup_filepath: str) -> None:
+        if self.os.path.isfile(backup_filepath):
+            self.os.remove(backup_filepath)
+        try:
+            self.os.link(filepath, backup_filepath)
+        except OSError:
+            # the file system does not support hard links
+            shutil.copy2(filepath, backup_filepath)
+
+    def _remove_outdated_backups(self, backup_folder_path: str) -> None:
+        backups: dict[str, float] = dict()
+        for filename in self.os.listdir(backup_folder_path):
+            path = self.os.path.join(backup_folder_path, filename)
+            if self.os.path.isfile(path):
+                backups[path] = self.os.path.getmtime(path)
+        for path in self.__backup_retention.outdated(backups, time.time()):
+            self.os.remove(path)
+
+    def forget_saved_changes(self, item: Item) -> None:
+        if item in self.__xml_chunk_caches:
+            self.__xml_chunk_caches.pop(item).stop()
+
+    def _xml_chunk_cache(self, item: Item) -> Xml_Chunk_Cache:
+        # imported here, as the cache observes the items defined in this module
+        from te_tree.core.xml_chunks import Xml_Chunk_Cache
+
+        if item not in self.__xml_chunk_caches:
+            self.__xml_chunk_caches[item] = Xml_Chunk_Cache(
+                item,
+                self._xml_element,
+                context=lambda: (self._attrfac.locale_code, self._attrfac.currency_code),
+            )
+        return self.__xml_chunk_caches[item]
 
     @staticmethod
     def get_strtime(curr_seconds: Optional[float] = None) -> str:
@@ -215,13 +762,20 @@ class ItemCreator:
         strtime = f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:2d}_{t.tm_hour:02d}-{t.tm_min:02d}-{t.tm_sec:02d}"
         return strtime
 
-    def _backup_file_name(self, item: Item, filetype: FileType) -> str:
-        return item.name + " " + self.get_strtime() + "." + filetype
+    def _backup_file_name(self, name: str, filetype: FileType) -> str:
+        return name + " " + self.get_strtime() + "." + filetype
 
     def does_file_exist(self, item: Item, filetype: FileType) -> bool:
         filepath = self.file_path + "/" + item.name + "." + filetype
         return self.os.path.isfile(filepath)
 
+    def set_backup_retention(self, retention: Backup_Retention) -> None:
+        self.__backup_retention = retention
+
+    def set_backup_deduplication(self, deduplicate: bool) -> None:
+        # the backups are kept in the store sharing the same chunks of the backed-up files
+        self.__deduplicate_backups = deduplicate
+
     def set_dir_path(self, path: str) -> None:
         if not self.os.path.isdir(path):
             raise ItemCreator.NonexistentDirectory(path)
@@ -231,16 +785,6 @@ class ItemCreator:
         if item.itype.strip() == "" or item.itype not in self.__templates:
             raise ItemCreator.NoTemplateIsAssigned(item.name)
 
-    def _create_xml_items_hierarchy(self, item: Item) -> et.Element:
-        xml_elem = self._create_single_xml_item(item)
-        for child in set.union(item.children, item.formal_children):
-            xml_elem.append(self._create_xml_items_hierarchy(child))
-        return xml_elem
-
-    def _create_single_xml_item(self, item: Item) -> et.Element:
-        self._check_template_exists_for_item(item)
-        return self.et.Element(item.itype, self._get_printed_attributes(item))
-
     def _get_printed_attributes(self, item: Item) -> dict[str, str]:
         printed_attribs: dict[str, str] = {"name": item.name}
         for label, attr in item.attributes.items():
@@ -248,6 +792,11 @@ class ItemCreator:
         return printed_attribs
 
     def from_template(self, label: str, name: str = "") -> Item:
+        return self._from_template(label, name)
+
+    def _from_template(
+        self, label: str, name: str = "", parent: Optional[Item] = None, update: bool = True
+    ) -> Item:
         if label not in self.__templates:
             raise ItemCreator.UndefinedTemplate(label)
         template = self.__templates[label]
@@ -262,11 +811,30 @@ class ItemCreator:
             child_itypes=template.child_itypes,
             ignore_duplicit_names=self.__ignore_duplicit_names,
         )
-        if template.dependencies is not None:
-            for dep in template.dependencies:
-                item.bind(dep.dependent, dep.func, *dep.free, binding_label=dep.label)
+        if parent is not None:
+            item._accept_parent(parent)
+        bindings = self._template_bindings(template)
+        if bindings:
+            # the wiring is identical for all items of the template, so it is validated only once
+            validate = template.label not in self.__validated_templates
+            for output_name, info in bindings.items():
+                item._bind(output_name, info, validate=validate, update=update)
+            self.__validated_templates.add(template.label)
+            item._share_bindings(bindings)
         return item
 
+    def _template_bindings(self, template: Template) -> dict[str, Item.BindingInfo]:
+        if template.label not in self.__template_bindings:
+            bindings: dict[str, Item.BindingInfo] = {}
+            if template.dependencies is not None:
+                for dep in template.dependencies:
+                    if dep.dependent not in template.attribute_info:
+                        continue
+                    free = tuple(freeatt(f) if isinstance(f, str) else f for f in dep.free)
+                    bindings[dep.dependent] = Item.BindingInfo(dep.func, free, label=dep.label)
+            self.__template_bindings[template.label] = bindings
+        return self.__template_bindings[template.label]
+
     def new(
         self,
         name: str,
@@ -316,6 +884,12 @@ class ItemCreator:
     class NonexistentDirectory(Exception):
         pass
 
+    class BackupDoesNotExist(Exception):
+        pass
+
+    class CompressionNotAvailable(Exception):
+        pass
+
     class FileDoesNotExist(Exception):
         pass
 
@@ -332,6 +906,43 @@ class ItemCreator:
         pass
 
 
+@dataclasses.dataclass(frozen=True)
+class Backup_Retention:
+    """Backups are kept if they are among the 'keep_last' newest ones, if they are younger than
+    'keep_within' seconds, or if they are the newest backup in their period of 'keep_one_per'
+    seconds. Without any of the rules set, all the backups are kept."""
+
+    keep_last: Optional[int] = None
+    keep_within: Optional[float] = None
+    keep_one_per: Optional[float] = None
+
+    def outdated(self, backups: dict[str, float], now: float) -> list[str]:
+        if self.keep_last is None and self.keep_within is None and self.keep_one_per is None:
+            return []
+        outdated: list[str] = list()
+        periods: set[int] = set()
+        newest_first = sorted(backups.items(), key=lambda b: b[1], reverse=True)
+        for k, (path, mtime) in enumerate(newest_first):
+            period = None if self.keep_one_per is None else int(mtime // self.keep_one_per)
+            kept = (
+                (self.keep_last is not None and k < self.keep_last)
+                or (self.keep_within is not None and now - mtime < self.keep_within)
+                or (period is not None and period not in periods)
+            )
+            if not kept:
+                outdated.append(path)
+            elif period is not None:
+                periods.add(period)
+        return outdated
+
+
+@dataclasses.dataclass(frozen=True)
+class Item_Snapshot:
+    itype: str
+    attributes: tuple[tuple[str, str], ...]
+    children: tuple[Item_Snapshot, ...]
+
+
 @dataclasses.dataclass
 class Renaming_Data:
     item: Item
@@ -432,12 +1043,15 @@ class Adopt_Composed(Composed_Command):
 @dataclasses.dataclass
 class Leave(Command):
     data: Parentage_Data
+    rank: Optional[int] = dataclasses.field(init=False, default=None)
 
     def run(self):
+        if self.data.parent.is_parent_of(self.data.child):
+            self.rank = self.data.parent._child_rank(self.data.child)
         self.data.parent._leave_child(self.data.child)
 
     def undo(self):
-        self.data.parent._adopt(self.data.child)
+        self.data.parent._adopt(self.data.child, self.rank)
 
     def redo(self):
         self.data.parent._leave_child(self.data.child)
@@ -474,6 +1088,98 @@ class Leave_Composed(Composed_Command):
         return super().add_composed(owner_id, data_converter, cmd, timing)
 
 
+class Item_Commands(dict):
+    """Composed commands of the item, each created on its first use, so that e.g. the leaf
+    items never renamed nor left do not allocate any of them."""
+
+    COMPOSED: dict[str, type[Composed_Command]] = {
+        "adopt": Adopt_Composed,
+        "leave": Leave_Composed,
+        "rename": Rename_Composed,
+    }
+
+    def __missing__(self, command_type: Command_Type) -> Composed_Command:
+        composed = self.COMPOSED[command_type]()
+        self[command_type] = composed
+        return composed
+
+
+@dataclasses.dataclass
+class Bulk_Parentage_Data:
+    parent: Item
+    children: list[Item]
+
+
+@dataclasses.dataclass
+class Adopt_Many(Command):
+    data: Bulk_Parentage_Data
+    old_names: list[str] = dataclasses.field(init=False)
+
+    def run(self):
+        self.old_names = [child.name for child in self.data.children]
+        self.data.parent._adopt_children(self.data.children)
+
+    def undo(self):
+        self.data.parent._leave_children(self.data.children)
+        for child, name in zip(self.data.children, self.old_names):
+            child._rename(name)
+
+    def redo(self):
+        self.data.parent._adopt_children(self.data.children)
+
+    @property
+    def message(self) -> str:
+        return f"Adopt children | '{self.data.parent.name}' adopts {len(self.data.children)} item(s)."
+
+
+@dataclasses.dataclass
+class Leave_Many(Command):
+    data: Bulk_Parentage_Data
+    ranks: list[Optional[int]] = dataclasses.field(init=False)
+
+    def run(self):
+        self.ranks = self.data.parent._leave_children(self.data.children)
+
+    def undo(self):
+        self.data.parent._adopt_children(self.data.children, self.ranks)
+
+    def redo(self):
+        self.data.parent._leave_children(self.data.children)
+
+    @property
+    def message(self) -> str:
+        return f"Leave children | '{self.data.parent.name}' leaves {len(self.data.children)} item(s)."
+
+
+@dataclasses.dataclass
+class Sort_Children_Data:
+    parent: Item
+    key: Callable[[Item], Any]
+    reverse: bool
+
+
+@dataclasses.dataclass
+class Sort_Children(Command):
+    data: Sort_Children_Data
+    old_order: list[Item] = dataclasses.field(init=False)
+    new_order: list[Item] = dataclasses.field(init=False)
+
+    def run(self):
+        self.old_order = self.data.parent.children
+        self.new_order = sorted(self.old_order, key=self.data.key, reverse=self.data.reverse)
+        self.data.parent._reorder_children(self.new_order)
+
+    def undo(self):
+        self.data.parent._reorder_children(self.old_order)
+
+    def redo(self):
+        self.data.parent._reorder_children(self.new_order)
+
+    @property
+    def message(self) -> str:
+        return f"Sort children | '{self.data.parent.name}' sorts {len(self.new_order)} item(s)."
+
+
 from te_tree.core.attributes import Dependency
 
 
@@ -504,7 +1210,8 @@ class Parent_Attribute:
 
 from typing import Literal
 
-Command_Type = Literal["adopt", "leave", "rename"]
+# the actions after the "formal" command follow adopting and leaving of the formal children
+Command_Type = Literal["adopt", "leave", "rename", "sort", "formal"]
 
 
 class Item(abc.ABC):  # pragma: no cover
@@ -525,6 +1232,7 @@ class Item(abc.ABC):  # pragma: no cover
         self._manager = manager
         self.__id = str(id(self))
         self._bindings: dict[str, Item.BindingInfo] = dict()
+        self._bindings_shared: bool = False
         self._child_attr_lists: dict[str, Attribute_List] = dict()
         self._parent_attributes: dict[str, Parent_Attribute] = dict()
 
@@ -545,7 +1253,7 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractproperty
-    def children(self) -> set[Item]:
+    def children(self) -> list[Item]:
         pass
 
     @property
@@ -569,7 +1277,7 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractproperty
-    def formal_children(self) -> set[Item]:
+    def formal_children(self) -> list[Item]:
         pass
 
     @abc.abstractproperty
@@ -580,6 +1288,10 @@ class Item(abc.ABC):  # pragma: no cover
     def adopt_formally(self, child: Item) -> None:
         pass
 
+    @abc.abstractmethod
+    def adopt_many(self, *children: Item) -> None:
+        pass
+
     @abc.abstractmethod
     def leave_formal_child(self, child: Item) -> None:
         pass
@@ -650,7 +1362,9 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractmethod
-    def _create_child_attr_list(self, value_type: AttributeType, child_attr_label: str) -> None:
+    def _create_child_attr_list(
+        self, value_type: AttributeType, child_attr_label: str
+    ) -> Attribute_List:
         pass
 
     @abc.abstractmethod
@@ -677,6 +1391,10 @@ class Item(abc.ABC):  # pragma: no cover
     def leave(self, child: Item) -> None:
         pass
 
+    @abc.abstractmethod
+    def leave_many(self, *children: Item) -> None:
+        pass
+
     @abc.abstractmethod
     def pass_to_new_parent(self, child: Item, new_parent: Item) -> None:
         pass
@@ -693,6 +1411,12 @@ class Item(abc.ABC):  # pragma: no cover
     def set(self, attribute_name: str, value: Any) -> None:
         pass
 
+    @abc.abstractmethod
+    def sort_children(
+        self, key: Optional[Callable[[Item], Any]] = None, reverse: bool = False
+    ) -> None:
+        pass
+
     @abc.abstractmethod
     def multiset(self, vals_to_labels: dict[str, Any]) -> None:
         pass
@@ -706,13 +1430,27 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractmethod
-    def _adopt(self, child: Item) -> None:
+    def _adopt(self, child: Item, rank: Optional[int] = None) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _adopt_children(
+        self, children: list[Item], ranks: Optional[list[Optional[int]]] = None
+    ) -> None:
         pass
 
     @abc.abstractmethod
     def _accept_parent(self, item: Item) -> None:
         pass
 
+    @abc.abstractmethod
+    def _attach_children(self, children: list[Item]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _defer_children(self, load: Callable[[], list[Item]]) -> None:
+        pass
+
     @abc.abstractmethod
     def _apply_binding_info(self) -> None:
         pass
@@ -722,17 +1460,35 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractmethod
-    def _copy_bindings(self, dupl: Item) -> None:
+    def _copy_bindings(
+        self, copies: dict[Item, Item], attr_map: dict[AbstractAttribute, AbstractAttribute]
+    ) -> None:
         pass
 
     @abc.abstractmethod
     def _check_can_be_parent_of(self, item: Item) -> bool:
         pass
 
+    @abc.abstractmethod
+    def _child_position(self, child: Item) -> int:
+        pass
+
+    @abc.abstractmethod
+    def _child_rank(self, child: Item) -> int:
+        pass
+
+    @abc.abstractmethod
+    def _reorder_children(self, children: list[Item]) -> None:
+        pass
+
     @abc.abstractmethod
     def _leave_child(self, child: Item) -> None:
         pass
 
+    @abc.abstractmethod
+    def _leave_children(self, children: list[Item]) -> list[Optional[int]]:
+        pass
+
     @abc.abstractmethod
     def _leave_parent(self, parent: Item) -> None:
         pass
@@ -742,9 +1498,77 @@ class Item(abc.ABC):  # pragma: no cover
         pass
 
     @abc.abstractmethod
-    def _duplicate_items(self) -> Item:
+    def _duplicate_items(
+        self, copies: dict[Item, Item], attr_map: dict[AbstractAttribute, AbstractAttribute]
+    ) -> Item:
         pass
 
+    # The traversals are iterative, so that deep trees do not hit the recursion limit. Children of
+    # items, for which the 'prune' returns True, are not visited. Only items of the types given
+    # by 'itype' are yielded, but the traversal goes through items of all types.
+
+    def preorder(
+        self,
+        prune: Optional[Callable[[Item], bool]] = None,
+        itype: Optional[str | Collection[str]] = None,
+        formal: bool = False,
+    ) -> Iterator[Item]:
+        stack: list[Item] = [self]
+        while stack:
+            item = stack.pop()
+            if Item._has_itype(item, itype):
+                yield item
+            if prune is None or not prune(item):
+                stack.extend(reversed(Item._traversed_children(item, formal)))
+
+    def postorder(
+        self,
+        prune: Optional[Callable[[Item], bool]] = None,
+        itype: Optional[str | Collection[str]] = None,
+        formal: bool = False,
+    ) -> Iterator[Item]:
+        stack: list[tuple[Item, bool]] = [(self, False)]
+        while stack:
+            item, visited = stack.pop()
+            if visited:
+                if Item._has_itype(item, itype):
+                    yield item
+                continue
+            stack.append((item, True))
+            if prune is None or not prune(item):
+                children = Item._traversed_children(item, formal)
+                stack.extend((child, False) for child in reversed(children))
+
+    def breadth_first(
+        self,
+        prune: Optional[Callable[[Item], bool]] = None,
+        itype: Optional[str | Collection[str]] = None,
+        formal: bool = False,
+    ) -> Iterator[Item]:
+        queue: deque[Item] = deque([self])
+        while queue:
+            item = queue.popleft()
+            if Item._has_itype(item, itype):
+                yield item
+            if prune is None or not prune(item):
+                queue.extend(Item._traversed_children(item, formal))
+
+    @staticmethod
+    def _has_itype(item: Item, itype: Optional[str | Collection[str]]) -> bool:
+        if itype is None:
+            return True
+        elif isinstance(itype, str):
+            return item.itype == itype
+        else:
+            return item.itype in itype
+
+    @staticmethod
+    def _traversed_children(item: Item, formal: bool) -> list[Item]:
+        if formal:
+            return item.children + item.formal_children
+        else:
+            return item.children
+
     class AdoptionOfAncestor(Exception):
         pass
 
@@ -788,7 +1612,7 @@ class ItemImpl(Item):
 
     class __ItemNull(Item):
         def __init__(self, *args, **kwargs) -> None:
-            self.__children: set[Item] = set()
+            self.__children: dict[Item, None] = dict()
             self._child_attr_lists: dict = dict()
 
         @property
@@ -808,7 +1632,7 @@ class ItemImpl(Item):
             return self
 
         @property
-        def children(self) -> set[Item]:
+        def children(self) -> list[Item]:
             raise self.CannotAccessChildrenOfNull
 
         @property
@@ -824,8 +1648,8 @@ class ItemImpl(Item):
             return {}  # pragma: no cover
 
         @property
-        def formal_children(self) -> set[Item]:
-            return set()
+        def formal_children(self) -> list[Item]:
+            return []
 
         @property
         def last_action(self) -> tuple[str, str, str]:
@@ -834,6 +1658,20 @@ class ItemImpl(Item):
         def adopt_formally(self, child: Item) -> None:
             raise self.NullCannotAdoptFormally  # pragma: no cover
 
+        def adopt_many(self, *children: Item) -> None:
+            for child in children:
+                if child.parent is not self:
+                    child.parent.leave(child)
+
+        def preorder(self, *args, **kwargs) -> Iterator[Item]:
+            return iter(())
+
+        def postorder(self, *args, **kwargs) -> Iterator[Item]:
+            return iter(())
+
+        def breadth_first(self, *args, **kwargs) -> Iterator[Item]:
+            return iter(())
+
         def add_action(self, *args) -> None:
             pass
 
@@ -898,9 +1736,15 @@ class ItemImpl(Item):
         def leave(self, child: Item) -> None:
             raise self.NullCannotLeaveChild
 
+        def leave_many(self, *children: Item) -> None:
+            raise self.NullCannotLeaveChild
+
         def pass_to_new_parent(self, child: Item, new_parent: Item) -> None:
             new_parent.adopt(child)
 
+        def sort_children(self, *args, **kwargs) -> None:
+            raise self.CannotAccessChildrenOfNull
+
         def pick_child(self, name: str) -> Item:
             raise self.CannotAccessChildrenOfNull
 
@@ -916,34 +1760,57 @@ class ItemImpl(Item):
         def __call__(self, attr_name: str) -> Any:
             raise Item.NonexistentAttribute  # pragma: no cover
 
-        def _adopt(self, child: Item) -> None:
+        def _adopt(self, child: Item, rank: Optional[int] = None) -> None:
+            return  # pragma: no cover
+
+        def _adopt_children(
+            self, children: list[Item], ranks: Optional[list[Optional[int]]] = None
+        ) -> None:
             return  # pragma: no cover
 
         def _accept_parent(self, item: Item) -> None:
             raise Item.AdoptingNULL
 
+        def _attach_children(self, children: list[Item]) -> None:
+            raise Item.AdoptingNULL  # pragma: no cover
+
+        def _defer_children(self, load: Callable[[], list[Item]]) -> None:
+            raise Item.AdoptingNULL  # pragma: no cover
+
         def _apply_binding_info(self) -> None:
             pass  # pragma: no cover
 
         def _can_be_parent_of_item_type(self, item: Item) -> bool:
             return True  # pragma: no cover
 
-        def _copy_bindings(self, dupl: Item) -> None:
+        def _copy_bindings(self, copies: dict, attr_map: dict) -> None:
             pass  # pragma: no cover
 
         def _check_can_be_parent_of(self, item: Item) -> bool:
             return True  # pragma: no cover
 
+        def _child_position(self, child: Item) -> int:
+            raise self.CannotAccessChildrenOfNull  # pragma: no cover
+
+        def _child_rank(self, child: Item) -> int:
+            raise self.CannotAccessChildrenOfNull  # pragma: no cover
+
+        def _reorder_children(self, children: list[Item]) -> None:
+            raise self.CannotAccessChildrenOfNull  # pragma: no cover
+
         def _leave_child(self, child: Item) -> None:
             return
 
+        def _leave_children(self, children: list[Item]) -> list[Optional[int]]:
+            return []  # pragma: no cover
+
         def _leave_parent(self, parent: Item) -> None:
             return
 
         def _rename(self, name: str) -> None:
             return
 
-        def _duplicate_items(self) -> Item:
+        def _duplicate_items(self, copies: dict, attr_map: dict) -> Item:
             return self  # pragma: no cover
 
         def _set_parent_attributes(self, parent: Item) -> None:
@@ -984,21 +1851,26 @@ class ItemImpl(Item):
         if "name" in attributes:
             attributes.pop("name")
         self.__attributes.update(attributes)
-        self.__children: set[Item] = set()
-        self.__formal_children: set[Item] = set()
+        # The children are kept in an ordered dict with their ranks, increasing along the order.
+        # The left child's rank is enough to put it back on undo, so leaving is O(1) and does
+        # not need the positions of the children.
+        self.__deferred_children: Optional[Callable[[], list[Item]]] = None
+        self.__children = dict()
+        self.__next_rank: int = 0
+        # positions of the children, indexed on the first lookup after the children change
+        self.__positions: Optional[dict[Item, int]] = None
+        self.__formal_children: dict[Item, None] = dict()
         self.__parent: Item = self.NULL
-        self._bindings: dict[str, Item.BindingInfo] = dict()
-        self.__command: dict[Command_Type, Composed_Command] = {
-            "adopt": Adopt_Composed(),
-            "leave": Leave_Composed(),
-            "rename": Rename_Composed(),
-        }
+        # created on the first access to the commands
+        self.__command: Optional[Item_Commands] = None
         self.__itype = itype
         self.__child_itypes = child_itypes
         self.__actions: dict[Command_Type, dict[str, Callable[[Item], None]]] = {
             "rename": dict(),
             "adopt": dict(),
             "leave": dict(),
+            "sort": dict(),
+            "formal": dict(),
         }
         self.__last_action: tuple[str, str, str] = ("", "", "")
         self._rename(name)
@@ -1019,11 +1891,25 @@ class ItemImpl(Item):
 
     @property
     def root(self) -> Item:
-        return self if self.__parent is self.NULL else self.__parent.root
+        item: Item = self
+        while not item.parent.is_null():
+            item = item.parent
+        return item
+
+    @property
+    def children(self) -> list[Item]:
+        return list(self.__children)
 
     @property
-    def children(self) -> set[Item]:
-        return self.__children.copy()
+    def __children(self) -> dict[Item, int]:
+        if self.__deferred_children is not None:
+            self._load_deferred_children()
+        return self.__children_dict
+
+    @__children.setter
+    def __children(self, children: dict[Item, int]) -> None:
+        self.__children_dict = children
+        self.__positions = None
 
     @property
     def itype(self) -> str:
@@ -1035,11 +1921,13 @@ class ItemImpl(Item):
 
     @property
     def command(self) -> dict[Command_Type, Composed_Command]:
+        if self.__command is None:
+            self.__command = Item_Commands()
         return self.__command
 
     @property
-    def formal_children(self) -> set[Item]:
-        return self.__formal_children.copy()
+    def formal_children(self) -> list[Item]:
+        return list(self.__formal_children)
 
     @property
     def id(self) -> str:
@@ -1077,13 +1965,15 @@ class ItemImpl(Item):
         if child in self.__children:
             raise ItemImpl.AlreadyAChild(child)
         else:
-            self.__formal_children.add(child)
+            self.__formal_children[child] = None
+            self._run_actions_after_command("formal", self)
 
     def leave_formal_child(self, child: Item) -> None:
         if child not in self.__formal_children:
             raise Item.FormalChildNotFound(child)
         else:
-            self.__formal_children.remove(child)
+            self.__formal_children.pop(child)
+            self._run_actions_after_command("formal", self)
 
     def attribute(self, label: str) -> Attribute:
         if not label in self.__attributes:
@@ -1103,16 +1993,37 @@ class ItemImpl(Item):
 
         if not self.has_attribute(output_name):
             return
-        output = self.attribute(output_name)
         input_info = list(input_info)
         self._create_attr_info_from_attr_type(input_info)
-        inputs = self._collect_input_attributes(input_info)
-        dependency = output.add_dependency(func, *inputs, label=binding_label)
-        for info in input_info:
-            label = info.label
-            if info.owner == "parent" and label in self._parent_attributes:
-                self._parent_attributes[label].watch_dependency(dependency)
-        self._bindings[output_name] = ItemImpl.BindingInfo(func, input_info, label=binding_label)
+        info = ItemImpl.BindingInfo(func, tuple(input_info), label=binding_label)
+        self._bind(output_name, info)
+        self._own_bindings()[output_name] = info
+
+    def _bind(
+        self,
+        output_name: str,
+        info: Item.BindingInfo,
+        validate: bool = True,
+        update: bool = True,
+    ) -> None:
+        output = self.attribute(output_name)
+        inputs = self._collect_input_attributes(info.input_labels)
+        dependency = output.add_dependency(
+            info.func, *inputs, label=info.label, validate=validate, update=update
+        )
+        for finfo in info.input_labels:
+            if finfo.owner == "parent" and finfo.label in self._parent_attributes:
+                self._parent_attributes[finfo.label].watch_dependency(dependency)
+
+    def _share_bindings(self, bindings: dict[str, Item.BindingInfo]) -> None:
+        self._bindings = bindings
+        self._bindings_shared = True
+
+    def _own_bindings(self) -> dict[str, Item.BindingInfo]:
+        if self._bindings_shared:
+            self._bindings = self._bindings.copy()
+            self._bindings_shared = False
+        return self._bindings
 
     def _create_attr_info_from_attr_type(
         self, input_info: list[str | Template.FreeAttribute]
@@ -1152,7 +2063,7 @@ class ItemImpl(Item):
 
     def free(self, output_name: str) -> None:
         self.attribute(output_name).break_dependency()
-        self._bindings.pop(output_name)
+        self._own_bindings().pop(output_name)
 
     def has_attribute(self, label: str) -> bool:
         return label in self.__attributes
@@ -1169,6 +2080,21 @@ class ItemImpl(Item):
 
             perform_adoption()
 
+    def adopt_many(self, *children: Item) -> None:
+        new_children = [child for child in dict.fromkeys(children) if child.parent is not self]
+        if not new_children:
+            return
+        for child in new_children:
+            self._check_can_be_parent_of(child)
+
+        @self.controller.single_cmd()
+        def perform_adoption():
+            self.controller.run(*self._bulk_parentage_commands("adopt", new_children))
+            for child in new_children:
+                child._set_parent_attributes(parent=self)
+
+        perform_adoption()
+
     def leave(self, *children: Item) -> None:
         if not children:
             return
@@ -1177,10 +2103,55 @@ class ItemImpl(Item):
         def perform_leaving():
             for child in children:
                 self.controller.run(*self.command["leave"](Parentage_Data(self, child)))
-            children[0]._set_parent_attributes(parent=self.NULL)
+            for child in children:
+                child._set_parent_attributes(parent=self.NULL)
 
         perform_leaving()
 
+    def leave_many(self, *children: Item) -> None:
+        leaving = [child for child in dict.fromkeys(children) if child in self.__children]
+        if not leaving:
+            return
+
+        @self.controller.single_cmd()
+        def perform_leaving():
+            self.controller.run(*self._bulk_parentage_commands("leave", leaving))
+            for child in leaving:
+                child._set_parent_attributes(parent=self.NULL)
+
+        perform_leaving()
+
+    def _bulk_parentage_commands(
+        self, command_type: Literal["adopt", "leave"], children: list[Item]
+    ) -> list[Command]:
+        # The child attribute lists are edited and set only once for the whole batch, all the
+        # other hooks are collected for each of the children.
+        composed = self.command[command_type]
+        alist_ids = {alist.id for alist in self._child_attr_lists.values()}
+        pre: list[Command] = list()
+        post: list[Command] = list()
+        for child in children:
+            data = Parentage_Data(self, child)
+            pre.extend(composed.pre_commands(data, exclude=alist_ids))
+            post.extend(composed.post_commands(data, exclude=alist_ids))
+
+        for label, alist in self._child_attr_lists.items():
+            attributes = [c.attribute(label) for c in children if c.has_attribute(label)]
+            if not attributes:
+                continue
+            list_data = Edit_AttrList_Many_Data(alist, attributes)
+            if command_type == "adopt":
+                for attribute in attributes:
+                    self._check_attr_type_matches_list_type(alist, attribute)
+                post.append(Extend_Attribute_List(list_data))
+            else:
+                post.append(Remove_Many_From_Attribute_List(list_data))
+            post.extend(alist.command["set"](Set_Attr_Data(alist, lambda alist=alist: alist.value)))
+
+        bulk_data = Bulk_Parentage_Data(self, children)
+        main = Adopt_Many(bulk_data) if command_type == "adopt" else Leave_Many(bulk_data)
+        return [*pre, main, *post]
+
     def _set_parent_attributes(self, parent: Item) -> None:
         for label, attr in self._parent_attributes.items():
             if parent.has_attribute(label):
@@ -1195,15 +2166,22 @@ class ItemImpl(Item):
         if not alist.type == attribute.type:
             raise self.ChildAttributeTypeConflict
 
-    def _create_child_attr_list(self, value_type: AttributeType, child_attr_label: str) -> None:
-        alist = self._manager._attrfac.newlist(
-            atype=value_type, name=child_attr_label + " (children)"
-        )
-
+    def _create_child_attr_list(
+        self, value_type: AttributeType, child_attr_label: str
+    ) -> Attribute_List:
+        alist = self._new_child_attr_list(value_type, child_attr_label)
         for child in self.__children:
-            if child_attr_label in child.attributes:
+            if child.has_attribute(child_attr_label):
                 self._check_attr_type_matches_list_type(alist, child.attribute(child_attr_label))
                 alist.append(child.attribute(child_attr_label))
+        return alist
+
+    def _new_child_attr_list(
+        self, value_type: AttributeType, child_attr_label: str
+    ) -> Attribute_List:
+        alist = self._manager._attrfac.newlist(
+            atype=value_type, name=child_attr_label + " (children)"
+        )
 
         def adopt_cmd(data: Parentage_Data) -> Command:
             if not data.child.has_attribute(child_attr_label):
@@ -1228,6 +2206,7 @@ class ItemImpl(Item):
         self.command["leave"].add_composed(alist.id, converter, alist.command["set"], "post")
 
         self._child_attr_lists[child_attr_label] = alist
+        return alist
 
     def pass_to_new_parent(self, child: Item, new_parent: Item) -> None:
         if new_parent._check_can_be_parent_of(child) and isinstance(new_parent, ItemImpl):
@@ -1246,6 +2225,23 @@ class ItemImpl(Item):
     def rename(self, name: str) -> None:
         self.controller.run(*self.command["rename"](Renaming_Data(self, name)))
 
+    def sort_children(
+        self, key: Optional[Callable[[Item], Any]] = None, reverse: bool = False
+    ) -> None:
+        if key is None:
+            key = lambda child: child.name
+
+        @self.controller.single_cmd()
+        def perform_sorting():
+            self.controller.run(Sort_Children(Sort_Children_Data(self, key, reverse)))
+            # the values of the child attribute lists are reordered with the children
+            for alist in self._child_attr_lists.values():
+                self.controller.run(
+                    *alist.command["set"](Set_Attr_Data(alist, lambda alist=alist: alist.value))
+                )
+
+        perform_sorting()
+
     def set(self, attrib_label: str, value: Any) -> None:
         if attrib_label == "name":
             self.rename(value)
@@ -1280,8 +2276,10 @@ class ItemImpl(Item):
     def copy(self) -> Item:
         @self.controller.no_undo()
         def copy_self():
-            the_copy = self._duplicate_items()
-            self._copy_bindings(the_copy)
+            copies: dict[Item, Item] = dict()
+            attr_map: dict[AbstractAttribute, AbstractAttribute] = dict()
+            the_copy = self._duplicate_items(copies, attr_map)
+            self._copy_bindings(copies, attr_map)
             return the_copy
 
         return copy_self()
@@ -1292,7 +2290,7 @@ class ItemImpl(Item):
         return the_copy
 
     def has_children(self) -> bool:
-        return bool(self.__children)
+        return self.__deferred_children is not None or bool(self.__children_dict)
 
     def is_null(self) -> bool:
         return False  # pragma: no cover
@@ -1309,27 +2307,126 @@ class ItemImpl(Item):
                 return False
 
     def __call__(self, attr_name: str) -> Any:
-        if attr_name not in self.attributes:
+        if attr_name not in self.__attributes:
             raise Item.NonexistentAttribute(attr_name)
         else:
-            return self.attribute(attr_name).value
+            return self.__attributes[attr_name].value
 
     def _accept_parent(self, item: Item) -> None:
         if self.__parent is self.NULL:
             self.__parent = item
 
-    def _adopt(self, child: Item) -> None:
+    def _adopt(self, child: Item, rank: Optional[int] = None) -> None:
         if child in self.__formal_children:
-            self.__formal_children.remove(child)
+            self.__formal_children.pop(child)
         child._accept_parent(self)
         self._make_child_to_rename_if_its_name_already_taken(child)
         if self is child.parent:
-            self.__children.add(child)
+            self.__insert_children({child: rank})
         self._run_actions_after_command("adopt", child)
 
+    def _adopt_children(
+        self, children: list[Item], ranks: Optional[list[Optional[int]]] = None
+    ) -> None:
+        taken_names = {c.name for c in self.__children}
+        adopted: dict[Item, None] = dict()
+        for child in children:
+            if child in self.__formal_children:
+                self.__formal_children.pop(child)
+            child._accept_parent(self)
+            if self is not child.parent:
+                continue
+            name = child.name
+            if not self.__ignore_duplicit_names:
+                while name in taken_names:
+                    name = adjust_taken_name(name)
+                taken_names.add(name)
+            child.attribute("name")._hard_set(name)
+            child._run_actions_after_command("rename", child)
+            adopted[child] = None
+
+        if ranks is None:
+            self.__insert_children(dict.fromkeys(adopted))
+        else:
+            self.__insert_children({c: r for c, r in zip(children, ranks) if c in adopted})
+        for child in adopted:
+            self._run_actions_after_command("adopt", child)
+
+    def _attach_children(self, children: list[Item]) -> None:
+        # The children have already accepted this item as their parent when they were built.
+        taken_names: set[str] = set()
+        for child in children:
+            if self.__child_itypes is not None and child.itype not in self.__child_itypes:
+                raise Item.CannotAdoptItemOfType(child.itype)
+            if not self.__ignore_duplicit_names:
+                name = child.name
+                while name in taken_names:
+                    name = adjust_taken_name(name)
+                taken_names.add(name)
+                child.attribute("name")._hard_set(name)
+            self.__append_child(child)
+            for label, alist in self._child_attr_lists.items():
+                if child.has_attribute(label):
+                    self._check_attr_type_matches_list_type(alist, child.attribute(label))
+                    alist._link(child.attribute(label))
+
+    def _defer_children(self, load: Callable[[], list[Item]]) -> None:
+        # The children are built and attached on the first access to them or to the attributes
+        # of the children.
+        self.__deferred_children = load
+        for alist in self._child_attr_lists.values():
+            alist._loader = self._load_deferred_children
+
+    def _load_deferred_children(self) -> None:
+        load = self.__deferred_children
+        if load is None:
+            return
+        self.__deferred_children = None
+        for alist in self._child_attr_lists.values():
+            alist._loader = None
+        self._attach_children(load())
+
     def _can_be_parent_of_item_type(self, item: Item) -> bool:
         return (self.__child_itypes is not None) and (item.itype in self.__child_itypes)
 
+    def _child_position(self, child: Item) -> int:
+        if self.__positions is None:
+            self.__positions = {c: i for i, c in enumerate(self.__children)}
+        return self.__positions[child]
+
+    def _child_rank(self, child: Item) -> int:
+        return self.__children[child]
+
+    def __append_child(self, child: Item, rank: Optional[int] = None) -> None:
+        if rank is None:
+            rank = self.__next_rank
+        self.__children[child] = rank
+        self.__next_rank = max(self.__next_rank, rank + 1)
+        self.__positions = None
+
+    def __insert_children(self, children: dict[Item, Optional[int]]) -> None:
+        # The children without the rank are appended. The others are put back among the children
+        # by their ranks (the undone leaving restores the state right after the child left).
+        ranked = sorted(((c, r) for c, r in children.items() if r is not None), key=lambda p: p[1])
+        last_rank = next(reversed(self.__children.values()), -1)
+        if ranked and ranked[0][1] < last_rank:
+            self.__children = dict(heapq.merge(self.__children.items(), ranked, key=lambda p: p[1]))
+            self.__next_rank = max(self.__next_rank, ranked[-1][1] + 1)
+        else:
+            for child, rank in ranked:
+                self.__append_child(child, rank)
+        for child, rank in children.items():
+            if rank is None:
+                self.__append_child(child)
+
+    def _reorder_children(self, children: list[Item]) -> None:
+        # the ranks are kept, so that the sorting is undone to exactly the same ranks
+        self.__children = dict(zip(children, sorted(self.__children.values())))
+        for label, alist in self._child_attr_lists.items():
+            rank = {c.attribute(label): i for i, c in enumerate(children) if c.has_attribute(label)}
+            alist._reorder(sorted(alist.attributes, key=lambda attr: rank.get(attr, len(rank))))
+        self._run_actions_after_command("sort", self)
+
     def _check_can_be_parent_of(self, item: Item) -> bool:
         if self.__child_itypes is not None:
             if item.itype not in self.__child_itypes:
@@ -1342,39 +2439,101 @@ class ItemImpl(Item):
         else:
             return True
 
-    def _duplicate_items(self) -> ItemImpl:
-        dupl = ItemImpl(
-            self.name,
-            attributes=self._attributes_copy(),
-            manager=self._manager,
-            itype=self.itype,
-            child_itypes=self.__child_itypes,
-            ignore_duplicit_names=self.__ignore_duplicit_names,
-        )
-        for attr in dupl.__attributes.values():
-            if attr.dependent:
-                attr.break_dependency()
-        for child in self.__children:
-            child_duplicate = child._duplicate_items()
-            dupl._adopt(child_duplicate)
-        return dupl
+    def _duplicate_items(
+        self, copies: dict[Item, Item], attr_map: dict[AbstractAttribute, AbstractAttribute]
+    ) -> ItemImpl:
+        # the copies are collected in preorder; each copied child is attached directly to its
+        # parent's copy, as the names of the original siblings are already unique
+        stack: list[ItemImpl] = [self]
+        while stack:
+            item = stack.pop()
+            dupl = ItemImpl(
+                item.name,
+                attributes=item._attributes_copy(attr_map),
+                manager=self._manager,
+                itype=item.itype,
+                child_itypes=item.__child_itypes,
+                ignore_duplicit_names=item.__ignore_duplicit_names,
+            )
+            if item is not self:
+                parent_dupl: ItemImpl = copies[item.__parent]
+                parent_dupl.__append_child(dupl)
+                dupl.__parent = parent_dupl
+            copies[item] = dupl
+            stack.extend(reversed(item.__children))
+        return copies[self]
 
     def _apply_binding_info(self) -> None:
         for output_name, info in self._bindings.items():
-            self.bind(output_name, info.func, *info.input_labels, binding_label=info.label)
+            self._bind(output_name, info)
 
-    def _copy_bindings(self, dupl: Item) -> None:
-        dupl._bindings = self._bindings.copy()
-        dupl._apply_binding_info()
-        for child, child_dupl in zip(self.__children, dupl.children):
-            child._copy_bindings(child_dupl)
+    def _copy_bindings(
+        self, copies: dict[Item, Item], attr_map: dict[AbstractAttribute, AbstractAttribute]
+    ) -> None:
+        # The dependencies of the copies are cloned from the original ones with their inputs
+        # remapped to the copied attributes. The original dependencies have already been
+        # validated and the copied values are up to date, so the checks and the initial update
+        # of the outputs are skipped.
+        for item, dupl in copies.items():
+            item._bindings_shared = True
+            dupl._share_bindings(item._bindings)
+            for label, alist in item._child_attr_lists.items():
+                alist_dupl = dupl._new_child_attr_list(alist.type, label)
+                for attr in alist.attributes:
+                    alist_dupl._link(attr_map[attr])
+                attr_map[alist] = alist_dupl
+
+            parent_attrs: dict[AbstractAttribute, AbstractAttribute] = dict()
+            for label, pattr in item._parent_attributes.items():
+                stub = pattr.stub.copy()
+                if dupl.parent.has_attribute(label):
+                    dupl._parent_attributes[label] = Parent_Attribute(
+                        dupl.parent.attribute(label), stub
+                    )
+                else:
+                    dupl._parent_attributes[label] = Parent_Attribute(stub, stub)
+                parent_attrs[pattr.attr] = dupl._parent_attributes[label].attr
+
+            for output_name, info in dupl._bindings.items():
+                original = item.attribute(output_name)
+                if not original.dependent:
+                    dupl._bind(output_name, info)
+                    continue
+                inputs = [
+                    parent_attrs[i] if i in parent_attrs else attr_map[i]
+                    for i in original.dependency._inputs
+                ]
+                dependency = dupl.attribute(output_name).add_dependency(
+                    original.dependency.func,
+                    *inputs,
+                    label=info.label,
+                    validate=False,
+                    update=False,
+                )
+                for finfo in info.input_labels:
+                    if finfo.owner == "parent" and finfo.label in dupl._parent_attributes:
+                        dupl._parent_attributes[finfo.label].watch_dependency(dependency)
+
+        # only the copy of the subtree root loses its parent's attributes
+        dupl = copies[self]
+        for output_name, info in dupl._bindings.items():
+            if any(finfo.owner == "parent" for finfo in info.input_labels):
+                output = dupl.attribute(output_name)
+                self.controller.run(*output.command["set"](output.dependency._data_converter()))
 
     def _leave_child(self, child: Item) -> None:
         if child in self.__children:
-            self.__children.remove(child)
+            self.__children.pop(child)
+            self.__positions = None
             child._leave_parent(self)
             self._run_actions_after_command("leave", child)
 
+    def _leave_children(self, children: list[Item]) -> list[Optional[int]]:
+        ranks = [self.__children.get(child) for child in children]
+        for child in children:
+            self._leave_child(child)
+        return ranks
+
     def _leave_parent(self, parent: Item) -> None:
         if parent is self.parent:
             if self.__parent is self.NULL:
@@ -1396,10 +2555,14 @@ class ItemImpl(Item):
             action(item)
             self.__last_action = (self.name, after_command, item.name)
 
-    def _attributes_copy(self) -> dict[str, Attribute]:
+    def _attributes_copy(
+        self, attr_map: Optional[dict[AbstractAttribute, AbstractAttribute]] = None
+    ) -> dict[str, Attribute]:
         attr_copy: dict[str, Attribute] = {}
-        for label, attr in self.attributes.items():
+        for label, attr in self.__attributes.items():
             attr_copy[label] = attr.copy()
+            if attr_map is not None:
+                attr_map[attr] = attr_copy[label]
         return attr_copy
 
     def _adjust_name_if_taken(self, item: Item, cname: str) -> str:
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from functools import partial
+from typing import Collection
+
+from te_tree.core.item import Item
+
+
+class Tree_Observer:
+    """Follows the changes of the tree under the root item. The subclasses are notified about
+    items entering and leaving the tree, about reordering of the children, about adopting and
+    leaving the formal children (which are not observed themselves) and about setting
+    values of the observed attributes (or of any attribute, if 'any_attribute' is True).
+    Starting the observer walks the whole tree, so all the children deferred when loading
+    the case from the indexed file are built and the file is closed."""
+
+    def __init__(
+        self, root: Item, labels: Collection[str] = (), any_attribute: bool = False
+    ) -> None:
+        self._root = root
+        self._labels = tuple(labels)
+        self._any_attribute = any_attribute
+        self._observer_id = f"{self.__class__.__name__} {id(self)}"
+        self._watched: dict[Item, None] = dict()
+
+    @property
+    def root(self) -> Item:
+        return self._root
+
+    def start(self) -> None:
+        self._watch_tree(self._root)
+
+    def stop(self) -> None:
+        self._unwatch_tree(self._root)
+
+    def _watch_tree(self, item: Item) -> None:
+        for descendant in item.preorder():
+            if descendant in self._watched:
+                continue
+            self._watched[descendant] = None
+            descendant.add_action(self._observer_id, "adopt", partial(self._on_adopt, descendant))
+            descendant.add_action(self._observer_id, "leave", partial(self._on_leave, descendant))
+            descendant.add_action(self._observer_id, "sort", self._reordered)
+            descendant.add_action(self._observer_id, "formal", self._formal_children_changed)
+            if self._any_attribute:
+                descendant.add_action_on_set(self._observer_id, partial(self._changed, label=""))
+            for label in self._labels:
+                if label == "name":
+                    descendant.add_action(
+                        self._observer_id, "rename", partial(self._changed, label=label)
+                    )
+                elif descendant.has_attribute(label) and not self._any_attribute:
+                    descendant.attribute(label).add_action_on_set(
+                        self._observer_id, partial(self._changed, descendant, label)
+                    )
+            self._added(descendant)
+
+    def _unwatch_tree(self, item: Item) -> None:
+        for descendant in item.postorder():
+            if descendant not in self._watched:
+                continue
+            self._watched.pop(descendant)
+            descendant.remove_action(self._observer_id, "adopt")
+            descendant.remove_action(self._observer_id, "leave")
+            descendant.remove_action(self._observer_id, "sort")
+            descendant.remove_action(self._observer_id, "formal")
+            if self._any_attribute:
+                descendant.remove_action_on_set(self._observer_id)
+            for label in self._labels:
+                if label == "name":
+                    descendant.remove_action(self._observer_id, "rename")
+                elif descendant.has_attribute(label) and not self._any_attribute:
+                    descendant.attribute(label).remove_action_on_set(self._observer_id)
+            self._removed(descendant)
+
+    def _on_adopt(self, parent: Item, child: Item) -> None:
+        self._watch_tree(child)
+        self._attached(parent, child)
+
+    def _on_leave(self, parent: Item, child: Item) -> None:
+        self._unwatch_tree(child)
+        self._detached(parent, child)
+
+    def _added(self, item: Item) -> None:
+        pass
+
+    def _removed(self, item: Item) -> None:
+        pass
+
+    def _attached(self, parent: Item, child: Item) -> None:
+        pass
+
+    def _detached(self, parent: Item, child: Item) -> None:
+        pass
+
+    def _reordered(self, parent: Item) -> None:
+        pass
+
+    def _formal_children_changed(self, parent: Item) -> None:
+        pass
+
+    def _changed(self, item: Item, label: str) -> None:
+        pass
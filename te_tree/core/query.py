@@ -0,0 +1,172 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+import numbers
+import operator
+from typing import Any, Callable, Collection, Literal, Optional
+
+from te_tree.core.item import Item
+from te_tree.core.observer import Tree_Observer
+
+
+Comparison = Literal["==", "!=", "<", "<=", ">", ">="]
+Condition = tuple[str, Comparison, Any]
+
+
+_OPERATORS: dict[Comparison, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def satisfies(item: Item, condition: Condition) -> bool:
+    label, comparison, value = condition
+    if not item.has_attribute(label):
+        return False
+    try:
+        return _OPERATORS[comparison](item(label), value)
+    except TypeError:
+        # e.g. the text compared with the number
+        return False
+
+
+def _kind(value: Any) -> Any:
+    # only the values of the same kind can be ordered, e.g. the integers with the decimals
+    if isinstance(value, (numbers.Real, Decimal)):
+        return numbers.Real
+    return type(value)
+
+
+class Attribute_Index(Tree_Observer):
+    """Keeps the items of the tree sorted by the value of a single attribute. The items of
+    different types may have the attribute with the same label, so the values are sorted
+    separately for each kind of values and the selected values are only of the kind of the
+    compared value."""
+
+    def __init__(self, root: Item, label: str) -> None:
+        super().__init__(root, labels=(label,))
+        self._label = label
+        self._values: dict[Item, Any] = dict()
+        self._sorted: dict[Any, list[Any]] = dict()
+        self._items: dict[Any, dict[Item, None]] = dict()
+        self.start()
+
+    @property
+    def label(self) -> str:
+        return self._label
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def select(self, comparison: Comparison, value: Any) -> list[Item]:
+        ordered = self._sorted.get(_kind(value), [])
+        match comparison:
+            case "==":
+                return list(self._items.get(value, ()))
+            case "<":
+                values = ordered[: bisect_left(ordered, value)]
+            case "<=":
+                values = ordered[: bisect_right(ordered, value)]
+            case ">":
+                values = ordered[bisect_right(ordered, value) :]
+            case ">=":
+                values = ordered[bisect_left(ordered, value) :]
+            case "!=":
+                return [item for item, v in self._values.items() if v != value]
+            case _:
+                raise Query_Engine.UnknownComparison(comparison)
+        return [item for v in values for item in self._items[v]]
+
+    def _added(self, item: Item) -> None:
+        if item.has_attribute(self._label):
+            self._insert(item, item(self._label))
+
+    def _removed(self, item: Item) -> None:
+        self._discard(item)
+
+    def _changed(self, item: Item, label: str) -> None:
+        self._discard(item)
+        self._added(item)
+
+    def _insert(self, item: Item, value: Any) -> None:
+        self._values[item] = value
+        if value != value:  # NaN cannot be ordered and is never equal to the searched value
+            return
+        if value not in self._items:
+            self._items[value] = dict()
+            ordered = self._sorted.setdefault(_kind(value), list())
+            ordered.insert(bisect_left(ordered, value), value)
+        self._items[value][item] = None
+
+    def _discard(self, item: Item) -> None:
+        if item not in self._values:
+            return
+        value = self._values.pop(item)
+        if value not in self._items:
+            return
+        self._items[value].pop(item)
+        if not self._items[value]:
+            self._items.pop(value)
+            ordered = self._sorted[_kind(value)]
+            ordered.pop(bisect_left(ordered, value))
+            if not ordered:
+                self._sorted.pop(_kind(value))
+
+
+class Query_Engine:
+
+    def __init__(self, root: Item) -> None:
+        self._root = root
+        self._indexes: dict[str, Attribute_Index] = dict()
+
+    @property
+    def indexed_labels(self) -> tuple[str, ...]:
+        return tuple(self._indexes.keys())
+
+    def add_index(self, label: str) -> None:
+        if label not in self._indexes:
+            self._indexes[label] = Attribute_Index(self._root, label)
+
+    def remove_index(self, label: str) -> None:
+        if label in self._indexes:
+            self._indexes.pop(label).stop()
+
+    def __call__(
+        self,
+        *conditions: Condition,
+        itype: Optional[str | Collection[str]] = None,
+        scope: Optional[Item] = None,
+    ) -> list[Item]:
+        for _, comparison, _ in conditions:
+            if comparison not in _OPERATORS:
+                raise Query_Engine.UnknownComparison(comparison)
+        if scope is None:
+            scope = self._root
+
+        indexed = [c for c in conditions if c[0] in self._indexes and c[1] != "!="]
+        if not indexed:
+            candidates = scope.preorder(itype=itype)
+        else:
+            # the most selective index narrows the search, the rest of conditions is checked directly
+            selections = [self._indexes[label].select(cmp, value) for label, cmp, value in indexed]
+            candidates = (
+                item
+                for item in min(selections, key=len)
+                if Item._has_itype(item, itype) and self._in_scope(item, scope)
+            )
+        return [
+            item
+            for item in candidates
+            if item is not self._root and all(satisfies(item, c) for c in conditions)
+        ]
+
+    @staticmethod
+    def _in_scope(item: Item, scope: Item) -> bool:
+        return item is scope or scope.is_ancestor_of(item)
+
+    class UnknownComparison(Exception):
+        pass
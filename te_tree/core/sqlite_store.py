@@ -0,0 +1,293 @@
+from __future__ import annotations
+import datetime
+from decimal import Decimal
+import sqlite3
+from typing import Any, Optional
+
+from te_tree.core.attributes import AbstractAttribute, Quantity
+from te_tree.core.binary import raw_value, set_raw_value
+from te_tree.core.item import Item, ItemCreator
+from te_tree.core.observer import Tree_Observer
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    case_id INTEGER,
+    parent INTEGER,
+    position INTEGER NOT NULL,
+    itype TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_case ON items (case_id);
+CREATE TABLE IF NOT EXISTS attributes (
+    item INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    atype TEXT NOT NULL,
+    value,
+    unit TEXT,
+    prefix TEXT,
+    PRIMARY KEY (item, label)
+);
+"""
+
+
+class SQLite_Store:
+    """Keeps the cases in the SQLite database, with a row for each item and a row for each of
+    its attributes. The stored cases are followed and only the items changed since the last
+    commit are written, in a single transaction after each batch of commands run by the item
+    creator's controller. Of the changed item, only the attributes with the values differing
+    from the written ones are written and of the siblings of the adopted, left or sorted items,
+    only those with the changed positions. A single case can be loaded without reading the
+    others."""
+
+    def __init__(self, filepath: str, creator: ItemCreator) -> None:
+        self._creator = creator
+        self._connection = sqlite3.connect(filepath)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+        self._ids: dict[Item, int] = dict()
+        self._cases: dict[Item, _Stored_Case] = dict()
+        self._changed: dict[Item, None] = dict()
+        self._removed: dict[Item, None] = dict()
+        # the parents with the positions of the children possibly changed
+        self._reordered: dict[Item, None] = dict()
+        # the written positions and the written name and attribute rows of the stored items
+        self._positions: dict[Item, int] = dict()
+        self._written: dict[Item, tuple[str, dict[str, tuple[Any, ...]]]] = dict()
+        self._owner_id = f"{self.__class__.__name__} {id(self)}"
+        creator._controller.add_action_after_batch(self._owner_id, self.commit)
+
+    def case_names(self) -> list[str]:
+        rows = self._connection.execute(
+            "SELECT name FROM items WHERE parent IS NULL ORDER BY position, id"
+        )
+        return [name for (name,) in rows]
+
+    def add(self, case: Item) -> None:
+        """Stores the case and follows its changes."""
+        if case in self._cases:
+            return
+        self._cases[case] = _Stored_Case(case, self)
+        self.commit()
+
+    def load(self, name: str) -> Item:
+        row = self._connection.execute(
+            "SELECT id FROM items WHERE parent IS NULL AND name = ? ORDER BY id", (name,)
+        ).fetchone()
+        if row is None:
+            raise SQLite_Store.CaseNotStored(name)
+        case_id = row[0]
+        values: dict[int, dict[str, tuple[Any, ...]]] = dict()
+        for item_id, label, *row in self._connection.execute(
+            "SELECT a.item, a.label, a.atype, a.value, a.unit, a.prefix FROM attributes a "
+            "JOIN items i ON a.item = i.id WHERE i.case_id = ?",
+            (case_id,),
+        ):
+            values.setdefault(item_id, dict())[label] = tuple(row)
+        children: dict[Optional[int], list[tuple[int, str, str]]] = dict()
+        for item_id, parent_id, itype, item_name in self._connection.execute(
+            "SELECT id, parent, itype, name FROM items WHERE case_id = ? ORDER BY position, id",
+            (case_id,),
+        ):
+            children.setdefault(parent_id, list()).append((item_id, itype, item_name))
+
+        # no commands are run, as when loading the case from a file
+        built: list[Item] = list()
+        stack: list[tuple[int, str, str, Optional[Item]]] = [
+            (item_id, itype, item_name, None)
+            for item_id, itype, item_name in children[None]
+            if item_id == case_id
+        ]
+        while stack:
+            item_id, itype, item_name, parent = stack.pop()
+            self._creator._check_template_is_available(itype)
+            item = self._creator._from_template(itype, item_name, parent, update=False)
+            rows = values.get(item_id, dict())
+            for label, (atype, value, unit, prefix) in rows.items():
+                if item.has_attribute(label) and item.attribute(label).type == atype:
+                    _set_stored_value(item.attribute(label), value, unit, prefix)
+            self._ids[item] = item_id
+            self._written[item] = (item_name, rows)
+            built.append(item)
+            stack.extend((*child, item) for child in reversed(children.get(item_id, ())))
+        by_parent: dict[Item, list[Item]] = {item: list() for item in built}
+        for item in built[1:]:
+            by_parent[item.parent].append(item)
+        for item, item_children in by_parent.items():
+            item._attach_children(item_children)
+            self._positions.update((child, i) for i, child in enumerate(item_children))
+        ItemCreator._update_dependent_values(built)
+        case = built[0]
+        self._positions[case] = 0
+        self._cases[case] = _Stored_Case(case, self)
+        self._changed.clear()
+        return case
+
+    def commit(self) -> None:
+        if not self._changed and not self._removed and not self._reordered:
+            return
+        with self._connection:
+            for item in self._removed:
+                self._positions.pop(item, None)
+                self._written.pop(item, None)
+                if item in self._ids:
+                    item_id = self._ids.pop(item)
+                    self._connection.execute("DELETE FROM items WHERE id = ?", (item_id,))
+                    self._connection.execute("DELETE FROM attributes WHERE item = ?", (item_id,))
+            # the parents are written before their children, so that their ids are known
+            for item in sorted(self._changed, key=self._depth):
+                self._write(item)
+            for parent in self._reordered:
+                if parent in self._ids:
+                    self._write_positions(parent)
+        self._changed.clear()
+        self._removed.clear()
+        self._reordered.clear()
+
+    def close(self) -> None:
+        self.commit()
+        for stored_case in self._cases.values():
+            stored_case.stop()
+        self._cases.clear()
+        self._creator._controller.remove_action_after_batch(self._owner_id)
+        self._connection.close()
+
+    def _write(self, item: Item) -> None:
+        self._creator._check_template_exists_for_item(item)
+        if item in self._cases:
+            case_id, parent_id, position = self._ids.get(item), None, 0
+        else:
+            case_id = self._ids[self._case_of(item)]
+            parent_id = self._ids[item.parent]
+            position = item.parent._child_position(item)
+        self._positions[item] = position
+        if item in self._ids:
+            self._connection.execute(
+                "UPDATE items SET parent = ?, position = ?, name = ? WHERE id = ?",
+                (parent_id, position, item.name, self._ids[item]),
+            )
+        else:
+            cursor = self._connection.execute(
+                "INSERT INTO items (case_id, parent, position, itype, name) VALUES (?, ?, ?, ?, ?)",
+                (case_id, parent_id, position, item.itype, item.name),
+            )
+            self._ids[item] = cursor.lastrowid
+            if case_id is None:
+                self._connection.execute(
+                    "UPDATE items SET case_id = id WHERE id = ?", (cursor.lastrowid,)
+                )
+        rows = self._rows(item)
+        written = self._written.get(item, ("", dict()))[1]
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO attributes (item, label, atype, value, unit, prefix) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (self._ids[item], label, *row)
+                for label, row in rows.items()
+                if written.get(label) != row
+            ],
+        )
+        self._written[item] = (item.name, rows)
+
+    def _write_positions(self, parent: Item) -> None:
+        # e.g. after adopting the last child, none of its siblings is written
+        moved: list[tuple[int, int]] = list()
+        for position, child in enumerate(parent.children):
+            if child in self._ids and self._positions.get(child) != position:
+                self._positions[child] = position
+                moved.append((position, self._ids[child]))
+        self._connection.executemany("UPDATE items SET position = ? WHERE id = ?", moved)
+
+    @staticmethod
+    def _rows(item: Item) -> dict[str, tuple[Any, ...]]:
+        return {
+            label: (attr.type, *_stored_value(attr)) for label, attr in item.attributes.items()
+        }
+
+    def _depth(self, item: Item) -> int:
+        depth = 0
+        while item not in self._cases:
+            item = item.parent
+            depth += 1
+        return depth
+
+    def _case_of(self, item: Item) -> Item:
+        # the stored case may itself have a parent, e.g. the root item of the editor
+        while item not in self._cases:
+            item = item.parent
+        return item
+
+    def _mark_changed(self, item: Item) -> None:
+        self._removed.pop(item, None)
+        self._changed[item] = None
+
+    def _mark_removed(self, item: Item) -> None:
+        self._changed.pop(item, None)
+        self._removed[item] = None
+
+    def _mark_reordered(self, parent: Item) -> None:
+        self._reordered[parent] = None
+
+    def _mark_set(self, item: Item) -> None:
+        # setting the attributes to the already written values does not change the item
+        if self._written.get(item) != (item.name, self._rows(item)):
+            self._mark_changed(item)
+
+    class CaseNotStored(Exception):
+        pass
+
+
+class _Stored_Case(Tree_Observer):
+
+    def __init__(self, case: Item, store: SQLite_Store) -> None:
+        super().__init__(case, labels=("name",), any_attribute=True)
+        self._store = store
+        self.start()
+
+    def _added(self, item: Item) -> None:
+        self._store._mark_changed(item)
+
+    def _removed(self, item: Item) -> None:
+        self._store._mark_removed(item)
+
+    def _attached(self, parent: Item, child: Item) -> None:
+        # the positions of the siblings may have changed
+        self._store._mark_reordered(parent)
+
+    def _detached(self, parent: Item, child: Item) -> None:
+        self._store._mark_reordered(parent)
+
+    def _reordered(self, parent: Item) -> None:
+        self._store._mark_reordered(parent)
+
+    def _changed(self, item: Item, label: str) -> None:
+        self._store._mark_set(item)
+
+
+def _stored_value(attribute: AbstractAttribute) -> tuple[Any, Optional[str], Optional[str]]:
+    value, unit, prefix = raw_value(attribute), None, None
+    if isinstance(attribute, Quantity):
+        value, unit, prefix = value
+    if isinstance(value, bool):
+        return int(value), None, None
+    elif isinstance(value, (Decimal, float)):
+        # kept as text, so that the decimal values are stored exactly
+        return str(value), unit, prefix
+    elif isinstance(value, datetime.date):
+        return value.isoformat(), None, None
+    return value, unit, prefix
+
+
+def _set_stored_value(
+    attribute: AbstractAttribute, value: Any, unit: Optional[str], prefix: Optional[str]
+) -> None:
+    atype = attribute.type
+    if atype == "bool":
+        value = bool(value)
+    elif atype in ("real", "money", "quantity"):
+        value = Decimal(value)
+    elif atype == "date":
+        value = datetime.date.fromisoformat(value)
+    set_raw_value(attribute, (value, unit, prefix) if atype == "quantity" else value)
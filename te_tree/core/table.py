@@ -0,0 +1,231 @@
+from __future__ import annotations
+import csv
+import datetime
+from decimal import Decimal, localcontext
+from typing import Any, Iterable, Iterator, Optional
+
+from te_tree.core.attributes import Quantity
+from te_tree.core.binary import raw_value, set_raw_value
+from te_tree.core.item import Item, ItemCreator
+
+
+ID, PARENT, PATH, ITYPE, NAME = "id", "parent", "path", "itype", "name"
+PATH_SEPARATOR = "/"
+UNIT_SUFFIX, PREFIX_SUFFIX = ".unit", ".prefix"
+# the parquet decimal columns hold the numbers rounded to the fixed number of decimal places
+DECIMAL_PRECISION, DECIMAL_SCALE = 38, 10
+
+
+class Item_Table:
+    """Items flattened into a table with a row for each item in preorder. Each row contains
+    the row id, the id of the parent's row (None for the exported items themselves), the path
+    of names from the exported item, the item type, the name and a typed column for each of
+    the 'attributes' (given as label and attribute type). Each quantity is followed by the
+    columns with its unit and prefix (the label with the '.unit' and '.prefix' suffixes). The
+    attributes missing in the item are left empty."""
+
+    BATCH_SIZE = 10000
+
+    def __init__(self, attributes: dict[str, str]) -> None:
+        self._attributes = attributes
+        # the attribute types of the columns following the name
+        self._value_columns: dict[str, str] = dict()
+        for label, atype in attributes.items():
+            self._value_columns[label] = atype
+            if atype == "quantity":
+                self._value_columns[label + UNIT_SUFFIX] = "text"
+                self._value_columns[label + PREFIX_SUFFIX] = "text"
+
+    @property
+    def columns(self) -> list[str]:
+        return [ID, PARENT, PATH, ITYPE, NAME] + list(self._value_columns)
+
+    def rows(self, *items: Item) -> Iterator[list[Any]]:
+        row_id = 0
+        stack: list[tuple[Item, Optional[int], str]] = [
+            (item, None, item.name) for item in reversed(items)
+        ]
+        while stack:
+            item, parent_id, path = stack.pop()
+            row: list[Any] = [row_id, parent_id, path, item.itype, item.name]
+            for label, atype in self._attributes.items():
+                value = raw_value(item.attribute(label)) if item.has_attribute(label) else None
+                if atype != "quantity":
+                    row.append(value)
+                elif isinstance(value, tuple):
+                    row.extend(value)
+                else:
+                    row.extend((value, None, None))
+            yield row
+            stack.extend(
+                (child, row_id, path + PATH_SEPARATOR + child.name)
+                for child in reversed(item.children)
+            )
+            row_id += 1
+
+    def export_csv(self, filepath: str, *items: Item) -> None:
+        with open(filepath, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.columns)
+            for row in self.rows(*items):
+                writer.writerow(["" if value is None else _text(value) for value in row])
+
+    def export_parquet(self, filepath: str, *items: Item) -> None:
+        # the rows are written in batches, so only a single batch is held in memory
+        pa, pq = _pyarrow()
+        schema = pa.schema(
+            [(ID, pa.int64()), (PARENT, pa.int64()), (PATH, pa.string()), (ITYPE, pa.string())]
+            + [(NAME, pa.string())]
+            + [(label, _arrow_type(pa, atype)) for label, atype in self._value_columns.items()]
+        )
+        with pq.ParquetWriter(filepath, schema) as writer:
+            for batch in _batches(self.rows(*items), self.BATCH_SIZE):
+                columns = [list(column) for column in zip(*batch)]
+                for k, atype in enumerate(self._value_columns.values(), start=5):
+                    columns[k] = [_to_arrow(atype, value) for value in columns[k]]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    def import_csv(self, filepath: str, creator: ItemCreator) -> list[Item]:
+        def rows() -> Iterator[dict[str, Any]]:
+            with open(filepath, "r", newline="", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    yield {
+                        label: (None if text == "" else self._from_text(label, text))
+                        for label, text in row.items()
+                    }
+
+        return self.build(rows(), creator)
+
+    def import_parquet(self, filepath: str, creator: ItemCreator) -> list[Item]:
+        _, pq = _pyarrow()
+
+        def rows() -> Iterator[dict[str, Any]]:
+            for batch in pq.ParquetFile(filepath).iter_batches(self.BATCH_SIZE):
+                for row in batch.to_pylist():
+                    yield {
+                        label: self._from_arrow(label, value) for label, value in row.items()
+                    }
+
+        return self.build(rows(), creator)
+
+    def build(self, rows: Iterable[dict[str, Any]], creator: ItemCreator) -> list[Item]:
+        # As when loading the case file, no commands are run and the dependent values are
+        # computed once, after all the items are built. Returns the items without parent rows.
+        items: dict[int, Item] = dict()
+        children: dict[int, list[Item]] = dict()
+        roots: list[Item] = list()
+        for row in rows:
+            creator._check_template_is_available(row[ITYPE])
+            parent_id = row[PARENT]
+            parent = None if parent_id is None else items[parent_id]
+            item = creator._from_template(row[ITYPE], row[NAME], parent, update=False)
+            if parent is not None and not parent._can_be_parent_of_item_type(item):
+                raise Item.CannotAdoptItemOfType(item.itype)
+            for label, atype in self._attributes.items():
+                value = row.get(label)
+                if value is not None and item.has_attribute(label):
+                    attribute = item.attribute(label)
+                    if isinstance(attribute, Quantity):
+                        value = (value, *_unit_and_prefix(row, label, attribute))
+                    set_raw_value(attribute, value)
+            items[row[ID]] = item
+            children[row[ID]] = list()
+            if parent_id is None:
+                roots.append(item)
+            else:
+                children[parent_id].append(item)
+        for row_id, item in items.items():
+            item._attach_children(children[row_id])
+        ItemCreator._update_dependent_values(list(items.values()))
+        return roots
+
+    def _from_text(self, label: str, text: str) -> Any:
+        if label in (ID, PARENT):
+            return int(text)
+        elif label in (PATH, ITYPE, NAME):
+            return text
+        atype = self._value_columns.get(label)
+        if atype == "integer":
+            return int(text)
+        elif atype in ("real", "money", "quantity"):
+            return Decimal(text)
+        elif atype == "date":
+            return datetime.date.fromisoformat(text)
+        elif atype == "bool":
+            return text == "True"
+        return text
+
+    def _from_arrow(self, label: str, value: Any) -> Any:
+        if value is not None and self._value_columns.get(label) in ("real", "money", "quantity"):
+            return _without_trailing_zeros(Decimal(value))
+        return value
+
+    class ArrowNotAvailable(Exception):
+        pass
+
+
+def _unit_and_prefix(row: dict[str, Any], label: str, attribute: Quantity) -> tuple[str, str]:
+    # the quantity keeps its unit and prefix, if the table has no columns for them
+    unit, prefix = attribute.unit, attribute.prefix
+    if label + UNIT_SUFFIX in row:
+        unit = row[label + UNIT_SUFFIX] or unit
+    if label + PREFIX_SUFFIX in row:
+        # the empty prefix is read from the csv file as the missing value
+        prefix = row[label + PREFIX_SUFFIX] or ""
+    return unit, prefix
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def _batches(rows: Iterator[list[Any]], size: int) -> Iterator[list[list[Any]]]:
+    batch: list[list[Any]] = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = list()
+    if batch:
+        yield batch
+
+
+def _pyarrow() -> tuple[Any, Any]:
+    # the pyarrow is needed only for the parquet files
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Item_Table.ArrowNotAvailable
+    return pyarrow, pyarrow.parquet
+
+
+def _arrow_type(pa: Any, atype: str) -> Any:
+    if atype == "integer":
+        return pa.int64()
+    elif atype == "date":
+        return pa.date32()
+    elif atype == "bool":
+        return pa.bool_()
+    elif atype in ("real", "money", "quantity"):
+        return pa.decimal128(DECIMAL_PRECISION, DECIMAL_SCALE)
+    return pa.string()
+
+
+def _to_arrow(atype: str, value: Any) -> Any:
+    if value is None:
+        return None
+    elif atype in ("real", "money", "quantity"):
+        with localcontext() as context:
+            context.prec = DECIMAL_PRECISION
+            return Decimal(str(value)).quantize(Decimal(1).scaleb(-DECIMAL_SCALE))
+    return value
+
+
+def _without_trailing_zeros(value: Decimal) -> Decimal:
+    # the values are read with all the decimal places of the column
+    if value == value.to_integral_value():
+        return value.quantize(Decimal(1))
+    return value.normalize()
@@ -130,11 +130,10 @@ class Timeline:
         self._init_point.init_var(var_label).set(value)
 
     def _add_item_tree_to_timeline(self, item: Item) -> None:
-        self._set_up_hierarchy_edit_commands(item)
-        if self._has_time(item):
-            self._add_item_to_timeline(item, item(self.timename))
-        for child in item.children:
-            self._add_item_tree_to_timeline(child)
+        for descendant in item.preorder():
+            self._set_up_hierarchy_edit_commands(descendant)
+            if self._has_time(descendant):
+                self._add_item_to_timeline(descendant, descendant(self.timename))
 
     def _add_item_to_timeline(self, item: Item, time: Any) -> None:
         if time not in self._points:
@@ -159,11 +158,10 @@ class Timeline:
             return self._points[last_point_time]
 
     def _remove_item_tree(self, item: Item) -> None:
-        for child in item.children:
-            self._remove_item_tree(child)
-        if self._has_time(item):
-            self._remove_item_from_timeline(item, item(self.timename))
-        self._clean_up_hierarchy_edit_commands(item)
+        for descendant in item.postorder():
+            if self._has_time(descendant):
+                self._remove_item_from_timeline(descendant, descendant(self.timename))
+            self._clean_up_hierarchy_edit_commands(descendant)
 
     def _remove_item_from_timeline(self, item: Item, time: Any) -> None:
         point = self._points[time]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import Any, BinaryIO, Callable, Optional
+
+from te_tree.core.item import Item
+from te_tree.core.observer import Tree_Observer
+from te_tree.core.xml_writer import start_tag
+
+
+class Xml_Chunk_Cache(Tree_Observer):
+    """Keeps the serialized start tag of every item of the tree and the serialized subtree of
+    every item (indented for the item's depth). Renaming an item or setting any of its
+    attributes drops the start tag of the item and the subtrees of the item and its
+    ancestors. Adopting, leaving or sorting the children (and adopting or leaving a formal
+    child) drops the subtrees of the parent and its ancestors. The unchanged subtrees are then
+    written as they were cached, without walking them. The subtrees containing formal children
+    (which are not observed) are never kept. All chunks are dropped, when the 'context' (e.g.
+    the locale used for printing the values) changes. The XML is identical to the output of
+    the indented element tree.
+
+    Each item's bytes are held once for the item and once for each of its ancestors, so the
+    cache takes about as much memory as the saved file times the depth of the tree."""
+
+    INDENT = "\t"
+
+    def __init__(
+        self,
+        root: Item,
+        element: Callable[[Item], tuple[str, dict[str, str]]],
+        context: Callable[[], Any] = lambda: None,
+    ) -> None:
+        super().__init__(root, labels=("name",), any_attribute=True)
+        self._element = element
+        self._context = context
+        self._chunks_context = context()
+        self._chunks: dict[Item, tuple[str, bytes]] = dict()
+        # the depth, for which the subtree was indented, and the subtree
+        self._subtrees: dict[Item, tuple[int, bytes]] = dict()
+        self.start()
+
+    def serialize(self) -> bytes:
+        context = self._context()
+        if context != self._chunks_context:
+            self._chunks.clear()
+            self._subtrees.clear()
+            self._chunks_context = context
+        return self._subtree(self._root)
+
+    def write(self, file: BinaryIO) -> None:
+        file.write(self.serialize())
+
+    def _subtree(self, root: Item) -> bytes:
+        # The tree is walked with an explicit stack, so that the deep trees do not hit the
+        # recursion limit. The serialized children are collected in 'parts'.
+        newline, step = b"\n", self.INDENT.encode("utf-8")
+        parts: list[bytes] = list()
+        stack: list[tuple[Item, int, Optional[list[Item]]]] = [(root, 0, None)]
+        while stack:
+            item, depth, children = stack.pop()
+            if children is None:
+                cached = self._subtrees.get(item)
+                if cached is not None and cached[0] == depth:
+                    parts.append(cached[1])
+                    continue
+                children = item.children + item.formal_children
+                stack.append((item, depth, children))
+                stack.extend((child, depth + 1, None) for child in reversed(children))
+                continue
+            tag, start = self._tag_and_start(item)
+            indent = newline + step * depth if depth > 0 else b""
+            if children:
+                subtree = b"".join(
+                    [indent, start, b">"]
+                    + parts[len(parts) - len(children) :]
+                    + [newline, step * depth, b"</", tag.encode("utf-8"), b">"]
+                )
+                del parts[len(parts) - len(children) :]
+            else:
+                subtree = indent + start + b" />"
+            parts.append(subtree)
+            # the subtree is kept only if the subtrees of all the children were kept
+            if item in self._watched and all(child in self._subtrees for child in children):
+                self._subtrees[item] = (depth, subtree)
+        return parts[0]
+
+    def _tag_and_start(self, item: Item) -> tuple[str, bytes]:
+        chunk = self._chunks.get(item)
+        if chunk is None:
+            tag, attributes = self._element(item)
+            chunk = (tag, start_tag(tag, attributes))
+            # the formal children are not observed, so their chunks are never kept
+            if item in self._watched:
+                self._chunks[item] = chunk
+        return chunk
+
+    def _drop_subtrees(self, item: Item) -> None:
+        # a subtree is kept only with the subtrees of all its descendants, so the ancestors
+        # are not walked further than to the first one without the kept subtree
+        while self._subtrees.pop(item, None) is not None and item is not self._root:
+            item = item.parent
+
+    def _removed(self, item: Item) -> None:
+        self._chunks.pop(item, None)
+        self._subtrees.pop(item, None)
+
+    def _attached(self, parent: Item, child: Item) -> None:
+        self._drop_subtrees(parent)
+
+    def _detached(self, parent: Item, child: Item) -> None:
+        self._drop_subtrees(parent)
+
+    def _reordered(self, parent: Item) -> None:
+        self._drop_subtrees(parent)
+
+    def _formal_children_changed(self, parent: Item) -> None:
+        self._drop_subtrees(parent)
+
+    def _changed(self, item: Item, label: str) -> None:
+        self._chunks.pop(item, None)
+        self._drop_subtrees(item)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+from typing import BinaryIO, Callable, Optional, Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+
+def write_xml(
+    file: BinaryIO,
+    root: T,
+    element: Callable[[T], tuple[str, dict[str, str]]],
+    children: Callable[[T], Sequence[T]],
+    indent: Optional[str] = "\t",
+) -> None:
+    """Writes the elements depth-first directly to the file, without building the element tree.
+    The 'element' returns the tag and the attributes of the node. With the indent set, the output
+    is identical to the element tree indented with the same indent, otherwise no whitespace
+    is written between the elements."""
+
+    def tag_and_start(node: T) -> tuple[str, bytes]:
+        tag, attributes = element(node)
+        return tag, start_tag(tag, attributes)
+
+    write_xml_tags(file, root, tag_and_start, children, indent)
+
+
+def write_xml_tags(
+    file: BinaryIO,
+    root: T,
+    tag_and_start: Callable[[T], tuple[str, bytes]],
+    children: Callable[[T], Sequence[T]],
+    indent: Optional[str] = "\t",
+) -> None:
+    """Writes the elements as 'write_xml' does, with the 'tag_and_start' returning the tag and
+    the start tag of the node already serialized by 'start_tag'."""
+
+    newline = b"" if indent is None else b"\n"
+    step = b"" if indent is None else indent.encode("utf-8")
+    # the closing tag is pushed to the stack before the children of the element
+    stack: list[tuple[Optional[T], int, bytes]] = [(root, 0, b"")]
+    while stack:
+        node, depth, closing_tag = stack.pop()
+        if node is None:
+            file.write(closing_tag)
+            continue
+        tag, start = tag_and_start(node)
+        if depth > 0:
+            start = newline + step * depth + start
+        node_children = children(node)
+        if not node_children:
+            file.write(start + b" />")
+            continue
+        file.write(start + b">")
+        stack.append((None, depth, newline + step * depth + b"</" + tag.encode("utf-8") + b">"))
+        stack.extend((child, depth + 1, b"") for child in reversed(node_children))
+
+
+def start_tag(tag: str, attributes: dict[str, str]) -> bytes:
+    # the start tag without the closing bracket, e.g. b'<Item name="A"'
+    parts = ["<", tag]
+    for label, value in attributes.items():
+        parts.append(f' {label}="{_escape_attribute(value)}"')
+    return "".join(parts).encode("utf-8")
+
+
+def _escape_attribute(text: str) -> str:
+    # the same escaping as used by the element tree
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
@@ -1,7 +1,7 @@
 import tkinter.ttk as ttk
 import tkinter as tk
 from functools import partial
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Iterator, Optional
 import os
 
 from PIL import Image, ImageTk  # type: ignore
@@ -33,9 +33,9 @@ class Case_View_Tk(Case_View):
         for label, icon in collected_icons.items():
             if icon is None:
                 self._icons.pop(label)
-        yscrollbar = ttk.Scrollbar(window, orient="vertical", command=self._tree.yview)
-        yscrollbar.pack(anchor=tk.W, fill=tk.Y, side=tk.LEFT)
-        self._tree.configure(yscrollcommand=yscrollbar, height=25)
+        self._yscrollbar = ttk.Scrollbar(window, orient="vertical", command=self._tree.yview)
+        self._yscrollbar.pack(anchor=tk.W, fill=tk.Y, side=tk.LEFT)
+        self._tree.configure(yscrollcommand=self._yscrollbar, height=25)
 
         self._id = str(id(self))
         self._lang = lang
@@ -49,13 +49,24 @@ class Case_View_Tk(Case_View):
         root_item.add_action(self._id, "adopt", self._new_item_under_root)
         root_item.add_action(self._id, "leave", self._remove_item)
         root_item.add_action(self._id, "rename", self._rename_item)
+        root_item.add_action(self._id, "sort", self._reorder_rows)
         root_item.add_action_on_set(self._id, self._set_displayed_values_of_item_attributes)
 
         self._tree.bind("<<TreeviewSelect>>", self._handle_selection_change)
+        self._tree.bind("<<TreeviewOpen>>", self._handle_opening)
         self._tree.bind("<Escape>", lambda e: self._selection_clear())
         self._tree.bind("<Down> <Up>", lambda e: self._reselect_last())
 
         self._item_dict: dict[str, Item] = {"": root_item}
+        # ids of the items, whose children are inserted into the tree; the other items with
+        # children are shown with a placeholder child and their children are inserted when
+        # they are opened
+        self._loaded: set[str] = {""}
+        # ids of the items with outdated displayed values; the rows are refreshed at once when
+        # the Tk is idle, so a row updated several times during a single edit (e.g. by the
+        # dependent attributes) is repainted only once
+        self._outdated: dict[str, None] = dict()
+        self._refresh_scheduled: bool = False
         self._set_up_headings()
         self._reversed_sort: bool = False
         self._on_selection_change: list[Callable[[], None]] = list()
@@ -129,7 +140,7 @@ class Case_View_Tk(Case_View):
                         print_args["trailing_zeros"] = self._trailing_zeros
                     elif attr.type == "money":
                         print_args["use_thousands_separator"] = self._use_thousands_separator
-                    values[-1] = str(item.attribute(label).print(**print_args))
+                    values[-1] = str(attr.print_cached(**print_args))
                     break
         return values
 
@@ -143,14 +154,46 @@ class Case_View_Tk(Case_View):
         for func in self._on_selection_change:
             func()
 
+    def _handle_opening(self, event: tk.Event) -> None:
+        self._load_children(self._tree.focus())
+        # the item is marked as open only after the event is handled
+        if self._outdated:
+            self._schedule_refresh()
+
+    def _load_children(self, item_iid: str) -> None:
+        if item_iid in self._loaded or item_iid not in self._item_dict:
+            return
+        item = self._item_dict[item_iid]
+        self._tree.delete(self._placeholder_iid(item_iid))
+        self._loaded.add(item_iid)
+        for child in item.children:
+            self._insert_item_tree(child, item_iid)
+
     def _new_item(self, item: Item) -> None:
+        # under the item, whose children are not loaded yet, there already is a placeholder
+        if item.parent.id in self._loaded:
+            self._insert_item_tree(item, item.parent.id)
+
+    def _new_item_under_root(self, item: Item) -> None:
+        self._insert_item_tree(item, "")
+
+    def _insert_item_tree(self, item: Item, parent_iid: str) -> None:
+        stack: list[tuple[Item, str]] = [(item, parent_iid)]
+        while stack:
+            item, parent_iid = stack.pop()
+            self._insert_row(item, parent_iid)
+            if not item.has_children():
+                self._loaded.add(item.id)
+            elif item.id in self._loaded:
+                # the item was loaded before it had been removed from the view
+                stack.extend((child, item.id) for child in reversed(item.children))
+            else:
+                self._tree.insert(item.id, index=tk.END, iid=self._placeholder_iid(item.id))
+
+    def _insert_row(self, item: Item, parent_iid: str) -> None:
         values = self._collect_and_set_values(item)
         item_iid = self._tree.insert(
-            item.parent.id,
-            index=tk.END,
-            iid=item.id,
-            text=item.name,
-            values=values,
+            parent_iid, index=tk.END, iid=item.id, text=item.name, values=values
         )
         if item.itype in self._icons:
             self._tree.item(item_iid, image=self._icons[item.itype])
@@ -158,22 +201,21 @@ class Case_View_Tk(Case_View):
         item.add_action(self._id, "adopt", self._new_item)
         item.add_action(self._id, "leave", self._remove_item)
         item.add_action(self._id, "rename", self._rename_item)
+        item.add_action(self._id, "sort", self._reorder_rows)
         item.add_action_on_set(self._id, self._set_displayed_values_of_item_attributes)
         self._item_dict[item.id] = item
 
-        for child in item.children:
-            self._new_item(child)
+    def _inserted_items(self, item: Item) -> Iterator[Item]:
+        stack: list[Item] = [item]
+        while stack:
+            item = stack.pop()
+            yield item
+            if item.id in self._loaded:
+                stack.extend(item.children)
 
-    def _new_item_under_root(self, item: Item) -> None:
-        values = self._collect_and_set_values(item)
-        self._tree.insert("", index=tk.END, iid=item.id, text=item.name, values=values)
-        item.add_action(self._id, "adopt", self._new_item)
-        item.add_action(self._id, "leave", self._remove_item)
-        item.add_action(self._id, "rename", self._rename_item)
-        item.add_action_on_set(self._id, self._set_displayed_values_of_item_attributes)
-        self._item_dict[item.id] = item
-        for child in item.children:
-            self._new_item(child)
+    @staticmethod
+    def _placeholder_iid(item_iid: str) -> str:
+        return item_iid + " placeholder"
 
     def _pick_attr_label_from_attrs_assigned_to_caseview_column(
         self, item: Item, column_label: str
@@ -188,21 +230,61 @@ class Case_View_Tk(Case_View):
         return ""
 
     def _remove_item(self, item: Item) -> None:
-        for child in item.children:
-            self._remove_item(child)
+        if item.id not in self._item_dict:
+            return
+        for descendant in self._inserted_items(item):
+            descendant.remove_action(self._id, "adopt")
+            descendant.remove_action(self._id, "leave")
+            descendant.remove_action(self._id, "rename")
+            descendant.remove_action(self._id, "sort")
+            descendant.remove_action_on_set(self._id)
+            self._item_dict.pop(descendant.id)
+            if not descendant.has_children():
+                self._loaded.discard(descendant.id)
         self._tree.delete(item.id)
-        item.remove_action(self._id, "adopt")
-        item.remove_action(self._id, "leave")
-        item.remove_action(self._id, "rename")
-        item.remove_action_on_set(self._id)
-        self._item_dict.pop(item.id)
 
     def _rename_item(self, item: Item) -> None:
         self._tree.item(item.id, text=item.name)
 
+    def _reorder_rows(self, item: Item) -> None:
+        parent_iid = "" if item is self._item_dict[""] else item.id
+        if parent_iid not in self._loaded:
+            return
+        for index, child in enumerate(item.children):
+            self._tree.move(child.id, parent_iid, index)
+
     def _set_displayed_values_of_item_attributes(self, item: Item) -> None:
-        values = self._collect_and_set_values(item)
-        self._tree.item(item.id, values=values)
+        self._outdated[item.id] = None
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            self._tree.after_idle(self._refresh_outdated_rows)
+
+    def _refresh_outdated_rows(self) -> None:
+        self._refresh_scheduled = False
+        if not self._tree.winfo_exists():
+            return
+        hidden: dict[str, None] = dict()
+        for item_id in self._outdated:
+            if item_id not in self._item_dict:
+                continue
+            elif self._is_shown(item_id):
+                values = self._collect_and_set_values(self._item_dict[item_id])
+                self._tree.item(item_id, values=values)
+            else:
+                # the rows under the closed items are refreshed after they are opened
+                hidden[item_id] = None
+        self._outdated = hidden
+
+    def _is_shown(self, item_id: str) -> bool:
+        parent_iid = self._tree.parent(item_id)
+        while parent_iid != "":
+            if not self._tree.item(parent_iid, "open"):
+                return False
+            parent_iid = self._tree.parent(parent_iid)
+        return True
 
     def _selection_clear(self) -> None:
         self._tree.selection_set([])
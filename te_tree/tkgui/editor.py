@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter.filedialog import askopenfilename, askdirectory
+from tkinter.messagebox import showerror
 import os
 
 from te_tree.core.editor import EditorUI, Editor, Lang_Object
 from te_tree.tkgui.item_actions import Item_Menu_Tk, Item_Window_Tk
 from te_tree.tkgui.caseview import Case_View_Tk
+from te_tree.tkgui.virtual import Virtual_Case_View_Tk
 
 
 class Editor_Tk(EditorUI):
 
+    SAVES_POLLING_INTERVAL_MS = 200
+
     def __init__(
         self,
         editor: Editor,
@@ -16,13 +20,16 @@ class Editor_Tk(EditorUI):
         displayable_attributes: dict[str, tuple[str, ...]],
         lang: Lang_Object,
         icons: dict[str, str] = {},
+        virtual_view: bool = False,
     ) -> None:
 
         self.__editor = editor
         self.__win = master_window
         self.__item_window = Item_Window_Tk(self.__win, lang=lang)
         self.__item_menu = Item_Menu_Tk(self.__win, lang=lang)
-        self.__caseview: Case_View_Tk = Case_View_Tk(
+        # the virtual view inserts only the rows in the viewport, which suits very large cases
+        view_type = Virtual_Case_View_Tk if virtual_view else Case_View_Tk
+        self.__caseview: Case_View_Tk = view_type(
             self.__win, editor.root, displayable_attributes, lang=lang, icons=icons
         )
         super().__init__(editor, self.__item_menu, self.__item_window, self.__caseview, lang=lang)
@@ -43,6 +50,14 @@ class Editor_Tk(EditorUI):
         self.__caseview.widget.bind("<Control-g>", lambda e: self.__editor.group_selection())
         self.__caseview.widget.bind("<Control-G>", lambda e: self.__editor.ungroup_selection())
         self.__caseview.widget.bind("<Control-s>", lambda e: self.save_selected_cases_to_xml())
+        self.__win.after(self.SAVES_POLLING_INTERVAL_MS, self.__poll_finished_saves)
+
+    def __poll_finished_saves(self) -> None:  # pragma: no cover
+        self.report_finished_saves()
+        self.__win.after(self.SAVES_POLLING_INTERVAL_MS, self.__poll_finished_saves)
+
+    def _show_error(self, title: str, message: str) -> None:  # pragma: no cover
+        showerror(title, message, parent=self.__win)
 
     def _double_left_click_action(self, event: tk.Event) -> str:
         self.__caseview.do_on_tree_item(self.open_item_window)(event)
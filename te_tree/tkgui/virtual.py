@@ -0,0 +1,433 @@
+from __future__ import annotations
+from bisect import bisect_right
+from functools import partial
+from itertools import accumulate
+import tkinter as tk
+import tkinter.font as tkfont
+import tkinter.ttk as ttk
+from typing import Any, Callable, Optional
+
+from te_tree.core.editor import Item, Lang_Object
+from te_tree.tkgui.caseview import Case_View_Tk
+
+
+Row = tuple[Item, int]
+
+
+class Virtual_Tree:
+    """Rows of the items under the root item (not shown itself), with the children of the open
+    items following their parent. Each open item keeps the number of rows of its subtree, so
+    the row at any position is found by descending from the root and skipping over the whole
+    subtrees of the preceding siblings. Only the open items are followed for the adopted and
+    left children. When sorted, the children ordered by the key are followed for renaming and
+    setting their attributes, which drops the order of their siblings."""
+
+    def __init__(self, root: Item, on_change: Callable[[], None] = lambda: None) -> None:
+        self._root = root
+        self._on_change = on_change
+        self._id = f"{self.__class__.__name__} {id(self)}"
+        # rows of the open items' subtrees, including the item itself
+        self._sizes: dict[Item, int] = dict()
+        self._children: dict[Item, list[Item]] = dict()
+        self._offsets: dict[Item, list[int]] = dict()
+        self._key: Optional[Callable[[Item], Any]] = None
+        self._reverse: bool = False
+        # the items, whose key may change the order of their siblings
+        self._keyed: dict[Item, None] = dict()
+        self._open(root)
+
+    @property
+    def row_count(self) -> int:
+        return self._sizes[self._root] - 1
+
+    def is_open(self, item: Item) -> bool:
+        return item in self._sizes
+
+    def open(self, item: Item) -> None:
+        if item in self._sizes:
+            return
+        self._open(item)
+        self._on_change()
+
+    def close(self, item: Item) -> None:
+        # the open descendants are kept open and are shown again with the item
+        if item is self._root or item not in self._sizes:
+            return
+        self._resize(item, 1 - self._sizes[item])
+        self._close(item)
+        self._on_change()
+
+    def toggle(self, item: Item) -> None:
+        if item in self._sizes:
+            self.close(item)
+        else:
+            self.open(item)
+
+    def sort(self, key: Optional[Callable[[Item], Any]], reverse: bool = False) -> None:
+        """Orders the children of every item by the key. The items with the key equal to None
+        are put last. The key equal to None restores the order of the children."""
+        self._key, self._reverse = key, reverse
+        self._children.clear()
+        self._offsets.clear()
+        for item in list(self._keyed):
+            self._unfollow_key(item)
+        self._on_change()
+
+    def rows(self, first: int, count: int) -> list[Row]:
+        """Returns the items and their depths for 'count' rows from the 'first' row."""
+        first = max(first, 0)
+        if count <= 0 or first >= self.row_count:
+            return []
+        stack: list[tuple[list[Item], int, int]] = list()
+        node, depth, index = self._root, 0, first
+        while True:
+            children = self._ordered_children(node)
+            offsets = self._child_offsets(node)
+            i = bisect_right(offsets, index) - 1
+            index -= offsets[i]
+            if index == 0:
+                stack.append((children, i, depth))
+                break
+            # the row is in the subtree of the open child
+            stack.append((children, i + 1, depth))
+            node, index, depth = children[i], index - 1, depth + 1
+
+        rows: list[Row] = list()
+        while stack and len(rows) < count:
+            children, i, depth = stack.pop()
+            if i == len(children):
+                continue
+            item = children[i]
+            stack.append((children, i + 1, depth))
+            rows.append((item, depth))
+            if item in self._sizes and item.has_children():
+                stack.append((self._ordered_children(item), 0, depth + 1))
+        return rows
+
+    def index(self, item: Item) -> int:
+        """Returns the row of the item."""
+        row = -1
+        while item is not self._root:
+            parent = item.parent
+            if parent not in self._sizes:
+                raise Virtual_Tree.ItemNotShown(item.name)
+            position = self._ordered_children(parent).index(item)
+            row += self._child_offsets(parent)[position] + 1
+            item = parent
+        return row
+
+    def stop(self) -> None:
+        self._forget(self._root)
+        for item in list(self._keyed):
+            self._unfollow_key(item)
+
+    def _open(self, item: Item) -> None:
+        self._sizes[item] = 1
+        item.add_action(self._id, "adopt", partial(self._adopted, item))
+        item.add_action(self._id, "leave", partial(self._left, item))
+        item.add_action(self._id, "sort", self._reordered)
+        self._resize(item, sum(self._row_size(child) for child in item.children))
+
+    def _close(self, item: Item) -> None:
+        self._sizes.pop(item)
+        if self._keyed:
+            for child in item.children:
+                self._unfollow_key(child)
+        self._children.pop(item, None)
+        self._offsets.pop(item, None)
+        item.remove_action(self._id, "adopt")
+        item.remove_action(self._id, "leave")
+        item.remove_action(self._id, "sort")
+
+    def _forget(self, item: Item) -> None:
+        # closes the item and all its open descendants
+        stack: list[Item] = [item]
+        while stack:
+            item = stack.pop()
+            if item in self._sizes:
+                self._close(item)
+                stack.extend(item.children)
+
+    def _adopted(self, parent: Item, child: Item) -> None:
+        self._children.pop(parent, None)
+        self._offsets.pop(parent, None)
+        self._resize(parent, self._row_size(child))
+        self._on_change()
+
+    def _left(self, parent: Item, child: Item) -> None:
+        size = self._row_size(child)
+        self._forget(child)
+        self._unfollow_key(child)
+        self._children.pop(parent, None)
+        self._offsets.pop(parent, None)
+        self._resize(parent, -size)
+        self._on_change()
+
+    def _reordered(self, parent: Item) -> None:
+        self._children.pop(parent, None)
+        self._offsets.pop(parent, None)
+        self._on_change()
+
+    def _resize(self, item: Item, delta: int) -> None:
+        # the size of the open item changes together with the sizes of its open ancestors
+        while delta != 0 and item in self._sizes:
+            self._sizes[item] += delta
+            if item is self._root:
+                break
+            item = item.parent
+            self._offsets.pop(item, None)
+
+    def _row_size(self, item: Item) -> int:
+        return self._sizes.get(item, 1)
+
+    def _ordered_children(self, item: Item) -> list[Item]:
+        children = self._children.get(item)
+        if children is None:
+            children = item.children
+            if self._key is not None:
+                for child in children:
+                    self._follow_key(child)
+                keys = {child: self._key(child) for child in children}
+                children = sorted(
+                    (c for c in children if keys[c] is not None),
+                    key=lambda c: keys[c],
+                    reverse=self._reverse,
+                ) + [c for c in children if keys[c] is None]
+            self._children[item] = children
+        return children
+
+    def _follow_key(self, item: Item) -> None:
+        if item not in self._keyed:
+            self._keyed[item] = None
+            item.add_action(self._id, "rename", self._key_changed)
+            item.add_action_on_set(self._id, self._key_changed)
+
+    def _unfollow_key(self, item: Item) -> None:
+        if item in self._keyed:
+            self._keyed.pop(item)
+            item.remove_action(self._id, "rename")
+            item.remove_action_on_set(self._id)
+
+    def _key_changed(self, item: Item) -> None:
+        if item.parent in self._children:
+            self._reordered(item.parent)
+
+    def _child_offsets(self, item: Item) -> list[int]:
+        # the first row of each child's subtree relative to the first row of the children
+        offsets = self._offsets.get(item)
+        if offsets is None:
+            sizes = (self._row_size(child) for child in self._ordered_children(item))
+            offsets = list(accumulate(sizes, initial=0))
+            self._offsets[item] = offsets
+        return offsets
+
+    class ItemNotShown(Exception):
+        pass
+
+
+class Virtual_Case_View_Tk(Case_View_Tk):
+    """Case view with the rows inserted into the treeview only for the items in the viewport
+    and a few rows below it. The treeview contains a flat list of rows, the indentation and the
+    open/closed marks are part of the row text and the scrollbar is mapped to the rows of the
+    Virtual_Tree. The items are opened and closed with the Right and Left keys or by clicking
+    the mark."""
+
+    BUFFER = 10
+    INDENT = "    "
+    OPEN_MARK = "▾ "
+    CLOSED_MARK = "▸ "
+    LEAF_MARK = "  "
+    # the space left of the row text in the treeview
+    TEXT_PADDING = 20
+
+    def __init__(
+        self,
+        window: tk.Tk | tk.Frame,
+        root_item: Item,
+        attrs_for_display: dict[str, tuple[str, ...]] | None = None,
+        lang: Lang_Object = Lang_Object.get_lang_object(),
+        icons: dict[str, str] | None = None,
+    ) -> None:
+
+        super().__init__(window, root_item, attrs_for_display, lang, icons)
+        # the rows are not inserted for each item entering the tree, but only when drawn
+        for command in ("adopt", "leave", "rename", "sort"):
+            root_item.remove_action(self._id, command)
+        root_item.remove_action_on_set(self._id)
+
+        self._rows = Virtual_Tree(root_item, on_change=self._schedule_redraw)
+        self._first: int = 0
+        self._drawn: list[Item] = list()
+        self._offscreen_selection: set[Item] = set()
+        self._redraw_scheduled: bool = False
+        self._font = tkfont.nametofont("TkDefaultFont")
+
+        self._tree.configure(yscrollcommand="")
+        self._yscrollbar.configure(command=self._scroll)
+        self._tree.bind("<MouseWheel>", self._scroll_by_wheel)
+        self._tree.bind("<Button-4>", lambda e: self._scroll_by_units(-3))
+        self._tree.bind("<Button-5>", lambda e: self._scroll_by_units(3))
+        self._tree.bind("<Configure>", lambda e: self._schedule_redraw())
+        self._tree.bind("<Button-1>", self._handle_click)
+        self._tree.bind("<Right>", lambda e: self._toggle_focused(opening=True))
+        self._tree.bind("<Left>", lambda e: self._toggle_focused(opening=False))
+        self._tree.bind("<Down>", lambda e: self._move_focus(1))
+        self._tree.bind("<Up>", lambda e: self._move_focus(-1))
+
+    @property
+    def rows(self) -> Virtual_Tree:
+        return self._rows
+
+    @property
+    def selected_items(self) -> set[Item]:
+        shown = {self._item_dict[item_id] for item_id in self._tree.selection()}
+        return shown | self._offscreen_selection
+
+    def scroll_to(self, item: Item) -> None:
+        """Opens the item's ancestors and scrolls the view to show the item."""
+        for ancestor in reversed(list(self._ancestors(item))):
+            self._rows.open(ancestor)
+        row = self._rows.index(item)
+        count = self._viewport_rows()
+        if not self._first <= row < self._first + count:
+            self._first = row - count // 2
+        self._draw()
+
+    def _ancestors(self, item: Item) -> list[Item]:
+        ancestors: list[Item] = list()
+        while not item.parent.is_null() and item.parent is not self._item_dict[""]:
+            item = item.parent
+            ancestors.append(item)
+        return ancestors
+
+    def _schedule_redraw(self) -> None:
+        if not self._redraw_scheduled:
+            self._redraw_scheduled = True
+            self._tree.after_idle(self._draw)
+
+    def _draw(self) -> None:
+        self._redraw_scheduled = False
+        if not self._tree.winfo_exists():
+            return
+        count = self._viewport_rows()
+        self._first = max(0, min(self._first, self._rows.row_count - count))
+        selected = self.selected_items
+        for item in self._drawn:
+            item.remove_action(self._id, "rename")
+            item.remove_action_on_set(self._id)
+        self._tree.delete(*self._tree.get_children(""))
+        self._item_dict = {"": self._item_dict[""]}
+        self._outdated.clear()
+
+        self._drawn = list()
+        for item, depth in self._rows.rows(self._first, count + self.BUFFER):
+            self._tree.insert(
+                "",
+                index=tk.END,
+                iid=item.id,
+                text=self._row_text(item, depth),
+                values=self._collect_and_set_values(item),
+            )
+            if item.itype in self._icons:
+                self._tree.item(item.id, image=self._icons[item.itype])
+            item.add_action(self._id, "rename", self._rename_item)
+            item.add_action_on_set(self._id, self._set_displayed_values_of_item_attributes)
+            self._item_dict[item.id] = item
+            self._drawn.append(item)
+
+        self._offscreen_selection = {item for item in selected if item.id not in self._item_dict}
+        self._tree.selection_set([item.id for item in selected if item.id in self._item_dict])
+        total = self._rows.row_count
+        if total == 0:
+            self._yscrollbar.set(0, 1)
+        else:
+            self._yscrollbar.set(self._first / total, min(1, (self._first + count) / total))
+
+    def _row_text(self, item: Item, depth: int) -> str:
+        if not item.has_children():
+            mark = self.LEAF_MARK
+        elif self._rows.is_open(item):
+            mark = self.OPEN_MARK
+        else:
+            mark = self.CLOSED_MARK
+        return self.INDENT * depth + mark + item.name
+
+    def _viewport_rows(self) -> int:
+        row_height = int(ttk.Style(self._tree).lookup("Treeview", "rowheight") or 20)
+        return max(int(self._tree.cget("height")), self._tree.winfo_height() // row_height)
+
+    def _scroll(self, *args: str) -> None:
+        if args[0] == "moveto":
+            self._first = int(float(args[1]) * self._rows.row_count)
+        elif args[0] == "scroll":
+            step = self._viewport_rows() if args[2] == "pages" else 1
+            self._first += int(args[1]) * step
+        self._draw()
+
+    def _scroll_by_units(self, units: int) -> str:
+        self._scroll("scroll", str(units), "units")
+        return "break"
+
+    def _scroll_by_wheel(self, event: tk.Event) -> str:
+        return self._scroll_by_units(-3 if event.delta > 0 else 3)
+
+    def _handle_click(self, event: tk.Event) -> None:
+        # without Shift or Control, the clicked row replaces the whole selection
+        if not event.state & 0x5:
+            self._offscreen_selection.clear()
+        item_id = self._tree.identify_row(event.y)
+        if item_id not in self._item_dict or self._tree.identify_column(event.x) != "#0":
+            return
+        item = self._item_dict[item_id]
+        text = self._tree.item(item_id, "text")
+        mark_end = len(text) - len(item.name)
+        bbox = self._tree.bbox(item_id, "#0")
+        if bbox and event.x < bbox[0] + self.TEXT_PADDING + self._font.measure(text[:mark_end]):
+            self._rows.toggle(item)
+
+    def _toggle_focused(self, opening: bool) -> str:
+        item = self._item_dict.get(self._tree.focus())
+        if item is not None and item.has_children():
+            if opening:
+                self._rows.open(item)
+            else:
+                self._rows.close(item)
+        return "break"
+
+    def _move_focus(self, step: int) -> str:
+        item = self._item_dict.get(self._tree.focus())
+        if item is None:
+            return "break"
+        row = self._rows.index(item) + step
+        if not 0 <= row < self._rows.row_count:
+            return "break"
+        count = self._viewport_rows()
+        if row < self._first:
+            self._first = row
+        elif row >= self._first + count:
+            self._first = row - count + 1
+        next_item = self._rows.rows(row, 1)[0][0]
+        self._offscreen_selection.clear()
+        self._tree.selection_set([])
+        self._draw()
+        self._tree.focus(next_item.id)
+        self._tree.selection_set(next_item.id)
+        return "break"
+
+    def _rename_item(self, item: Item) -> None:
+        # the text of the row contains also the indentation and the mark
+        self._schedule_redraw()
+
+    def _sort_all_by(self, column_label: str) -> None:
+        if column_label == "#0":
+            key: Callable[[Item], Any] = lambda item: item.name
+        else:
+
+            def key(item: Item) -> Any:
+                label = self._pick_attr_label_from_attrs_assigned_to_caseview_column(
+                    item, column_label
+                )
+                return None if label == "" else item(label)
+
+        self._rows.sort(key, self._reversed_sort)
+        self._reversed_sort = not self._reversed_sort
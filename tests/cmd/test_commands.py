@@ -220,6 +220,16 @@ class Test_Composed_Command(unittest.TestCase):
         self.assertEqual(self.obj.i, 5)
         self.assertEqual(self.other_int.i, 5)
 
+    def test_collecting_hook_commands_with_some_owners_excluded(self):
+        composed_command = Composed_Increment()
+        composed_command.add("first", self.get_cmd, "pre")
+        composed_command.add("second", self.get_cmd, "post")
+        composed_command.add("third", self.get_cmd, "post")
+        data = IncrementIntData(self.obj, step=5)
+        self.assertEqual(len(composed_command.pre_commands(data)), 1)
+        self.assertEqual(len(composed_command.pre_commands(data, exclude={"first"})), 0)
+        self.assertEqual(len(composed_command.post_commands(data, exclude={"second"})), 1)
+
     def test_adding_command_under_invalid_timing_key(self):
         composed_command = Composed_Increment()
         with self.assertRaises(KeyError):
@@ -282,6 +292,21 @@ class Test_Composed_Command(unittest.TestCase):
         self.assertEqual(self.obj.i, 9)
 
 
+    def test_composed_commands_share_empty_hook_tables_until_a_hook_is_added(self):
+        cmd_a = Composed_Increment()
+        cmd_b = Composed_Increment()
+        self.assertFalse(cmd_a.has_hooks)
+        self.assertIs(cmd_a._post, cmd_b._post)
+
+        cmd_a.add("test", self.get_cmd, "post")
+        self.assertTrue(cmd_a.has_hooks)
+        self.assertFalse(cmd_b.has_hooks)
+        self.assertDictEqual(cmd_b.post, {})
+
+        self.controller.run(*cmd_b(IncrementIntData(self.obj, step=3)))
+        self.assertEqual(self.obj.i, 3)
+        self.assertEqual(self.other_int.i, 0)
+
 @dataclasses.dataclass
 class Increment_With_Message(Command):
     data: IncrementIntData
@@ -380,5 +405,28 @@ class Test_Denoting_Multiple_Commands_As_A_Single_One(unittest.TestCase):
         self.assertEqual(obj.i, 0)
 
 
+class Test_Actions_After_Batch(unittest.TestCase):
+
+    def test_action_is_run_once_after_each_batch_undo_and_redo(self):
+        controller = Controller()
+        obj = Integer_Owner(i=0)
+        values: list[int] = list()
+        controller.add_action_after_batch("owner", lambda: values.append(obj.i))
+
+        @controller.single_cmd()
+        def increment_two_times() -> None:
+            controller.run(IncrementIntAttribute(IncrementIntData(obj, step=5)))
+            controller.run(IncrementIntAttribute(IncrementIntData(obj, step=5)))
+
+        increment_two_times()
+        controller.undo()
+        controller.redo()
+        self.assertListEqual(values, [10, 0, 10])
+
+        controller.remove_action_after_batch("owner")
+        increment_two_times()
+        self.assertListEqual(values, [10, 0, 10])
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import sys
+import unittest
+
+sys.path.insert(1, "src")
+
+from te_tree.core.item import ItemCreator, freeatt_child
+from te_tree.core.aggregates import Aggregate, Aggregate_Cache, count, total
+from te_tree.core.editor import new_editor, blank_case_template
+
+
+class Test_Aggregate_Cache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.cr.add_template("Item", {"price": self.cr.attr.integer(0)}, ("Item",))
+        self.cr.add_template("Root", {}, ("Item",))
+        self.root = self.cr.from_template("Root")
+        self.group = self.cr.from_template("Item", "Group")
+        self.root.adopt(self.group)
+        self.items = list()
+        for price in (10, 20, 30):
+            item = self.cr.from_template("Item", f"Item {price}")
+            item.set("price", price)
+            self.group.adopt(item)
+            self.items.append(item)
+        self.calls: list[str] = list()
+
+        def price(item):
+            self.calls.append(item.name)
+            return item("price") if item.has_attribute("price") else 0
+
+        self.price_total = Aggregate("price total", price)
+        self.cache = Aggregate_Cache(self.root)
+
+    def test_aggregates_of_subtrees(self):
+        self.assertEqual(self.cache(self.root, count()), 5)
+        self.assertEqual(self.cache(self.root, count("Item")), 4)
+        self.assertEqual(self.cache(self.group, total("price")), 60)
+        self.assertEqual(self.cache(self.items[0], total("price")), 10)
+
+    def test_aggregates_are_computed_only_once_until_a_change(self):
+        self.assertEqual(self.cache(self.root, self.price_total), 60)
+        self.assertEqual(len(self.calls), 5)
+        self.calls.clear()
+        self.assertEqual(self.cache(self.root, self.price_total), 60)
+        self.assertEqual(self.cache(self.group, self.price_total), 60)
+        self.assertEqual(self.calls, [])
+
+    def test_only_the_path_to_changed_item_is_recomputed(self):
+        self.cache(self.root, self.price_total)
+        self.calls.clear()
+        self.items[1].set("price", 25)
+        self.assertEqual(self.cache(self.root, self.price_total), 65)
+        self.assertListEqual(self.calls, ["Item 20", "Group", "Root"])
+        self.cr.undo()
+        self.assertEqual(self.cache(self.root, self.price_total), 60)
+
+    def test_adopting_and_leaving_items_invalidates_the_aggregates(self):
+        self.assertEqual(self.cache(self.root, count()), 5)
+        new_item = self.cr.from_template("Item", "New")
+        new_item.set("price", 5)
+        self.items[0].adopt(new_item)
+        self.assertEqual(self.cache(self.root, count()), 6)
+        self.assertEqual(self.cache(self.group, total("price")), 65)
+        self.group.leave(self.items[0])
+        self.assertEqual(self.cache(self.root, count()), 4)
+        self.assertEqual(self.cache(self.group, total("price")), 50)
+        self.cr.undo()
+        self.assertEqual(self.cache(self.root, count()), 6)
+
+    def test_aggregates_of_item_outside_the_tree_are_not_available(self):
+        item = self.cr.from_template("Item")
+        with self.assertRaises(Aggregate_Cache.ItemNotObserved):
+            self.cache(item, count())
+
+
+class Test_Aggregates_Under_Parent_Summing_Its_Children(unittest.TestCase):
+
+    def test_editing_item_keeps_aggregates_of_its_siblings(self):
+        cr = ItemCreator()
+        cr.add_template("Item", {"price": cr.attr.integer(0)})
+        cr.add_template(
+            "Group",
+            {"total": cr.attr.integer(0)},
+            ("Item",),
+            dependencies=[
+                cr.dependency("total", sum, freeatt_child("price", cr.attr.integer(0)))
+            ],
+        )
+        group = cr.from_template("Group")
+        items = [cr.from_template("Item", f"Item {i}") for i in range(100)]
+        group.adopt_many(*items)
+        cache = Aggregate_Cache(group)
+        cache(group, total("price"))
+
+        items[5].set("price", 7)
+        self.assertEqual(group("total"), 7)
+        self.assertNotIn(items[5], cache._cache)
+        self.assertNotIn(group, cache._cache)
+        self.assertTrue(all(item in cache._cache for item in items if item is not items[5]))
+        self.assertEqual(cache(group, total("price")), 7)
+
+
+class Test_Aggregates_In_Editor(unittest.TestCase):
+
+    def test_counting_items_in_case(self):
+        case_template = blank_case_template()
+        case_template.add("Item", {"price": case_template.attr.integer(0)}, ("Item",))
+        case_template.add_case_child_label("Item")
+        editor = new_editor(case_template)
+        case = editor.new_case("Case")
+        item = editor.new(case, "Item")
+        editor.new(item, "Item").set("price", 7)
+        self.assertEqual(editor.aggregate(case, count("Item")), 2)
+        self.assertEqual(editor.aggregate(case, total("price")), 7)
+        editor.new(case, "Item").set("price", 3)
+        self.assertEqual(editor.aggregate(case, count("Item")), 3)
+        self.assertEqual(editor.aggregate(case, total("price")), 10)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
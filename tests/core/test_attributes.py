@@ -1926,6 +1926,14 @@ class Test_Reading_Quantity_Value(unittest.TestCase):
     def test_reading_value_without_unit_raises_exception(self) -> None:
         self.assertRaises(Quantity.CannotExtractQuantity, self.volume.read, "1.5")
 
+    def test_reading_invalid_number_raises_exception_and_keeps_unit(self) -> None:
+        self.assertRaises(Quantity.CannotExtractReal, self.volume.read, "1.5.2 dm³")
+        self.assertRaises(Quantity.CannotExtractReal, self.volume.read, "1.5 km³")
+        read_raw = self.volume._raw_reader()
+        self.assertRaises(Quantity.CannotExtractReal, read_raw, self.volume, "x m³")
+        self.assertEqual(self.volume.prefix, "")
+        self.assertEqual(self.volume.value, 1)
+
     def test_reading_quantity_in_valid_format_with_already_defined_unit_and_prefix(
         self,
     ) -> None:
@@ -2346,5 +2354,47 @@ class Test_Undoing_Setting_Values_Of_Attribute_List(unittest.TestCase):
         self.assertEqual(a1.value, 3)
 
 
+class Test_Cached_Printed_Values(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fac = attribute_factory(Controller())
+
+    def test_printed_value_is_reused_until_value_is_set(self):
+        attr = self.fac.new("real", Decimal("1234.5"))
+        printed = attr.print_cached(precision=2, trailing_zeros=True)
+        self.assertEqual(printed, "1234.50")
+        self.assertIs(attr.print_cached(trailing_zeros=True, precision=2), printed)
+        attr.set(Decimal("2"))
+        self.assertEqual(attr.print_cached(precision=2, trailing_zeros=True), "2.00")
+        self.fac.undo()
+        self.assertEqual(attr.print_cached(precision=2, trailing_zeros=True), "1234.50")
+
+    def test_printed_values_are_not_allocated_before_first_print(self):
+        attr = self.fac.new("integer", 5)
+        other = self.fac.new("integer", 6)
+        self.assertIs(attr._printed, other._printed)
+        attr.set(7)
+        self.assertEqual(attr.print_cached(), "7")
+        self.assertEqual(other.print_cached(), "6")
+        self.assertIsNot(attr._printed, other._printed)
+
+    def test_different_options_are_printed_separately(self):
+        attr = self.fac.new("money", Decimal("1234.5"))
+        self.assertEqual(attr.print_cached(use_thousands_separator=True), f"$1{NBSP}234.50")
+        self.assertEqual(attr.print_cached(), "$1234.50")
+
+    def test_value_set_without_command_is_printed_anew(self):
+        attr = self.fac.new("integer", 5)
+        self.assertEqual(attr.print_cached(), "5")
+        attr._hard_set(7)
+        self.assertEqual(attr.print_cached(), "7")
+
+    def test_change_of_quantity_unit_prefix_is_printed_anew(self):
+        attr: Quantity = self.fac.newqu(Decimal("2500"), unit="g", exponents={"k": 3})
+        self.assertEqual(attr.print_cached(), f"2500{NBSP}g")
+        attr.set_prefix("k")
+        self.assertEqual(attr.print_cached(), f"2.5{NBSP}kg")
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+import io
+import os
+import random
+import shutil
+import sys
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(1, "src")
+
+from te_tree.core.backup import Backup_Store
+from te_tree.core.item import ItemCreator, Backup_Retention
+
+
+def count_chunks(dirpath: str) -> int:
+    return sum(len(files) for _, _, files in os.walk(os.path.join(dirpath, Backup_Store.CHUNK_DIR)))
+
+
+class Test_Backup_Store(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_13"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        self.store = Backup_Store(os.path.join(self.DIRPATH, "store"))
+        self.filepath = os.path.join(self.DIRPATH, "case.xml")
+        self.lines = [f'\t<Item name="Item {i}" x="{i * i}" />\n'.encode() for i in range(5000)]
+
+    def write(self, lines: list[bytes]) -> bytes:
+        content = b"".join(lines)
+        with open(self.filepath, "wb") as file:
+            file.write(content)
+        return content
+
+    def restored(self, version: str) -> bytes:
+        file = io.BytesIO()
+        self.store.restore("case.xml", version, file)
+        return file.getvalue()
+
+    def test_versions_are_restored(self):
+        first = self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        self.lines[10] = b'\t<Item name="Changed" x="0" />\n'
+        second = self.write(self.lines)
+        v2 = self.store.add(self.filepath, "case.xml")
+        self.assertListEqual(self.store.versions("case.xml"), [v1, v2])
+        self.assertEqual(self.restored(v1), first)
+        self.assertEqual(self.restored(v2), second)
+
+    def test_unchanged_chunks_are_stored_only_once(self):
+        self.write(self.lines)
+        self.store.add(self.filepath, "case.xml")
+        n = count_chunks(self.store._dirpath)
+        self.assertGreater(n, 10)
+
+        self.lines.insert(2500, b'\t<Item name="Inserted" x="1" />\n')
+        self.write(self.lines)
+        self.store.add(self.filepath, "case.xml")
+        self.assertLessEqual(count_chunks(self.store._dirpath), n + 2)
+
+    def test_removing_version_removes_only_chunks_not_used_elsewhere(self):
+        first = self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        self.write(self.lines[:-100] + [b"<End />\n"])
+        v2 = self.store.add(self.filepath, "case.xml")
+        n = count_chunks(self.store._dirpath)
+
+        self.store.remove("case.xml", v2)
+        self.assertLess(count_chunks(self.store._dirpath), n)
+        self.assertListEqual(self.store.versions("case.xml"), [v1])
+        self.assertEqual(self.restored(v1), first)
+
+    def test_chunks_of_binary_content_are_shared(self):
+        content = random.Random(0).randbytes(200000)
+        self.write([content])
+        self.store.add(self.filepath, "case.bin")
+        n = count_chunks(self.store._dirpath)
+        self.assertGreater(n, 5)
+
+        changed = self.write([content[:100000], b"inserted bytes", content[100000:]])
+        version = self.store.add(self.filepath, "case.bin")
+        self.assertLessEqual(count_chunks(self.store._dirpath), n + 2)
+        file = io.BytesIO()
+        self.store.restore("case.bin", version, file)
+        self.assertEqual(file.getvalue(), changed)
+
+    def test_removing_version_does_not_read_other_versions(self):
+        self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        self.store.add(self.filepath, "other.xml")
+        self.write(self.lines[:-100])
+        v2 = self.store.add(self.filepath, "case.xml")
+        read: list[str] = list()
+        manifest = self.store._manifest
+        self.store._manifest = lambda name, version: read.append(version) or manifest(name, version)
+        self.store.remove("case.xml", v1)
+        self.assertListEqual(read, [v1])
+        self.store.remove("other.xml", *self.store.versions("other.xml"))
+        self.assertEqual(self.restored(v2), b"".join(self.lines[:-100]))
+        self.store.remove("case.xml", v2)
+        self.assertEqual(count_chunks(self.store._dirpath), 0)
+
+    def test_references_are_counted_for_store_without_them(self):
+        self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        v2 = self.store.add(self.filepath, "case.xml")
+        os.remove(os.path.join(self.store._dirpath, Backup_Store.REFS_FILE))
+        self.store.remove("case.xml", v1)
+        self.assertEqual(self.restored(v2), b"".join(self.lines))
+
+    def read_refs(self) -> bytes:
+        with open(os.path.join(self.store._dirpath, Backup_Store.REFS_FILE), "rb") as file:
+            return file.read()
+
+    def test_adding_version_appends_the_references(self):
+        self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        refs = self.read_refs()
+        self.store.add(self.filepath, "case.xml")
+        self.assertTrue(self.read_refs().startswith(refs))
+        self.assertEqual(len(self.read_refs()), 2 * len(refs))
+        self.assertEqual(set(self.store._refs().values()), {2})
+
+        self.store.remove("case.xml", v1)
+        self.assertEqual(len(self.read_refs()), len(refs))
+        self.assertEqual(set(self.store._refs().values()), {1})
+
+    def test_unfinished_line_of_references_does_not_release_chunks(self):
+        self.write(self.lines)
+        v1 = self.store.add(self.filepath, "case.xml")
+        with open(os.path.join(self.store._dirpath, Backup_Store.REFS_FILE), "ab") as file:
+            file.write(b"0123abc")
+        v2 = self.store.add(self.filepath, "case.xml")
+        self.store.remove("case.xml", v1)
+        self.assertEqual(self.restored(v2), b"".join(self.lines))
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+class Test_Deduplicated_Backups_Of_Saved_Items(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_14"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.set_backup_deduplication(True)
+        self.cr.add_template("Item", {"x": self.cr.attr.integer(0)}, ("Item",))
+        self.root = self.cr.from_template("Item", "Root")
+        self.root.adopt(self.cr.from_template("Item", "Child"))
+
+    def test_restoring_previous_version_of_saved_file(self):
+        for x in range(3):
+            self.root.pick_child("Child").set("x", x)
+            self.cr.save(self.root, "xml")
+        versions = self.cr.backup_versions("Root", "xml")
+        self.assertEqual(len(versions), 2)
+        self.assertFalse(os.path.isdir(os.path.join(self.DIRPATH, "backup", "Root")))
+
+        self.cr.restore_backup("Root", "xml", versions[0])
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(loaded.pick_child("Child")("x"), 0)
+        # the replaced file has been backed up too
+        self.assertEqual(len(self.cr.backup_versions("Root", "xml")), 3)
+
+    def test_restoring_compressed_file(self):
+        self.cr.save(self.root, "xml.gz")
+        self.root.pick_child("Child").set("x", 5)
+        self.cr.save(self.root, "xml.gz")
+        self.cr.restore_backup("Root", "xml.gz", self.cr.backup_versions("Root", "xml.gz")[0])
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml.gz")
+        self.assertEqual(loaded.pick_child("Child")("x"), 0)
+
+    def test_retention_applies_to_stored_versions(self):
+        self.cr.set_backup_retention(Backup_Retention(keep_last=2))
+        for x in range(5):
+            self.root.pick_child("Child").set("x", x)
+            self.cr.save(self.root, "xml")
+        self.assertEqual(len(self.cr.backup_versions("Root", "xml")), 2)
+
+    def test_restoring_nonexistent_version_raises_exception(self):
+        self.cr.save(self.root, "xml")
+        with self.assertRaises(ItemCreator.BackupDoesNotExist):
+            self.cr.restore_backup("Root", "xml", "123")
+
+    def test_replaced_file_is_added_to_the_store_by_worker_thread(self):
+        threads: list[threading.Thread] = list()
+        add = Backup_Store.add
+
+        def add_and_record(store: Backup_Store, *args) -> str:
+            threads.append(threading.current_thread())
+            return add(store, *args)
+
+        with mock.patch.object(Backup_Store, "add", add_and_record):
+            for x in range(3):
+                self.root.pick_child("Child").set("x", x)
+                self.cr.save(self.root, "xml")
+            self.cr.wait_for_backups()
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+        pending_dir = os.path.join(self.DIRPATH, "backup", ".store", Backup_Store.PENDING_DIR)
+        self.assertListEqual(os.listdir(pending_dir), [])
+
+    def tearDown(self) -> None:  # pragma: no cover
+        self.cr.wait_for_backups()
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
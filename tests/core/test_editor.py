@@ -338,6 +338,39 @@ class Test_Saving_And_Loading_Case(unittest.TestCase):
         self.assertTrue(self.editor.contains_case(loaded_case))
         self.assertFalse(loaded_case.pick_child("Item X").is_null())
 
+    def test_saving_and_loading_case_in_binary_format(self):
+        self.editor.save(self.caseA, "bin")
+        self.editor.remove_case(self.caseA)
+        loaded_case = self.editor.load_case(self.DIRPATH, "Case A", "bin")
+        self.assertTrue(self.editor.contains_case(loaded_case))
+        self.assertFalse(loaded_case.pick_child("Item X").is_null())
+        self.editor.undo()
+        self.assertFalse(self.editor.contains_case(loaded_case))
+
+    def test_loading_case_from_indexed_file(self):
+        self.editor.save(self.caseA, "ibin")
+        self.editor.remove_case(self.caseA)
+        loaded_case = self.editor.load_case(self.DIRPATH, "Case A", "ibin")
+        self.assertTrue(self.editor.contains_case(loaded_case))
+        self.assertTrue(loaded_case.has_children())
+        self.assertFalse(loaded_case.pick_child("Item X").is_null())
+
+    def test_loading_multiple_cases_at_once(self):
+        caseB = self.editor.new_case("Case B")
+        self.editor.new(caseB, "Item").rename("Item Y")
+        self.editor.save(self.caseA, "xml")
+        self.editor.save(caseB, "xml")
+        self.editor.remove_case(self.caseA)
+        self.editor.remove_case(caseB)
+
+        loaded = self.editor.load_cases(self.DIRPATH, ["Case A", "Case B"], "xml")
+        self.assertListEqual([case.name for case in loaded], ["Case A", "Case B"])
+        self.assertFalse(loaded[0].pick_child("Item X").is_null())
+        self.assertFalse(loaded[1].pick_child("Item Y").is_null())
+        self.assertTrue(all(self.editor.contains_case(case) for case in loaded))
+        self.editor.undo()
+        self.assertFalse(any(self.editor.contains_case(case) for case in loaded))
+
     def test_saving_case_as_a_case_is_equivalent_to_calling_save_method(self):
         self.editor.save_as_case(self.caseA, "xml")
         self.editor.remove_case(self.caseA)
@@ -606,14 +639,9 @@ class Test_Copying_Item(unittest.TestCase):
 
     def test_duplicating_item(self):
         thing = self.editor.new(self.other_item, "Thing")
-        self.assertSetEqual(
-            self.other_item.children,
-            {
-                thing,
-            },
-        )
+        self.assertListEqual(self.other_item.children, [thing])
         thing_duplicate = self.editor.duplicate(thing)
-        self.assertSetEqual(self.other_item.children, {thing, thing_duplicate})
+        self.assertListEqual(self.other_item.children, [thing, thing_duplicate])
 
 
 class Test_Selection_Of_Items(unittest.TestCase):
@@ -831,7 +859,7 @@ class Test_Grouping_And_Ungrouping_Items(unittest.TestCase):
         group = self.editor.group({self.item_A})
         self.assertFalse(group.is_null())
         self.assertTrue(self.parent.is_parent_of(group))
-        self.assertSetEqual(group.children, {self.item_A})
+        self.assertListEqual(group.children, [self.item_A])
 
     def test_items_under_common_parent_are_groupable(self):
         group = self.editor.group({self.item_A, self.item_B})
@@ -855,5 +883,36 @@ class Test_Grouping_And_Ungrouping_Items(unittest.TestCase):
         self.assertTrue(self.parent.is_parent_of(self.item_B))
 
 
+
+class Test_Querying_Items(unittest.TestCase):
+
+    def setUp(self) -> None:
+        case_template = blank_case_template()
+        case_template.add("Item", {"price": case_template.attr.integer(0)}, ("Item",))
+        case_template.add_case_child_label("Item")
+        self.editor = new_editor(case_template)
+        self.case_x = self.editor.new_case("Case X")
+        self.case_y = self.editor.new_case("Case Y")
+        for case in (self.case_x, self.case_y):
+            for price in (50, 150):
+                item = self.editor.new(case, "Item", name=f"Item {price}")
+                item.set("price", price)
+
+    def test_querying_items_in_all_cases_and_in_a_single_case(self):
+        self.editor.add_index("price")
+        result = self.editor.query(("price", ">", 100), itype="Item")
+        self.assertEqual({item.parent for item in result}, {self.case_x, self.case_y})
+        result = self.editor.query(("price", ">", 100), scope=self.case_y)
+        self.assertEqual([item.parent for item in result], [self.case_y])
+
+    def test_items_of_removed_case_are_not_found(self):
+        self.editor.add_index("price")
+        self.editor.remove_case(self.case_x)
+        result = self.editor.query(("price", "<", 100))
+        self.assertEqual([item.parent for item in result], [self.case_y])
+        self.editor.undo()
+        self.assertEqual(len(self.editor.query(("price", "<", 100))), 2)
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
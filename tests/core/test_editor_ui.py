@@ -1,5 +1,8 @@
 from __future__ import annotations
+import os
+import shutil
 import sys
+import threading
 import unittest
 from typing import Any, Callable
 
@@ -53,7 +56,10 @@ class Case_View_Test(Case_View):
 class Editor_UI_Test(EditorUI):
 
     def _compose(self) -> None:
-        pass
+        self.shown_errors: list[tuple[str, str]] = list()
+
+    def _show_error(self, title: str, message: str) -> None:
+        self.shown_errors.append((title, message))
 
     def _get_export_dir(self) -> str:
         return ""
@@ -249,5 +255,55 @@ class Test_Item_Window(unittest.TestCase):
         self.assertListEqual(self.menu.action_labels(), [])
 
 
+class Test_Saving_Case_In_Background(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_22"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        self.editor = new_editor(blank_case_template())
+        self.editor.set_dir_path(self.DIRPATH)
+        self.editor_ui = Editor_UI_Test(
+            self.editor, Item_Menu_Test(lang={}), Item_Window_Test(), Case_View_Test()
+        )
+        self.case = self.editor.new_case("Case")
+        self.editor.save(self.case, "xml")
+        self.workers: list[threading.Thread] = list()
+        save_in_background = self.editor.save_in_background
+
+        def save_and_record(*args, **kwargs) -> threading.Thread:
+            worker = save_in_background(*args, **kwargs)
+            self.workers.append(worker)
+            return worker
+
+        self.editor.save_in_background = save_and_record
+
+    def save_case(self) -> None:
+        self.editor_ui.save_case_to_existing_xml(self.case)
+        for worker in self.workers:
+            worker.join()
+
+    def test_errors_are_shown_only_when_the_ui_reports_finished_saves(self):
+        # the temporary file cannot be created in place of the directory
+        os.mkdir(os.path.join(self.DIRPATH, "Case.xml.tmp"))
+        self.save_case()
+        self.assertEqual(self.editor_ui.shown_errors, [])
+        self.editor_ui.report_finished_saves()
+        self.assertEqual(len(self.editor_ui.shown_errors), 1)
+        title, message = self.editor_ui.shown_errors[0]
+        self.assertEqual(title, "saving_failed")
+        self.assertTrue(message.startswith("Case: "))
+        self.editor_ui.report_finished_saves()
+        self.assertEqual(len(self.editor_ui.shown_errors), 1)
+
+    def test_successful_save_shows_no_error(self):
+        self.save_case()
+        self.editor_ui.report_finished_saves()
+        self.assertEqual(self.editor_ui.shown_errors, [])
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
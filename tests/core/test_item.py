@@ -1117,6 +1117,190 @@ class Test_Picking_Child_Item_By_Name(unittest.TestCase):
         self.assertEqual(parent.pick_child("Not a Child"), NullItem)
 
 
+class Test_Order_Of_Children(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mg = ItemCreator()
+        self.parent = self.mg.new("Parent")
+        for name in ("C", "A", "D", "B"):
+            self.parent.adopt(self.mg.new(name))
+
+    def test_children_are_kept_in_the_order_of_adoption(self):
+        self.assertListEqual(self.parent.child_names, ["C", "A", "D", "B"])
+        self.assertListEqual([c.name for c in self.parent.children], ["C", "A", "D", "B"])
+
+    def test_undoing_leaving_puts_the_child_back_to_its_original_position(self):
+        child = self.parent.pick_child("A")
+        self.parent.leave(child)
+        self.assertListEqual(self.parent.child_names, ["C", "D", "B"])
+        self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["C", "A", "D", "B"])
+        self.mg.redo()
+        self.assertListEqual(self.parent.child_names, ["C", "D", "B"])
+
+    def test_leaving_children_one_by_one_does_not_index_their_positions(self):
+        for name in ("D", "C", "B"):
+            self.parent.leave(self.parent.pick_child(name))
+            self.assertIsNone(self.parent._ItemImpl__positions)
+        self.parent.adopt(self.mg.new("E"))
+        self.assertListEqual(self.parent.child_names, ["A", "E"])
+        for _ in range(4):
+            self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["C", "A", "D", "B"])
+        self.mg.redo()
+        self.mg.redo()
+        self.assertListEqual(self.parent.child_names, ["A", "B"])
+
+    def test_undoing_leaving_of_many_children_after_sorting(self):
+        self.parent.sort_children()
+        children = [self.parent.pick_child(name) for name in ("D", "A", "C")]
+        self.parent.leave_many(*children)
+        self.assertListEqual(self.parent.child_names, ["B"])
+        self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["A", "B", "C", "D"])
+        self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["C", "A", "D", "B"])
+
+    def test_sorting_children_by_name(self):
+        self.parent.sort_children()
+        self.assertListEqual(self.parent.child_names, ["A", "B", "C", "D"])
+        self.parent.sort_children(reverse=True)
+        self.assertListEqual(self.parent.child_names, ["D", "C", "B", "A"])
+
+    def test_sorting_children_by_custom_key(self):
+        order = {"A": 2, "B": 0, "C": 3, "D": 1}
+        self.parent.sort_children(key=lambda child: order[child.name])
+        self.assertListEqual(self.parent.child_names, ["B", "D", "A", "C"])
+
+    def test_copy_keeps_the_order_of_children(self):
+        parent_copy = self.parent.copy()
+        self.assertListEqual(parent_copy.child_names, ["C", "A", "D", "B"])
+
+    def test_sorting_children_can_be_undone_and_redone(self):
+        self.parent.sort_children()
+        self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["C", "A", "D", "B"])
+        self.mg.redo()
+        self.assertListEqual(self.parent.child_names, ["A", "B", "C", "D"])
+
+    def test_sorting_children_notifies_the_actions_on_sorting(self):
+        sorted_parents: list[str] = list()
+        self.parent.add_action("test", "sort", lambda item: sorted_parents.append(item.name))
+        self.parent.sort_children()
+        self.mg.undo()
+        self.assertListEqual(sorted_parents, ["Parent", "Parent"])
+
+    def test_undoing_leaving_after_sorting_uses_the_sorted_positions(self):
+        self.parent.sort_children()
+        self.parent.leave(self.parent.pick_child("C"))
+        self.mg.undo()
+        self.assertListEqual(self.parent.child_names, ["A", "B", "C", "D"])
+
+
+class Test_Sorting_Children_With_Child_Attribute_List(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.parent = self.cr.new("Parent", {"first": "integer"})
+        self.parent.bind(
+            "first", lambda x: x[0] if x else 0, freeatt_child("x", self.cr.attr.integer(0))
+        )
+        for name, x in (("C", 3), ("A", 1), ("B", 2)):
+            child = self.cr.new(name, {"x": "integer"})
+            child.set("x", x)
+            self.parent.adopt(child)
+
+    def test_child_attribute_list_follows_the_order_of_children(self):
+        self.assertEqual(self.parent("first"), 3)
+        self.parent.sort_children()
+        self.assertEqual(self.parent("first"), 1)
+        self.cr.undo()
+        self.assertEqual(self.parent("first"), 3)
+        self.cr.redo()
+        self.assertEqual(self.parent("first"), 1)
+
+
+class Test_Traversing_Item_Tree(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mg = ItemCreator()
+        self.root = self.mg.new("Root")
+        self.a = self.mg.new("A")
+        self.b = self.mg.new("B")
+        self.a1 = self.mg.new("A1")
+        self.a2 = self.mg.new("A2")
+        self.b1 = self.mg.new("B1")
+        self.root.adopt(self.a)
+        self.root.adopt(self.b)
+        self.a.adopt(self.a1)
+        self.a.adopt(self.a2)
+        self.b.adopt(self.b1)
+
+    def names(self, items) -> list[str]:
+        return [item.name for item in items]
+
+    def test_preorder(self):
+        self.assertListEqual(
+            self.names(self.root.preorder()), ["Root", "A", "A1", "A2", "B", "B1"]
+        )
+
+    def test_postorder(self):
+        self.assertListEqual(
+            self.names(self.root.postorder()), ["A1", "A2", "A", "B1", "B", "Root"]
+        )
+
+    def test_breadth_first(self):
+        self.assertListEqual(
+            self.names(self.root.breadth_first()), ["Root", "A", "B", "A1", "A2", "B1"]
+        )
+
+    def test_pruning_skips_descendants_of_the_pruned_item(self):
+        prune = lambda item: item.name == "A"
+        self.assertListEqual(self.names(self.root.preorder(prune)), ["Root", "A", "B", "B1"])
+        self.assertListEqual(self.names(self.root.postorder(prune)), ["A", "B1", "B", "Root"])
+        self.assertListEqual(self.names(self.root.breadth_first(prune)), ["Root", "A", "B", "B1"])
+
+    def test_filtering_by_item_type(self):
+        mg = ItemCreator()
+        mg.add_template("Leaf")
+        mg.add_template("Node", child_itypes=("Node", "Leaf"))
+        root = mg.from_template("Node", "Root")
+        node = mg.from_template("Node", "Node")
+        leaf_a = mg.from_template("Leaf", "Leaf A")
+        leaf_b = mg.from_template("Leaf", "Leaf B")
+        root.adopt(node)
+        root.adopt(leaf_a)
+        node.adopt(leaf_b)
+        self.assertListEqual(self.names(root.preorder(itype="Leaf")), ["Leaf B", "Leaf A"])
+        self.assertListEqual(
+            self.names(root.breadth_first(itype=("Node",))), ["Root", "Node"]
+        )
+
+    def test_formal_children_are_traversed_only_on_demand(self):
+        formal_child = self.mg.new("Formal")
+        self.b.adopt_formally(formal_child)
+        self.assertNotIn("Formal", self.names(self.root.preorder()))
+        self.assertListEqual(
+            self.names(self.b.preorder(formal=True)), ["B", "B1", "Formal"]
+        )
+
+    def test_traversing_null_yields_no_items(self):
+        self.assertListEqual(list(NullItem.preorder()), [])
+        self.assertListEqual(list(NullItem.postorder()), [])
+        self.assertListEqual(list(NullItem.breadth_first()), [])
+
+    def test_traversing_deep_tree_does_not_hit_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        item = self.root
+        for i in range(depth):
+            child = self.mg.new(f"Item {i}")
+            item.adopt(child)
+            item = child
+        self.assertIs(item.root, self.root)
+        self.assertEqual(len(list(self.root.preorder())), depth + 6)
+        self.assertIs(next(self.root.postorder()), self.a1)
+
+
 class Test_Leaving_Child(unittest.TestCase):
 
     def test_running_leaving_child_command(self):
@@ -1145,6 +1329,74 @@ class Test_Leaving_Child(unittest.TestCase):
         self.assertTrue(new_parent.is_parent_of(child))
 
 
+class Test_Adopting_And_Leaving_Many_Children_At_Once(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mg = ItemCreator()
+        self.parent = self.mg.new("Parent", {"x": "integer"})
+        self.calls: list[int] = list()
+
+        def total(x: list[int]) -> int:
+            self.calls.append(1)
+            return sum(x)
+
+        self.parent.bind("x", total, freeatt_child("x", self.mg.attr.integer(0)))
+        self.children: list[Item] = list()
+        for i in range(5):
+            child = self.mg.new("Child", {"x": "integer"})
+            child.set("x", i)
+            self.children.append(child)
+        self.calls.clear()
+
+    def test_adopting_many_children(self):
+        self.parent.adopt_many(*self.children)
+        self.assertListEqual(
+            self.parent.child_names,
+            ["Child", "Child (1)", "Child (2)", "Child (3)", "Child (4)"],
+        )
+        self.assertEqual(self.parent("x"), 10)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_adopting_many_children_is_undone_as_a_single_command(self):
+        self.parent.adopt_many(*self.children)
+        self.mg.undo()
+        self.assertFalse(self.parent.has_children())
+        self.assertEqual(self.parent("x"), 0)
+        self.assertTrue(all(child.name == "Child" for child in self.children))
+        self.mg.redo()
+        self.assertEqual(len(self.parent.children), 5)
+        self.assertEqual(self.parent("x"), 10)
+
+    def test_leaving_many_children(self):
+        self.parent.adopt_many(*self.children)
+        self.calls.clear()
+        self.parent.leave_many(self.children[1], self.children[3])
+        self.assertListEqual(self.parent.child_names, ["Child", "Child (2)", "Child (4)"])
+        self.assertEqual(self.parent("x"), 6)
+        self.assertEqual(len(self.calls), 1)
+        self.children[1].set("x", 100)
+        self.assertEqual(self.parent("x"), 6)
+
+    def test_undoing_leaving_many_children_restores_their_positions(self):
+        self.parent.adopt_many(*self.children)
+        self.parent.leave_many(self.children[3], self.children[1])
+        self.mg.undo()
+        self.assertListEqual(self.parent.children, self.children)
+        self.assertEqual(self.parent("x"), 10)
+        self.mg.redo()
+        self.assertListEqual(self.parent.child_names, ["Child", "Child (2)", "Child (4)"])
+
+    def test_children_are_bound_to_the_new_parents_attributes(self):
+        for child in self.children:
+            child.bind("x", lambda x: 2 * x, freeatt_parent("x", self.mg.attr.integer(0)))
+        other_parent = self.mg.new("Other Parent", {"x": "integer"})
+        other_parent.set("x", 3)
+        other_parent.adopt_many(*self.children)
+        self.assertTrue(all(child("x") == 6 for child in self.children))
+        other_parent.leave_many(*self.children)
+        self.assertTrue(all(child("x") == 0 for child in self.children))
+
+
 class Test_Running_Additional_Command_When_Leaving_Child(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -1375,6 +1627,58 @@ class Test_Copying_Item_With_Multiple_Types_Of_Children(unittest.TestCase):
         self.assertEqual(self.parent("x"), 6)
 
 
+class Test_Copying_Subtree_With_Dependencies(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        int_attr = self.cr.attr.integer(0)
+        self.root = self.cr.new("Root", {"x": "integer"})
+        self.root.set("x", 10)
+        self.item = self.cr.new("Item", {"x": "integer", "y": "integer"})
+        self.item.bind("x", lambda x: sum(x), freeatt_child("x", int_attr))
+        self.item.bind("y", lambda x: 2 * x, freeatt_parent("x", int_attr))
+        self.root.adopt(self.item)
+        self.children: list[Item] = list()
+        for i in range(5):
+            child = self.cr.new(f"Child {i}", {"x": "integer", "z": "integer"})
+            child.bind("z", lambda x, p: x + p, "x", freeatt_parent("x", int_attr))
+            child.set("x", i)
+            self.item.adopt(child)
+            self.children.append(child)
+
+    def test_copied_children_correspond_to_the_original_children(self):
+        item_copy = self.item.copy()
+        for child in self.children:
+            child_copy = item_copy.pick_child(child.name)
+            self.assertFalse(child_copy.is_null())
+            self.assertEqual(child_copy("x"), child("x"))
+            self.assertEqual(child_copy("z"), child("z"))
+
+    def test_dependencies_of_the_copy_use_only_the_copied_attributes(self):
+        item_copy = self.item.copy()
+        item_copy.pick_child("Child 4").set("x", 100)
+        self.assertEqual(item_copy("x"), 0 + 1 + 2 + 3 + 100)
+        self.assertEqual(item_copy.pick_child("Child 4")("z"), 100 + item_copy("x"))
+        self.assertEqual(self.item("x"), 0 + 1 + 2 + 3 + 4)
+        self.assertEqual(self.children[4]("z"), 4 + self.item("x"))
+
+    def test_copy_of_subtree_root_is_updated_after_losing_parent(self):
+        item_copy = self.item.copy()
+        self.assertEqual(self.item("y"), 20)
+        self.assertEqual(item_copy("y"), 0)
+        self.root.adopt(item_copy)
+        self.assertEqual(item_copy("y"), 20)
+        self.root.set("x", 3)
+        self.assertEqual(item_copy("y"), 6)
+        self.assertEqual(self.item("y"), 6)
+
+    def test_copying_does_not_add_any_undo_entries(self):
+        self.root.rename("The Root")
+        self.item.copy()
+        self.cr.undo()
+        self.assertEqual(self.root.name, "Root")
+
+
 import time
 
 
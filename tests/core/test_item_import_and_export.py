@@ -1,11 +1,18 @@
 from __future__ import annotations
 import unittest
+import datetime
+from decimal import Decimal
+import importlib.util
 import os
+import shutil
 import sys
+import threading
+import time
 
 sys.path.insert(1, "src")
 
-from te_tree.core.item import ItemCreator
+from te_tree.core.item import ItemCreator, freeatt_child
+from te_tree.core.binary import Binary_Tree
 
 
 class Test_Setting_File_Path_For_Item_Saving_And_Loading(unittest.TestCase):
@@ -82,6 +89,275 @@ class Test_Saving_Item_As_Binary(unittest.TestCase):
         build_dir(self.DIRPATH)
         self.cr = ItemCreator()
         self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template(
+            "Item",
+            {
+                "text": self.cr.attr.text("abc"),
+                "flag": self.cr.attr.boolean(),
+                "count": self.cr.attr.integer(0),
+                "ratio": self.cr.attr.real(0),
+                "price": self.cr.attr.money(0),
+                "mass": self.cr.attr.quantity("g", exponents={"k": 3}),
+                "day": self.cr.attr.date(datetime.date(2024, 1, 1)),
+                "kind": self.cr.attr.choice(["small", "large"]),
+                "total": self.cr.attr.integer(0),
+            },
+            ("Item",),
+            dependencies=[
+                self.cr.dependency(
+                    "total",
+                    lambda x, t: x + sum(t),
+                    "count",
+                    freeatt_child("total", self.cr.attr.integer()),
+                )
+            ],
+        )
+
+    def test_saving_and_loading_values_of_all_attribute_types(self):
+        item = self.cr.from_template("Item", "Položka")
+        item.multiset(
+            {
+                "text": "Příliš <žluťoučký>",
+                "flag": True,
+                "count": -123456789012,
+                "ratio": 0.1,
+                "price": Decimal("-12.30"),
+                "mass": Decimal("2500"),
+                "day": datetime.date(2023, 8, 21),
+                "kind": "large",
+            }
+        )
+        item.attribute("mass").set_prefix("k")
+        self.cr.save(item, "bin")
+        loaded = self.cr.load(self.DIRPATH, "Položka", "bin")
+        for label, attr in item.attributes.items():
+            self.assertEqual(loaded(label), attr.value, label)
+        self.assertEqual(str(loaded("price")), "-12.30")
+        self.assertEqual(loaded.attribute("mass").prefix, "k")
+
+    def test_saving_and_loading_tree_with_dependencies(self):
+        root = self.cr.from_template("Item", "Root")
+        for i in range(3):
+            child = self.cr.from_template("Item", f"Child {i}")
+            child.set("count", i + 1)
+            root.adopt(child)
+            child.adopt(self.cr.from_template("Item", "Grandchild"))
+        child.pick_child("Grandchild").set("count", 10)
+        self.assertEqual(root("total"), 16)
+        self.cr.save(root, "bin")
+
+        loaded = self.cr.load(self.DIRPATH, "Root", "bin")
+        self.assertListEqual(loaded.child_names, ["Child 0", "Child 1", "Child 2"])
+        self.assertEqual(loaded("total"), 16)
+        loaded.pick_child("Child 0").set("count", 5)
+        self.assertEqual(loaded("total"), 20)
+
+    def test_loading_xml_file_as_binary_raises_exception(self):
+        item = self.cr.from_template("Item", "Item")
+        self.cr.save(item, "xml")
+        os.rename(
+            os.path.join(self.DIRPATH, "Item.xml"), os.path.join(self.DIRPATH, "Item.bin")
+        )
+        with self.assertRaises(Binary_Tree.NotBinaryCase):
+            self.cr.load(self.DIRPATH, "Item", "bin")
+
+    def test_loading_many_files_of_different_types(self):
+        root = self.cr.from_template("Item", "Root")
+        child = self.cr.from_template("Item", "Child")
+        child.set("count", 4)
+        root.adopt(child)
+        self.cr.save(root, "bin")
+        root.rename("Root XML")
+        self.cr.save(root, "xml")
+        root.rename("Root Indexed")
+        self.cr.save(root, "ibin")
+
+        files = [
+            (self.DIRPATH, "Root", "bin"),
+            (self.DIRPATH, "Root XML", "xml"),
+            (self.DIRPATH, "Root Indexed", "ibin"),
+        ]
+        loaded = self.cr.load_many(files, max_workers=2)
+        self.assertListEqual([item.name for item in loaded], ["Root", "Root XML", "Root Indexed"])
+        for item in loaded:
+            self.assertEqual(item("total"), 4)
+            self.assertEqual(item.pick_child("Child")("count"), 4)
+
+    def test_saving_binary_file_in_background(self):
+        item = self.cr.from_template("Item", "Item")
+        item.set("count", 7)
+        self.cr.save_in_background(item, "bin").join()
+        self.assertEqual(self.cr.load(self.DIRPATH, "Item", "bin")("count"), 7)
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+class Test_Loading_Indexed_Case_Lazily(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_11"
+
+    def setUp(self) -> None:
+        build_dir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template(
+            "Item",
+            {"count": self.cr.attr.integer(0), "total": self.cr.attr.integer(0)},
+            ("Item",),
+            dependencies=[
+                self.cr.dependency(
+                    "total",
+                    lambda x, t: x + sum(t),
+                    "count",
+                    freeatt_child("total", self.cr.attr.integer()),
+                )
+            ],
+        )
+        root = self.cr.from_template("Item", "Root")
+        for i in range(3):
+            child = self.cr.from_template("Item", f"Child {i}")
+            child.set("count", i + 1)
+            root.adopt(child)
+            grandchild = self.cr.from_template("Item", "Grandchild")
+            grandchild.set("count", 10)
+            child.adopt(grandchild)
+        self.cr.save(root, "ibin")
+
+        self.built: list[str] = list()
+        self.building_threads: set[threading.Thread] = set()
+        build = self.cr._build_indexed_item
+
+        def build_and_record(indexed, offset, parent=None):
+            item = build(indexed, offset, parent)
+            self.built.append(item.name)
+            self.building_threads.add(threading.current_thread())
+            self.indexed = indexed
+            return item
+
+        self.cr._build_indexed_item = build_and_record
+
+    def test_children_are_built_on_first_access(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        self.assertEqual(self.built, ["Root"])
+        self.assertTrue(root.has_children())
+        self.assertEqual(self.built, ["Root"])
+
+        self.assertListEqual(root.child_names, ["Child 0", "Child 1", "Child 2"])
+        self.assertEqual(self.built, ["Root", "Child 0", "Child 1", "Child 2"])
+        self.assertEqual(root.pick_child("Child 1").children[0]("count"), 10)
+        self.assertEqual(len(self.built), 5)
+
+    def test_dependent_values_are_read_from_the_file(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        self.assertEqual(root("total"), 36)
+        self.assertEqual(self.built, ["Root"])
+
+    def test_setting_attribute_of_item_with_unloaded_children(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        root.set("count", 100)
+        self.assertEqual(root("total"), 136)
+        child = root.pick_child("Child 2")
+        child.set("count", 5)
+        self.assertEqual(child("total"), 15)
+        self.assertEqual(root("total"), 138)
+        self.cr.undo()
+        self.assertEqual(root("total"), 136)
+
+    def test_saving_loaded_case_loads_all_items(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        self.cr.save(root, "ibin")
+        loaded = self.cr.load(self.DIRPATH, "Root", "ibin")
+        self.assertEqual(loaded.pick_child("Child 0").children[0]("total"), 10)
+        self.assertEqual(loaded("total"), 36)
+
+    def test_file_is_closed_after_all_items_are_built(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        indexed = self.indexed
+        for child in root.children[:2]:
+            child.children
+        self.assertFalse(indexed.closed)
+        list(root.preorder())
+        self.assertTrue(indexed.closed)
+
+    def test_replacing_file_builds_the_rest_of_loaded_items(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        other = self.cr.from_template("Item", "Root")
+        self.cr.save(other, "ibin")
+        self.assertEqual(self.built, ["Root", "Child 0", "Child 1", "Child 2"] + ["Grandchild"] * 3)
+        self.assertEqual(root.pick_child("Child 2").children[0]("count"), 10)
+
+    def test_background_save_builds_items_of_replaced_file_on_the_callers_thread(self):
+        root = self.cr.load(self.DIRPATH, "Root", "ibin")
+        other = self.cr.from_template("Item", "Root")
+        worker = self.cr.save_in_background(other, "ibin")
+        self.assertEqual(len(self.built), 7)
+        worker.join()
+        self.assertEqual(self.building_threads, {threading.current_thread()})
+        self.assertEqual(root.pick_child("Child 2").children[0]("count"), 10)
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+class Test_Compressed_Files(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_12"
+
+    def setUp(self) -> None:
+        build_dir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template("Item", {"note": self.cr.attr.text("")}, ("Item",))
+        self.root = self.cr.from_template("Item", "Root")
+        for i in range(20):
+            child = self.cr.from_template("Item", f"Child {i}")
+            child.set("note", "The same note repeated in every item.")
+            self.root.adopt(child)
+
+    def test_saving_and_loading_gzip_compressed_xml(self):
+        self.cr.save(self.root, "xml")
+        self.cr.save(self.root, "xml.gz")
+        with open(os.path.join(self.DIRPATH, "Root.xml.gz"), "rb") as file:
+            compressed = file.read()
+        self.assertTrue(compressed.startswith(b"\x1f\x8b"))
+        self.assertLess(len(compressed), os.path.getsize(os.path.join(self.DIRPATH, "Root.xml")))
+
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml.gz")
+        self.assertEqual(len(loaded.children), 20)
+        self.assertEqual(
+            loaded.pick_child("Child 7")("note"), "The same note repeated in every item."
+        )
+
+    def test_saving_and_loading_gzip_compressed_binary_file(self):
+        self.cr.save(self.root, "bin.gz")
+        loaded = self.cr.load(self.DIRPATH, "Root", "bin.gz")
+        self.assertEqual(loaded.child_names, self.root.child_names)
+
+    def test_compressed_file_is_recognized_by_its_content(self):
+        self.cr.save(self.root, "xml.gz")
+        os.rename(
+            os.path.join(self.DIRPATH, "Root.xml.gz"), os.path.join(self.DIRPATH, "Root.xml")
+        )
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(len(loaded.children), 20)
+
+    def test_saving_compressed_file_in_background_and_keeping_its_backup(self):
+        self.cr.save(self.root, "xml.gz")
+        self.root.pick_child("Child 0").set("note", "Changed")
+        self.cr.save_in_background(self.root, "xml.gz").join()
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml.gz")
+        self.assertEqual(loaded.pick_child("Child 0")("note"), "Changed")
+        self.assertEqual(len(os.listdir(os.path.join(self.DIRPATH, "backup", "Root"))), 1)
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard"), "zstandard is not installed")
+    def test_saving_and_loading_zstandard_compressed_xml(self):  # pragma: no cover
+        self.cr.save(self.root, "xml.zst")
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml.zst")
+        self.assertEqual(loaded.child_names, self.root.child_names)
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
 
 
 class Test_Loading_Item_From_XML(unittest.TestCase):
@@ -135,6 +411,16 @@ class Test_Loading_Item_From_XML(unittest.TestCase):
         self.assertEqual(item("weight"), 5)
         self.assertEqual(item("double_weight"), 10)
 
+    def test_attribute_readers_are_prepared_once_for_each_template(self):
+        item = self.cr.load(self.DIRPATH, "Item A", "xml")
+        readers = self.cr._raw_readers(item)
+        self.assertListEqual(
+            [label for label, _ in readers], ["count", "description", "weight", "double_weight"]
+        )
+        other = self.cr.load(self.DIRPATH, "Item A", "xml")
+        self.assertIs(self.cr._raw_readers(other), readers)
+        self.assertEqual(other("weight"), 5)
+
     def tearDown(self) -> None:  # pragma: no cover
         remove_dir(self.DIRPATH)
 
@@ -172,6 +458,28 @@ class Test_Saving_And_Loading_Items_With_Children(unittest.TestCase):
         self.assertFalse(loaded_child.pick_child("Grandchild A").is_null())
         self.assertFalse(loaded_child.pick_child("Grandchild B").is_null())
 
+    def test_loading_deeply_nested_items(self):
+        depth = sys.getrecursionlimit() + 100
+        with open(os.path.join(self.DIRPATH, "Deep.xml"), "w") as f:
+            f.write("".join(f'<Item name="Item {i}">' for i in range(depth)))
+            f.write(depth * "</Item>")
+
+        loaded_item = self.cr.load(self.DIRPATH, "Deep", "xml")
+        levels = 0
+        while loaded_item.has_children():
+            loaded_item = loaded_item.children[0]
+            levels += 1
+        self.assertEqual(levels, depth - 1)
+        self.assertEqual(loaded_item.name, f"Item {depth - 1}")
+
+    def test_order_of_children_is_preserved_when_saving_and_loading(self):
+        for name in ("C", "A", "D", "B"):
+            self.parent.adopt(self.cr.from_template("Item", name))
+        self.cr.save(self.parent, "xml")
+
+        loaded_parent = self.cr.load(self.DIRPATH, "Parent", "xml")
+        self.assertListEqual(loaded_parent.child_names, ["Child", "C", "A", "D", "B"])
+
     def tearDown(self) -> None:  # pragma: no cover
         remove_dir(self.DIRPATH)
 
@@ -277,6 +585,22 @@ class Test_Loading_Item_With_Attribute_Depending_On_Items_Children(unittest.Test
         self.assertEqual(loaded_child.attribute("mass").print(), f"2000{NBSP}g")
         self.assertEqual(loaded_child("mass"), 2)
 
+    def test_loading_children_with_quantities_in_different_scaled_units(self):
+        mass = self.cr.attr.quantity("kg", exponents={"k": 3, "m": -3})
+        self.cr.add_template("Item_Type", {"mass": mass}, ("Item_Type",))
+        parent = self.cr.from_template("Item_Type", "Parent")
+        for i, prefix in enumerate(("", "k", "m", "k", "")):
+            child = self.cr.from_template("Item_Type", f"Child {i}")
+            child.set("mass", i + 1)
+            child.attribute("mass").set_prefix(prefix)
+            parent.adopt(child)
+        self.cr.save(parent, "xml")
+
+        loaded_parent = self.cr.load(self.DIRPATH, name="Parent", ftype="xml")
+        for child, loaded_child in zip(parent.children, loaded_parent.children):
+            self.assertEqual(loaded_child("mass"), child("mass"))
+            self.assertEqual(loaded_child.attribute("mass").prefix, child.attribute("mass").prefix)
+
     def tearDown(self) -> None:  # pragma: no cover
         remove_dir(self.DIRPATH)
 
@@ -359,5 +683,224 @@ class Test_Saving_And_Loading_Item_With_Bound_Attribute(unittest.TestCase):
         remove_dir(self.DIRPATH)
 
 
+class Test_Building_Loaded_Items_Without_Commands(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_7"
+
+    def setUp(self) -> None:  # pragma: no cover
+        build_dir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        integer = self.cr.attr.integer()
+        self.cr.add_template(
+            "Item",
+            {
+                "x": self.cr.attr.integer(1),
+                "total": self.cr.attr.integer(0),
+                "level": self.cr.attr.integer(0),
+                "kind": self.cr.attr.choice(["a", "b"]),
+            },
+            ("Item",),
+            dependencies=[
+                self.cr.dependency(
+                    "total",
+                    lambda x, t: x + sum(t),
+                    "x",
+                    freeatt_child("total", integer),
+                ),
+                self.cr.dependency("level", lambda p: p + 1, freeatt_parent("level", integer)),
+            ],
+        )
+
+    def build_chain(self, depth: int):
+        root = self.cr.from_template("Item", "Root")
+        parent = root
+        for i in range(depth):
+            child = self.cr.from_template("Item", "Child")
+            child.set("x", i)
+            parent.adopt(child)
+            parent = child
+        return root
+
+    def test_dependent_values_are_computed_through_all_levels(self):
+        root = self.build_chain(20)
+        self.assertEqual(root("total"), 1 + sum(range(20)))
+        self.cr.save(root, "xml")
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(loaded("total"), root("total"))
+        leaf = list(loaded.preorder())[-1]
+        self.assertEqual(leaf("level"), 21)
+        leaf.set("x", 100)
+        self.assertEqual(loaded("total"), root("total") - 19 + 100)
+
+    def test_stale_dependent_values_in_file_are_recomputed(self):
+        root = self.build_chain(2)
+        self.cr.save(root, "xml")
+        filepath = os.path.join(self.DIRPATH, "Root.xml")
+        with open(filepath) as f:
+            content = f.read()
+        stale_content = content.replace('total="2"', 'total="999"')
+        self.assertNotEqual(stale_content, content)
+        with open(filepath, "w") as f:
+            f.write(stale_content)
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(loaded("total"), 2)
+
+    def test_loading_records_no_commands(self):
+        root = self.build_chain(3)
+        root.pick_child("Child").set("kind", "b")
+        self.cr.save(root, "xml")
+        while self.cr._controller.any_undo:
+            self.cr.undo()
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertFalse(self.cr._controller.any_undo)
+        self.assertEqual(loaded.pick_child("Child")("kind"), "b")
+        self.assertEqual(loaded.pick_child("Child").pick_child("Child")("x"), 1)
+
+    def test_duplicate_names_of_loaded_siblings_are_adjusted(self):
+        root = self.cr.from_template("Item", "Root")
+        root.adopt(self.cr.from_template("Item", "Child"))
+        self.cr.save(root, "xml")
+        filepath = os.path.join(self.DIRPATH, "Root.xml")
+        with open(filepath) as f:
+            content = f.read()
+        start = content.index("<Item", 1)
+        end = content.index("/>", start) + 2
+        with open(filepath, "w") as f:
+            f.write(content[:end] + content[start:end] + content[end:])
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertListEqual(loaded.child_names, ["Child", "Child (1)"])
+
+    def tearDown(self) -> None:  # pragma: no cover
+        remove_dir(self.DIRPATH)
+
+
+class Test_Saving_In_Background(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_9"
+
+    def setUp(self) -> None:  # pragma: no cover
+        build_dir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template("Item", {"x": self.cr.attr.integer(0)}, ("Item",))
+        self.root = self.cr.from_template("Item", "Root")
+        self.root.adopt(self.cr.from_template("Item", "Child"))
+        self.root.pick_child("Child").set("x", 5)
+        self.results: list = list()
+
+    def read_file(self) -> bytes:
+        with open(os.path.join(self.DIRPATH, "Root.xml"), "rb") as f:
+            return f.read()
+
+    def test_background_save_writes_the_same_file_as_save(self):
+        self.cr.save(self.root, "xml")
+        saved_content = self.read_file()
+        self.cr.save_in_background(self.root, "xml", on_done=self.results.append).join()
+        self.assertEqual(self.results, [None])
+        self.assertEqual(self.read_file(), saved_content)
+        self.assertListEqual(sorted(os.listdir(self.DIRPATH)), ["Root.xml", "backup"])
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(loaded.pick_child("Child")("x"), 5)
+
+    def test_snapshot_is_not_affected_by_later_changes(self):
+        snapshot = self.cr.snapshot(self.root)
+        self.root.pick_child("Child").set("x", 7)
+        self.root.rename("Renamed")
+        self.assertEqual(snapshot.attributes[0], ("name", "Root"))
+        self.assertIn(("x", "5"), snapshot.children[0].attributes)
+
+    def test_item_without_template_is_not_saved(self):
+        item = self.cr.new("Item")
+        with self.assertRaises(ItemCreator.NoTemplateIsAssigned):
+            self.cr.save_in_background(item, "xml")
+
+    def test_error_in_worker_thread_is_passed_to_the_callback(self):
+        shutil.rmtree(self.DIRPATH)
+        self.cr.save_in_background(self.root, "xml", on_done=self.results.append).join()
+        self.assertEqual(len(self.results), 1)
+        self.assertIsInstance(self.results[0], OSError)
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+from te_tree.core.item import Backup_Retention
+
+
+class Test_Backups(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_10"
+
+    def setUp(self) -> None:  # pragma: no cover
+        build_dir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template("Item", {"x": self.cr.attr.integer(0)})
+        self.item = self.cr.from_template("Item", "Item")
+        self.filepath = os.path.join(self.DIRPATH, "Item.xml")
+        self.backup_dir = os.path.join(self.DIRPATH, "backup", "Item")
+
+    def test_previous_version_of_file_is_kept_as_backup_without_copying(self):
+        self.cr.save(self.item, "xml")
+        with open(self.filepath, "rb") as f:
+            previous_content = f.read()
+        previous_inode = os.stat(self.filepath).st_ino
+        self.item.set("x", 5)
+        self.cr.save(self.item, "xml")
+
+        backups = os.listdir(self.backup_dir)
+        self.assertEqual(len(backups), 1)
+        backup_path = os.path.join(self.backup_dir, backups[0])
+        self.assertEqual(os.stat(backup_path).st_ino, previous_inode)
+        with open(backup_path, "rb") as f:
+            self.assertEqual(f.read(), previous_content)
+        self.assertNotEqual(os.stat(self.filepath).st_ino, previous_inode)
+        self.assertListEqual(sorted(os.listdir(self.DIRPATH)), ["Item.xml", "backup"])
+
+    def test_outdated_backups_are_removed_when_saving(self):
+        self.cr.save(self.item, "xml")
+        os.makedirs(self.backup_dir)
+        now = time.time()
+        for k in range(3):
+            path = os.path.join(self.backup_dir, f"old {k}.xml")
+            with open(path, "w") as f:
+                f.write("")
+            os.utime(path, (now - 1000 * (k + 1), now - 1000 * (k + 1)))
+        self.cr.set_backup_retention(Backup_Retention(keep_last=2))
+        self.cr.save(self.item, "xml")
+        self.assertEqual(len(os.listdir(self.backup_dir)), 2)
+        self.assertIn("old 0.xml", os.listdir(self.backup_dir))
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+class Test_Backup_Retention(unittest.TestCase):
+
+    def setUp(self) -> None:
+        hour = 3600
+        self.now = 100 * hour
+        self.backups = {f"{k} h": self.now - k * hour - 1 for k in range(48)}
+
+    def test_all_backups_are_kept_by_default(self):
+        self.assertEqual(Backup_Retention().outdated(self.backups, self.now), [])
+
+    def test_keeping_last_backups(self):
+        outdated = Backup_Retention(keep_last=5).outdated(self.backups, self.now)
+        self.assertEqual(len(outdated), 43)
+        self.assertNotIn("4 h", outdated)
+        self.assertIn("5 h", outdated)
+
+    def test_keeping_backups_within_time_period(self):
+        outdated = Backup_Retention(keep_within=10 * 3600).outdated(self.backups, self.now)
+        self.assertEqual(len(outdated), 38)
+
+    def test_thinning_older_backups(self):
+        retention = Backup_Retention(keep_last=2, keep_one_per=24 * 3600)
+        kept = set(self.backups) - set(retention.outdated(self.backups, self.now))
+        self.assertEqual(kept, {"0 h", "1 h", "4 h", "28 h"})
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
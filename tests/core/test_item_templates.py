@@ -5,6 +5,7 @@ import sys
 sys.path.insert(1, "src")
 
 from te_tree.core.item import ItemCreator, Item, Template
+from te_tree.cmd.commands import Empty_Command
 
 class Test_Adding_Item_Template(unittest.TestCase):
 
@@ -101,5 +102,62 @@ class Test_Specify_Dependency_In_Template(unittest.TestCase):
         self.assertEqual(item("y"), 10)
 
 
+class Test_Items_Of_The_Same_Template_Share_Binding_Info(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.cr.add_template(
+            "ItemTemplate",
+            {"x": self.cr.attr.integer(1), "y": self.cr.attr.integer(0)},
+            dependencies=[Template.dependency("y", lambda x: 2 * x, "x")],
+        )
+
+    def test_binding_info_is_shared_by_items_created_from_the_same_template(self):
+        item_a = self.cr.from_template("ItemTemplate", "A")
+        item_b = self.cr.from_template("ItemTemplate", "B")
+        self.assertIs(item_a._bindings, item_b._bindings)
+        item_b.set("x", 3)
+        self.assertEqual(item_a("y"), 2)
+        self.assertEqual(item_b("y"), 6)
+
+    def test_freeing_attribute_of_one_item_does_not_affect_other_items(self):
+        item_a = self.cr.from_template("ItemTemplate", "A")
+        item_b = self.cr.from_template("ItemTemplate", "B")
+        item_a.free("y")
+        self.assertNotIn("y", item_a._bindings)
+        self.assertIn("y", item_b._bindings)
+        item_b.set("x", 4)
+        self.assertEqual(item_b("y"), 8)
+
+    def test_adding_hook_to_one_item_does_not_affect_other_items(self):
+        item_a = self.cr.from_template("ItemTemplate", "A")
+        item_b = self.cr.from_template("ItemTemplate", "B")
+        item_a.on_renaming("test", lambda data: Empty_Command(), "post")
+        self.assertIn("test", item_a.command["rename"].post)
+        self.assertNotIn("test", item_b.command["rename"].post)
+
+    def test_composed_commands_are_created_on_first_use(self):
+        parent = self.cr.new("Parent")
+        child = self.cr.new("Child")
+        self.assertDictEqual(child.command, {})
+        parent.adopt(child)
+        self.assertListEqual(list(parent.command), ["adopt"])
+        self.assertDictEqual(child.command, {})
+        child.rename("Renamed")
+        self.assertEqual(child.name, "Renamed")
+        self.assertListEqual(list(child.command), ["rename"])
+        renamed: list[str] = list()
+        child.on_renaming("test", lambda data: Empty_Command(renamed.append(data.new_name)), "post")
+        child.rename("Renamed again")
+        self.assertEqual(child.name, "Renamed again")
+        self.assertListEqual(renamed, ["Renamed again"])
+        self.cr.undo()
+        self.assertEqual(child.name, "Renamed")
+        parent.leave(child)
+        self.assertListEqual(list(parent.command), ["adopt", "leave"])
+        self.cr.undo()
+        self.assertEqual(child.parent, parent)
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+import sys
+import unittest
+
+sys.path.insert(1, "src")
+
+from te_tree.core.item import ItemCreator, freeatt_child
+from te_tree.core.query import Attribute_Index, Query_Engine
+
+
+class Test_Attribute_Index(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.root = self.cr.new("Root")
+        self.items = [self.cr.new(f"Item {i}", {"x": "integer"}) for i in range(5)]
+        for i, item in enumerate(self.items):
+            item.set("x", i)
+            self.root.adopt(item)
+        self.index = Attribute_Index(self.root, "x")
+
+    def names(self, items) -> set[str]:
+        return {item.name for item in items}
+
+    def test_selecting_items(self):
+        self.assertEqual(self.names(self.index.select("==", 2)), {"Item 2"})
+        self.assertEqual(self.names(self.index.select("<", 2)), {"Item 0", "Item 1"})
+        self.assertEqual(self.names(self.index.select("<=", 1)), {"Item 0", "Item 1"})
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4"})
+        self.assertEqual(self.names(self.index.select(">=", 3)), {"Item 3", "Item 4"})
+        self.assertEqual(len(self.index.select("!=", 3)), 4)
+
+    def test_index_follows_setting_the_attribute(self):
+        self.items[0].set("x", 10)
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 0", "Item 4"})
+        self.cr.undo()
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4"})
+
+    def test_index_follows_adopting_and_leaving_items(self):
+        new_item = self.cr.new("New", {"x": "integer"})
+        new_item.set("x", 7)
+        self.items[0].adopt(new_item)
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4", "New"})
+        self.root.leave(self.items[0])
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4"})
+        self.cr.undo()
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4", "New"})
+        new_item.set("x", 0)
+        self.assertEqual(self.names(self.index.select("==", 0)), {"Item 0", "New"})
+
+    def test_index_follows_dependent_attributes(self):
+        self.root.leave(*self.items)
+        parent = self.cr.new("Parent", {"x": "integer"})
+        parent.bind("x", lambda x: sum(x), freeatt_child("x", self.cr.attr.integer(0)))
+        self.root.adopt(parent)
+        parent.adopt(self.items[4])
+        self.assertEqual(self.names(self.index.select("==", 4)), {"Parent", "Item 4"})
+        self.items[4].set("x", 6)
+        self.assertEqual(self.names(self.index.select("==", 6)), {"Parent", "Item 4"})
+
+    def test_values_of_different_types_are_compared_only_with_values_of_their_type(self):
+        texts = [self.cr.new(f"Text {i}", {"x": "text"}) for i in range(2)]
+        for i, item in enumerate(texts):
+            item.set("x", f"value {i}")
+            self.root.adopt(item)
+        real = self.cr.new("Real", {"x": "real"})
+        real.set("x", 2.5)
+        self.root.adopt(real)
+        self.assertEqual(self.names(self.index.select(">", 2)), {"Item 3", "Item 4", "Real"})
+        self.assertEqual(self.names(self.index.select("<", "value 1")), {"Text 0"})
+        self.assertEqual(self.names(self.index.select("==", "value 1")), {"Text 1"})
+        self.root.leave(real, *texts)
+        self.assertEqual(self.names(self.index.select(">", 3)), {"Item 4"})
+
+    def test_stopped_index_is_no_longer_updated(self):
+        self.index.stop()
+        self.assertEqual(len(self.index), 0)
+        self.items[0].set("x", 10)
+        self.assertEqual(self.index.select(">", 3), [])
+
+
+class Test_Query_Engine(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.cr.add_template("Item", {"price": self.cr.attr.integer(0)})
+        self.cr.add_template("Group", {"price": self.cr.attr.integer(0)}, ("Item",))
+        self.cr.add_template("Note", {"price": self.cr.attr.text("")})
+        self.cr.add_template("Root", {}, ("Group", "Item", "Note"))
+        self.root = self.cr.from_template("Root")
+        self.group = self.cr.from_template("Group", "Group")
+        self.root.adopt(self.group)
+        self.group.set("price", 500)
+        for price in (50, 150, 250):
+            item = self.cr.from_template("Item", f"Item {price}")
+            item.set("price", price)
+            self.group.adopt(item)
+        self.single = self.cr.from_template("Item", "Single")
+        self.single.set("price", 120)
+        self.root.adopt(self.single)
+        self.query = Query_Engine(self.root)
+
+    def names(self, items) -> set[str]:
+        return {item.name for item in items}
+
+    def test_query_without_indexes(self):
+        result = self.query(("price", ">", 100), itype="Item")
+        self.assertEqual(self.names(result), {"Item 150", "Item 250", "Single"})
+
+    def test_query_with_index_gives_the_same_result(self):
+        self.query.add_index("price")
+        self.assertEqual(self.query.indexed_labels, ("price",))
+        result = self.query(("price", ">", 100), ("price", "<", 300), itype="Item")
+        self.assertEqual(self.names(result), {"Item 150", "Item 250", "Single"})
+        result = self.query(("price", ">", 100))
+        self.assertEqual(self.names(result), {"Group", "Item 150", "Item 250", "Single"})
+
+    def test_query_limited_to_descendants_of_given_item(self):
+        for indexed in (False, True):
+            if indexed:
+                self.query.add_index("price")
+            result = self.query(("price", ">", 100), scope=self.group)
+            self.assertEqual(self.names(result), {"Group", "Item 150", "Item 250"})
+
+    def test_query_by_name(self):
+        self.query.add_index("name")
+        self.assertEqual(self.names(self.query(("name", "==", "Single"))), {"Single"})
+        self.single.rename("Other")
+        self.assertEqual(self.query(("name", "==", "Single")), [])
+
+    def test_query_on_attribute_of_different_types(self):
+        note = self.cr.from_template("Note", "Note")
+        note.set("price", "cheap")
+        self.root.adopt(note)
+        for indexed in (False, True):
+            if indexed:
+                self.query.add_index("price")
+            result = self.query(("price", ">", 200))
+            self.assertEqual(self.names(result), {"Group", "Item 250"})
+            self.assertEqual(self.names(self.query(("price", "==", "cheap"))), {"Note"})
+
+    def test_unknown_comparison_raises_exception(self):
+        with self.assertRaises(Query_Engine.UnknownComparison):
+            self.query(("price", "~", 100))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,222 @@
+from __future__ import annotations
+import datetime
+from decimal import Decimal
+import os
+import shutil
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(1, "src")
+
+from te_tree.core.editor import blank_case_template, new_editor, freeatt_child
+from te_tree.core.sqlite_store import SQLite_Store
+
+
+class Test_Storing_Cases_In_SQLite_Database(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_16"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        self.filepath = os.path.join(self.DIRPATH, "cases.db")
+        case_template = blank_case_template()
+        attr = case_template.attr
+        total = case_template.dependency(
+            "total", lambda x: sum(x), freeatt_child("price", attr.money(Decimal(0)))
+        )
+        case_template.add(
+            "Group",
+            {"total": attr.money(Decimal(0)), "kind": attr.choice(["small", "large"])},
+            ("Group", "Item"),
+            dependencies=[total],
+        )
+        case_template.add(
+            "Item",
+            {
+                "price": attr.money(Decimal(0)),
+                "mass": attr.quantity("g", exponents={"k": 3}),
+                "day": attr.date(datetime.date(2024, 1, 1)),
+                "done": attr.boolean(),
+            },
+        )
+        case_template.add_case_child_label("Group")
+        self.case_template = case_template
+        self.editor = new_editor(case_template)
+        self.editor.use_store(self.filepath)
+        self.case = self.editor.new_case("Case")
+        self.group = self.editor.new(self.case, "Group", "Group")
+        self.group.set("kind", "large")
+        for i in range(3):
+            item = self.editor.new(self.group, "Item", f"Item {i}")
+            item.multiset(
+                {
+                    "price": Decimal(f"1{i}.50"),
+                    "day": datetime.date(2023, 8, 21 + i),
+                    "done": i % 2 == 0,
+                }
+            )
+        self.group.pick_child("Item 1").attribute("mass").set_prefix("k")
+        self.group.pick_child("Item 1").set("mass", Decimal("2.5"))
+        self.editor.store_case(self.case)
+
+    def reopened(self):
+        self.editor.close_store()
+        editor = new_editor(self.case_template)
+        editor.use_store(self.filepath)
+        return editor
+
+    def rows(self, table: str) -> int:
+        with sqlite3.connect(self.filepath) as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_stored_case_is_loaded_back(self):
+        editor = self.reopened()
+        self.assertListEqual(editor.stored_case_names(), ["Case"])
+        case = editor.load_case_from_store("Case")
+        self.assertTrue(editor.root.is_parent_of(case))
+        group = case.pick_child("Group")
+        self.assertEqual(group("kind"), "large")
+        self.assertEqual(group("total"), Decimal("34.50"))
+        self.assertListEqual(group.child_names, self.group.child_names)
+        item = group.pick_child("Item 1")
+        self.assertEqual(item("day"), datetime.date(2023, 8, 22))
+        self.assertFalse(item("done"))
+        self.assertEqual(item.attribute("mass").prefix, "k")
+        self.assertEqual(item("mass"), self.group.pick_child("Item 1")("mass"))
+        editor.close_store()
+
+    def test_changes_are_committed_after_each_command(self):
+        self.group.pick_child("Item 0").set("price", Decimal("20.50"))
+        self.editor.new(self.group, "Item", "Item 3")
+        self.editor.remove(self.group.pick_child("Item 2"), self.group)
+        self.group.rename("Renamed group")
+        self.assertEqual(self.rows("items"), 5)
+
+        case = self.reopened().load_case_from_store("Case")
+        group = case.pick_child("Renamed group")
+        self.assertListEqual(group.child_names, ["Item 0", "Item 1", "Item 3"])
+        self.assertEqual(group("total"), Decimal("32.00"))
+
+    def test_undone_changes_are_committed(self):
+        self.editor.remove(self.group.pick_child("Item 2"), self.group)
+        self.editor.undo()
+        self.assertEqual(self.rows("items"), 5)
+        case = self.reopened().load_case_from_store("Case")
+        self.assertListEqual(case.pick_child("Group").child_names, self.group.child_names)
+
+    def test_sorted_children_are_stored_in_the_new_order(self):
+        self.group.sort_children(reverse=True)
+        case = self.reopened().load_case_from_store("Case")
+        self.assertListEqual(case.pick_child("Group").child_names, ["Item 2", "Item 1", "Item 0"])
+
+    def test_only_changed_items_are_written(self):
+        other_group = self.editor.new(self.case, "Group", "Other group")
+        other_item = self.editor.new(other_group, "Item", "Other item")
+        store: SQLite_Store = self.editor._store
+        written = list()
+        original_write = store._write
+        store._write = lambda item: (written.append(item), original_write(item))
+        self.group.pick_child("Item 0").set("price", Decimal("1.00"))
+        self.assertIn(self.group.pick_child("Item 0"), written)
+        self.assertIn(self.group, written)
+        self.assertNotIn(self.case, written)
+        self.assertNotIn(other_group, written)
+        self.assertNotIn(other_item, written)
+
+    def test_setting_the_written_value_again_writes_nothing(self):
+        store: SQLite_Store = self.editor._store
+        written = list()
+        original_write = store._write
+        store._write = lambda item: (written.append(item), original_write(item))
+        self.group.pick_child("Item 0").set("price", Decimal("10.50"))
+        self.assertListEqual(written, [])
+
+    def test_loaded_case_keeps_the_positions_after_leaving_child(self):
+        editor = self.reopened()
+        group = editor.load_case_from_store("Case").pick_child("Group")
+        editor.remove(group.pick_child("Item 0"), group)
+        editor.close_store()
+        editor = new_editor(self.case_template)
+        editor.use_store(self.filepath)
+        group = editor.load_case_from_store("Case").pick_child("Group")
+        self.assertListEqual(group.child_names, ["Item 1", "Item 2"])
+        editor.close_store()
+
+    def test_single_case_is_loaded_from_shared_store(self):
+        other = self.editor.new_case("Other")
+        self.editor.store_case(other)
+        editor = self.reopened()
+        self.assertListEqual(editor.stored_case_names(), ["Case", "Other"])
+        loaded = editor.load_case_from_store("Other")
+        self.assertListEqual(loaded.child_names, [])
+        self.assertEqual(editor.ncases, 1)
+
+    def test_loading_case_not_in_store_raises_exception(self):
+        with self.assertRaises(SQLite_Store.CaseNotStored):
+            self.editor.load_case_from_store("Nonexistent")
+
+    def tearDown(self) -> None:  # pragma: no cover
+        self.editor.close_store()
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+class Test_Storing_Item_With_Many_Children(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_17"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        case_template = blank_case_template()
+        attr = case_template.attr
+        total = case_template.dependency(
+            "total", lambda x: sum(x), freeatt_child("price", attr.integer(0))
+        )
+        case_template.add("Group", {"total": attr.integer(0)}, ("Item",), dependencies=[total])
+        case_template.add("Item", {"price": attr.integer(0), "note": attr.text("")})
+        case_template.add_case_child_label("Group")
+        self.editor = new_editor(case_template)
+        self.editor.use_store(os.path.join(self.DIRPATH, "cases.db"))
+        self.case = self.editor.new_case("Case")
+        self.group = self.editor.new(self.case, "Group", "Group")
+        creator = self.editor._creator
+        self.group.adopt_many(*(creator.from_template("Item", f"Item {i}") for i in range(500)))
+        self.editor.store_case(self.case)
+        self.connection: sqlite3.Connection = self.editor._store._connection
+
+    def changed_rows(self, action) -> int:
+        changes = self.connection.total_changes
+        action()
+        return self.connection.total_changes - changes
+
+    def positions(self) -> list[int]:
+        return [
+            position
+            for (position,) in self.connection.execute(
+                "SELECT position FROM items WHERE parent = ? ORDER BY position",
+                (self.editor._store._ids[self.group],),
+            )
+        ]
+
+    def test_adopting_last_child_does_not_write_its_siblings(self):
+        self.assertLess(self.changed_rows(lambda: self.editor.new(self.group, "Item")), 10)
+        self.assertListEqual(self.positions(), list(range(501)))
+
+    def test_setting_child_does_not_write_its_siblings(self):
+        item = self.group.children[250]
+        self.assertEqual(self.changed_rows(lambda: item.set("price", 5)), 4)
+
+    def test_leaving_child_renumbers_only_the_following_siblings(self):
+        item = self.group.children[400]
+        self.assertLess(self.changed_rows(lambda: self.group.leave(item)), 110)
+        self.assertListEqual(self.positions(), list(range(499)))
+        self.editor.undo()
+        self.assertListEqual(self.positions(), list(range(500)))
+
+    def tearDown(self) -> None:  # pragma: no cover
+        self.editor.close_store()
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import csv
+import datetime
+from decimal import Decimal
+import importlib.util
+import os
+import shutil
+import sys
+import unittest
+
+sys.path.insert(1, "src")
+
+from te_tree.core.editor import Editor, Item, blank_case_template, new_editor, freeatt_child
+from te_tree.core.table import Item_Table
+
+
+class Test_Exporting_And_Importing_Item_Tables(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_15"
+
+    def setUp(self) -> None:
+        os.mkdir(self.DIRPATH)
+        case_template = blank_case_template()
+        attr = case_template.attr
+        total = case_template.dependency(
+            "total", lambda x: sum(x), freeatt_child("price", attr.money(Decimal(0)))
+        )
+        case_template.add(
+            "Group",
+            {"total": attr.money(Decimal(0)), "kind": attr.choice(["small", "large"])},
+            ("Group", "Item"),
+            dependencies=[total],
+        )
+        case_template.add(
+            "Item",
+            {
+                "price": attr.money(Decimal(0)),
+                "count": attr.integer(0),
+                "mass": attr.quantity("g", exponents={"k": 3}),
+                "day": attr.date(datetime.date(2024, 1, 1)),
+                "done": attr.boolean(),
+            },
+        )
+        case_template.add_case_child_label("Group")
+        self.editor = new_editor(case_template)
+        self.case = self.editor.new_case("Case")
+        self.group = self.editor.new(self.case, "Group", "Group")
+        self.group.set("kind", "large")
+        for i in range(3):
+            item = self.editor.new(self.group, "Item", f"Item, \"{i}\"")
+            item.multiset(
+                {
+                    "price": Decimal(f"1{i}.50"),
+                    "count": i,
+                    "mass": Decimal("250"),
+                    "day": datetime.date(2023, 8, 21 + i),
+                    "done": i % 2 == 0,
+                }
+            )
+        self.subgroup = self.editor.new(self.group, "Group", "Subgroup")
+        mass = self.group.pick_child('Item, "1"').attribute("mass")
+        mass.set_prefix("k")
+        mass.set(Decimal("2.5"))
+
+    def test_rows_contain_typed_values_in_preorder(self):
+        table = Item_Table({"price": "money", "count": "integer", "total": "money"})
+        rows = list(table.rows(self.group))
+        self.assertListEqual(table.columns[:5], ["id", "parent", "path", "itype", "name"])
+        self.assertListEqual(
+            rows[0], [0, None, "Group", "Group", "Group", None, None, Decimal("34.50")]
+        )
+        self.assertListEqual(
+            rows[2], [2, 0, 'Group/Item, "1"', "Item", 'Item, "1"', Decimal("11.50"), 1, None]
+        )
+        self.assertEqual(rows[-1][2], "Group/Subgroup")
+
+    def test_exported_csv_is_imported_back(self):
+        filepath = os.path.join(self.DIRPATH, "table.csv")
+        self.editor.export_table(filepath, self.group)
+        with open(filepath, newline="", encoding="utf-8") as file:
+            self.assertEqual(len(list(csv.reader(file))), 6)
+
+        other_case = self.editor.new_case("Other")
+        imported = self.editor.import_table(other_case, filepath)
+        self.assertEqual(len(imported), 1)
+        group = imported[0]
+        self.assertTrue(other_case.is_parent_of(group))
+        self.assertEqual(group("kind"), "large")
+        self.assertEqual(group("total"), Decimal("34.50"))
+        self.assertListEqual(group.child_names, self.group.child_names)
+        for original, copy in zip(self.group.children, group.children):
+            for label, attr in original.attributes.items():
+                self.assertEqual(copy(label), attr.value, label)
+
+        group.pick_child('Item, "0"').set("price", Decimal("20.50"))
+        self.assertEqual(group("total"), Decimal("44.50"))
+        self.editor.undo()
+        self.editor.undo()
+        self.assertFalse(other_case.is_parent_of(group))
+
+    def test_quantity_is_exported_with_its_unit_and_prefix(self):
+        table = Item_Table({"mass": "quantity"})
+        self.assertListEqual(table.columns[5:], ["mass", "mass.unit", "mass.prefix"])
+        self.assertListEqual(list(table.rows(self.group))[2][5:], [Decimal("2.5"), "g", "k"])
+
+        filepath = os.path.join(self.DIRPATH, "table.csv")
+        self.editor.export_table(filepath, self.group)
+        group = self.editor.import_table(self.case, filepath)[0]
+        for name in ('Item, "0"', 'Item, "1"'):
+            original, copy = self.group.pick_child(name), group.pick_child(name)
+            self.assertEqual(copy.attribute("mass").prefix, original.attribute("mass").prefix)
+            self.assertEqual(copy("mass"), original("mass"))
+
+    def test_items_refused_by_parent_are_not_imported(self):
+        filepath = os.path.join(self.DIRPATH, "table.csv")
+        self.editor.export_table(filepath, self.group)
+        item = self.group.pick_child('Item, "0"')
+        with self.assertRaises(Editor.InvalidChildTypeUnderGivenParent):
+            self.editor.import_table(item, filepath)
+        self.assertFalse(item.has_children())
+        # the commands run after the failed import are undone separately
+        other = self.editor.new(self.case, "Group", "Other group")
+        self.editor.undo()
+        self.assertFalse(self.case.is_parent_of(other))
+
+    def test_table_with_child_refused_by_its_parent_row_is_not_imported(self):
+        filepath = os.path.join(self.DIRPATH, "table.csv")
+        table = Item_Table({})
+        with open(filepath, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(table.columns)
+            writer.writerow([0, "", "Item", "Item", "Item"])
+            writer.writerow([1, 0, "Item/Group", "Group", "Group"])
+        with self.assertRaises(Item.CannotAdoptItemOfType):
+            self.editor.import_table(self.group, filepath)
+        self.assertEqual(len(self.group.children), 4)
+
+    def test_selection_is_exported_without_items_given(self):
+        filepath = os.path.join(self.DIRPATH, "table.csv")
+        self.editor.select(self.subgroup)
+        self.editor.export_table(filepath)
+        with open(filepath, newline="", encoding="utf-8") as file:
+            self.assertEqual(len(list(csv.reader(file))), 2)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_exported_parquet_is_imported_back(self):  # pragma: no cover
+        filepath = os.path.join(self.DIRPATH, "table.parquet")
+        self.editor.export_table(filepath, self.group)
+        group = self.editor.import_table(self.case, filepath)[0]
+        self.assertEqual(group("total"), Decimal("34.50"))
+        self.assertEqual(group.pick_child('Item, "2"')("day"), datetime.date(2023, 8, 23))
+        mass = group.pick_child('Item, "1"').attribute("mass")
+        self.assertEqual((mass.value, mass.prefix), (Decimal("2.5"), "k"))
+        self.assertEqual(group.pick_child('Item, "0"')("price"), Decimal("10.50"))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_numbers_are_exported_to_parquet_as_decimals(self):  # pragma: no cover
+        import pyarrow.parquet as pq
+
+        filepath = os.path.join(self.DIRPATH, "table.parquet")
+        self.editor.export_table(filepath, self.group)
+        schema = pq.read_schema(filepath)
+        for label in ("total", "price", "mass"):
+            self.assertEqual(str(schema.field(label).type), "decimal128(38, 10)")
+        self.assertEqual(str(schema.field("mass.unit").type), "string")
+
+    def tearDown(self) -> None:  # pragma: no cover
+        shutil.rmtree(self.DIRPATH, ignore_errors=True)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
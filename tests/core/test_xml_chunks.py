@@ -0,0 +1,191 @@
+from __future__ import annotations
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(1, "src")
+
+from te_tree.core.item import ItemCreator, freeatt_child
+from te_tree.core.xml_chunks import Xml_Chunk_Cache
+
+
+class Test_Xml_Chunk_Cache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.cr.add_template("Item", {"x": self.cr.attr.integer(0)}, ("Item",))
+        self.root = self.cr.from_template("Item", "Root")
+        self.group = self.cr.from_template("Item", "Group")
+        self.root.adopt(self.group)
+        for i in range(3):
+            self.group.adopt(self.cr.from_template("Item", f"Item {i}"))
+        self.root.adopt(self.cr.from_template("Item", "Single"))
+        self.serialized: list[str] = list()
+
+        def element(item):
+            self.serialized.append(item.name)
+            return self.cr._xml_element(item)
+
+        self.cache = Xml_Chunk_Cache(self.root, element, lambda: self.cr._attrfac.locale_code)
+
+    def full_xml(self) -> bytes:
+        buffer = io.BytesIO()
+        self.cr._write_xml(buffer, self.root)
+        return buffer.getvalue()
+
+    def test_serialized_tree_matches_the_full_save(self):
+        self.group.pick_child("Item 1").rename("Položka <1>")
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+
+    def test_only_the_changed_item_is_serialized_again(self):
+        self.cache.serialize()
+        self.assertEqual(len(self.serialized), 6)
+        self.serialized.clear()
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertEqual(self.serialized, [])
+
+        self.group.pick_child("Item 2").set("x", 5)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertListEqual(self.serialized, ["Item 2"])
+
+    def test_only_the_moved_item_is_serialized_again(self):
+        self.cache.serialize()
+        self.serialized.clear()
+        self.root.adopt(self.group.pick_child("Item 1"))
+        self.group.sort_children(reverse=True)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertListEqual(self.serialized, ["Item 1"])
+
+    def test_siblings_of_item_summed_by_parent_are_not_serialized_again(self):
+        self.group.bind("x", lambda x: sum(x), freeatt_child("x", self.cr.attr.integer(0)))
+        self.cache.serialize()
+        self.serialized.clear()
+        self.group.pick_child("Item 0").set("x", 2)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertCountEqual(self.serialized, ["Item 0", "Group"])
+
+    def test_unchanged_subtrees_are_reused_without_walking_them(self):
+        self.cache.serialize()
+        group_xml = self.cache._subtrees[self.group][1]
+        single = self.root.pick_child("Single")
+        single.adopt(self.cr.from_template("Item", "Nested"))
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertIs(self.cache._subtrees[self.group][1], group_xml)
+        self.assertNotIn(self.root, self.cache._subtrees.keys() - {self.root})
+        self.assertIn(group_xml, self.cache.serialize())
+
+    def test_moved_item_is_indented_for_its_new_depth(self):
+        self.cache.serialize()
+        item = self.group.pick_child("Item 0")
+        item.adopt(self.cr.from_template("Item", "Nested"))
+        self.root.pick_child("Single").adopt(self.group)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.cr.undo()
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertEqual(self.cache._subtrees[item][0], 2)
+
+    def test_changing_the_context_drops_all_chunks(self):
+        self.cache.serialize()
+        self.serialized.clear()
+        self.cr._attrfac.locale_code = "cs_cz"
+        self.cache.serialize()
+        self.assertEqual(len(self.serialized), 6)
+
+    def test_renaming_adopting_and_leaving_items_is_tracked(self):
+        self.cache.serialize()
+        self.group.pick_child("Item 0").rename("Renamed")
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        single = self.root.pick_child("Single")
+        self.group.pick_child("Renamed").adopt(single)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.group.leave(self.group.pick_child("Renamed"))
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.cr.undo()
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+
+    def test_sorting_children_is_tracked(self):
+        self.cache.serialize()
+        self.group.sort_children(reverse=True)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.cr.undo()
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+
+    def test_items_with_formal_children_are_always_serialized(self):
+        formal_child = self.cr.from_template("Item", "Formal")
+        self.group.adopt_formally(formal_child)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        formal_child.set("x", 3)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertIn(b'name="Formal" x="3"', self.cache.serialize())
+
+    def test_adopting_and_leaving_formal_child_of_cached_item_is_tracked(self):
+        self.cache.serialize()
+        formal_child = self.cr.from_template("Item", "Formal")
+        self.group.pick_child("Item 0").adopt_formally(formal_child)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.group.pick_child("Item 0").leave_formal_child(formal_child)
+        self.assertEqual(self.cache.serialize(), self.full_xml())
+        self.assertNotIn(b"Formal", self.cache.serialize())
+
+
+class Test_Incremental_Save(unittest.TestCase):
+
+    DIRPATH = "./__test_dir_8"
+
+    def setUp(self) -> None:  # pragma: no cover
+        os.mkdir(self.DIRPATH)
+        self.cr = ItemCreator()
+        self.cr.set_dir_path(self.DIRPATH)
+        self.cr.add_template("Item", {"x": self.cr.attr.integer(0)}, ("Item",))
+
+    def test_incremental_save_writes_the_same_file_as_full_save(self):
+        root = self.cr.from_template("Item", "Root")
+        root.adopt(self.cr.from_template("Item", "Child"))
+        filepath = os.path.join(self.DIRPATH, "Root.xml")
+        for k in range(3):
+            root.pick_child("Child").set("x", k)
+            self.cr.save(root, "xml", incremental=True)
+            with open(filepath, "rb") as f:
+                incremental_content = f.read()
+            self.cr.save(root, "xml")
+            with open(filepath, "rb") as f:
+                self.assertEqual(incremental_content, f.read())
+
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml")
+        self.assertEqual(loaded.pick_child("Child")("x"), 2)
+        self.cr.forget_saved_changes(root)
+
+    def test_incremental_save_is_streamed_through_the_compressor(self):
+        root = self.cr.from_template("Item", "Root")
+        root.adopt(self.cr.from_template("Item", "Child"))
+        self.cr.save(root, "xml.gz", incremental=True)
+        loaded = self.cr.load(self.DIRPATH, "Root", "xml.gz")
+        self.assertListEqual(loaded.child_names, ["Child"])
+        self.cr.forget_saved_changes(root)
+
+    def test_failed_incremental_save_keeps_the_previous_file(self):
+        root = self.cr.from_template("Item", "Root")
+        self.cr.save(root, "xml", incremental=True)
+        filepath = os.path.join(self.DIRPATH, "Root.xml")
+        with open(filepath, "rb") as f:
+            saved = f.read()
+        root.adopt_formally(self.cr.new("Item without template"))
+        with self.assertRaises(ItemCreator.NoTemplateIsAssigned):
+            self.cr.save(root, "xml", incremental=True)
+        with open(filepath, "rb") as f:
+            self.assertEqual(f.read(), saved)
+        self.assertFalse(os.path.isfile(filepath + ".tmp"))
+        self.cr.forget_saved_changes(root)
+
+    def tearDown(self) -> None:  # pragma: no cover
+        for root, dirs, files in os.walk(self.DIRPATH, topdown=False):
+            for f in files:
+                os.remove(os.path.join(root, f))
+            for d in dirs:
+                os.rmdir(os.path.join(root, d))
+        os.rmdir(self.DIRPATH)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
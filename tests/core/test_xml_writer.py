@@ -0,0 +1,40 @@
+from __future__ import annotations
+import io
+import sys
+import unittest
+import xml.etree.ElementTree as et
+
+sys.path.insert(1, "src")
+
+from te_tree.core.xml_writer import write_xml
+
+
+class Test_Writing_XML(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.root = et.Element("Root", {"name": "Root"})
+        group = et.SubElement(self.root, "Group", {"name": 'A "quoted" <group> & co.'})
+        for i in range(3):
+            et.SubElement(group, "Item", {"name": f"Položka {i}", "note": "line\n\tindented"})
+        et.SubElement(self.root, "Item", {"name": "Single"})
+
+    def written(self, indent: str | None = "\t") -> bytes:
+        file = io.BytesIO()
+        write_xml(file, self.root, lambda e: (e.tag, e.attrib), list, indent)
+        return file.getvalue()
+
+    def test_output_matches_the_indented_element_tree(self):
+        content = self.written()
+        et.indent(self.root, space="\t")
+        self.assertEqual(content, et.tostring(self.root, encoding="UTF-8"))
+
+    def test_output_without_indent_matches_the_element_tree(self):
+        self.assertEqual(self.written(None), et.tostring(self.root, encoding="UTF-8"))
+
+    def test_single_element(self):
+        self.root = et.Element("Item", {"x": "1"})
+        self.assertEqual(self.written(), b'<Item x="1" />')
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
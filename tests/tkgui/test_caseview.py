@@ -78,6 +78,59 @@ class Test_View_For_Item_Manipulations(unittest.TestCase):
         self.assertEqual(self.caseview.widget.item(child.id)["text"], "Child")
 
 
+class Test_Inserting_Children_Lazily(unittest.TestCase):
+
+    def setUp(self):
+        root = tk.Tk()
+        self.cr = ItemCreator()
+        self.root_item = self.cr.new("Root item")
+        self.caseview = Case_View_Tk(root, self.root_item)
+        self.parent = self.cr.new("Parent")
+        for i in range(3):
+            child = self.cr.new(f"Child {i}")
+            child.adopt(self.cr.new(f"Grandchild {i}"))
+            self.parent.adopt(child)
+        self.root_item.adopt(self.parent)
+
+    def test_children_of_unopened_item_are_not_inserted(self):
+        self.assertEqual(len(self.caseview.widget.get_children(self.parent.id)), 1)
+        self.assertFalse(self.caseview.is_in_view(self.parent.children[0].id))
+
+    def test_children_are_inserted_when_item_is_opened(self):
+        self.caseview._load_children(self.parent.id)
+        self.assertEqual(
+            self.caseview.widget.get_children(self.parent.id),
+            tuple(child.id for child in self.parent.children),
+        )
+        child = self.parent.children[0]
+        self.assertEqual(len(self.caseview.widget.get_children(child.id)), 1)
+        self.assertFalse(self.caseview.is_in_view(child.children[0].id))
+
+    def test_renaming_not_inserted_item_has_no_effect_on_view(self):
+        child = self.parent.children[0]
+        child.rename("Renamed")
+        self.caseview._load_children(self.parent.id)
+        self.assertEqual(self.caseview.widget.item(child.id)["text"], "Renamed")
+
+    def test_opened_item_keeps_its_children_after_undoing_its_removal(self):
+        self.caseview._load_children(self.parent.id)
+        self.root_item.leave(self.parent)
+        self.cr.undo()
+        self.assertTrue(self.caseview.is_in_view(self.parent.children[0].id))
+
+    def test_sorting_children_moves_their_rows(self):
+        self.caseview._load_children(self.parent.id)
+        self.parent.sort_children(reverse=True)
+        self.assertEqual(
+            self.caseview.widget.get_children(self.parent.id),
+            tuple(child.id for child in self.parent.children),
+        )
+        self.cr.undo()
+        self.assertEqual(
+            self.caseview.widget.get_children(self.parent.id)[0], self.parent.children[0].id
+        )
+
+
 class Test_View_For_Item_Attribute_Manipulations(unittest.TestCase):
 
     def setUp(self):
@@ -105,6 +158,7 @@ class Test_View_For_Item_Attribute_Manipulations(unittest.TestCase):
         self.root_item.adopt(child)
         self.assertEqual(self.caseview.widget.item(child.id)["values"], [7, ""])
         child.set("y", 9)
+        self.caseview.widget.update_idletasks()
         self.assertEqual(self.caseview.widget.item(child.id)["values"], [9, ""])
 
     def test_setting_attributes_not_included_in_caseview_has_no_effect(self):
@@ -112,6 +166,7 @@ class Test_View_For_Item_Attribute_Manipulations(unittest.TestCase):
         self.root_item.adopt(child)
         child.set("y", 4)
         child.set("z", 8)
+        self.caseview.widget.update_idletasks()
         self.assertEqual(self.caseview.widget.item(child.id)["values"], [4, ""])
 
     def test_displayed_values_of_dependent_attributes_are_automatically_updated(self):
@@ -120,8 +175,31 @@ class Test_View_For_Item_Attribute_Manipulations(unittest.TestCase):
         child.set("x", 0)
         child.bind("y", lambda x: 2 * x, "x")
         child.set("x", 3)
+        self.caseview.widget.update_idletasks()
         self.assertEqual(self.caseview.widget.item(child.id)["values"], [6, ""])
 
+    def test_displayed_values_are_refreshed_once_the_tk_is_idle(self):
+        child = self.cr.new("Child", {"y": "integer"})
+        self.root_item.adopt(child)
+        for y in range(5):
+            child.set("y", y)
+        self.assertEqual(self.caseview.widget.item(child.id)["values"], [0, ""])
+        self.caseview.widget.update_idletasks()
+        self.assertEqual(self.caseview.widget.item(child.id)["values"], [4, ""])
+
+    def test_rows_under_closed_item_are_refreshed_after_it_is_opened(self):
+        parent = self.cr.new("Parent", {"y": "integer"})
+        self.root_item.adopt(parent)
+        child = self.cr.new("Child", {"y": "integer"})
+        parent.adopt(child)
+        child.set("y", 2)
+        self.caseview.widget.update_idletasks()
+        self.assertEqual(self.caseview.widget.item(child.id)["values"], [0, ""])
+        self.caseview.widget.item(parent.id, open=True)
+        self.caseview._schedule_refresh()
+        self.caseview.widget.update_idletasks()
+        self.assertEqual(self.caseview.widget.item(child.id)["values"], [2, ""])
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,328 @@
+from __future__ import annotations
+import sys
+import tkinter.font as tkfont
+import tkinter.ttk as ttk
+import unittest
+from unittest import mock
+
+sys.path.insert(1, "src")
+
+from te_tree.tkgui.virtual import Virtual_Case_View_Tk, Virtual_Tree
+from te_tree.core.item import ItemCreator
+
+
+class Test_Rows_Of_Virtual_Tree(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.root = self.cr.new("Root")
+        self.changes = 0
+        for i in range(3):
+            parent = self.cr.new(f"P{i}", {"x": "integer"})
+            parent.set("x", 3 - i)
+            for j in range(4):
+                child = self.cr.new(f"P{i}C{j}")
+                child.adopt(self.cr.new(f"P{i}C{j}G"))
+                parent.adopt(child)
+            self.root.adopt(parent)
+        self.tree = Virtual_Tree(self.root, on_change=self.count_change)
+
+    def count_change(self) -> None:
+        self.changes += 1
+
+    def names(self, first: int = 0, count: int = 100) -> list[str]:
+        return [item.name for item, _ in self.tree.rows(first, count)]
+
+    def test_only_children_of_root_are_shown_initially(self):
+        self.assertEqual(self.tree.row_count, 3)
+        self.assertListEqual(self.names(), ["P0", "P1", "P2"])
+
+    def test_opening_item_shows_its_children(self):
+        self.tree.open(self.root.pick_child("P1"))
+        self.assertEqual(self.tree.row_count, 7)
+        self.assertListEqual(self.names(1, 3), ["P1", "P1C0", "P1C1"])
+        self.assertListEqual([depth for _, depth in self.tree.rows(1, 2)], [0, 1])
+        self.assertEqual(self.changes, 1)
+
+    def test_rows_from_nested_open_items(self):
+        p0 = self.root.pick_child("P0")
+        self.tree.open(p0)
+        self.tree.open(p0.pick_child("P0C2"))
+        self.tree.open(self.root.pick_child("P2"))
+        self.assertEqual(self.tree.row_count, 12)
+        self.assertListEqual(self.names(3, 5), ["P0C2", "P0C2G", "P0C3", "P1", "P2"])
+        self.assertListEqual(self.names(10), ["P2C2", "P2C3"])
+        self.assertEqual(self.tree.index(p0.pick_child("P0C2").children[0]), 4)
+        self.assertEqual(self.tree.index(self.root.pick_child("P2").pick_child("P2C3")), 11)
+
+    def test_closing_item_keeps_open_descendants_for_reopening(self):
+        p0 = self.root.pick_child("P0")
+        self.tree.open(p0)
+        self.tree.open(p0.pick_child("P0C0"))
+        self.tree.close(p0)
+        self.assertEqual(self.tree.row_count, 3)
+        self.tree.open(p0)
+        self.assertListEqual(self.names(0, 3), ["P0", "P0C0", "P0C0G"])
+
+    def test_adopted_and_left_children_of_open_items_update_rows(self):
+        p1 = self.root.pick_child("P1")
+        self.tree.open(p1)
+        p1.adopt(self.cr.new("New"))
+        self.assertEqual(self.tree.row_count, 8)
+        self.assertEqual(self.names(6, 1), ["New"])
+
+        child = p1.pick_child("P1C0")
+        self.tree.open(child)
+        p1.leave(child)
+        self.assertEqual(self.tree.row_count, 7)
+        self.assertFalse(self.tree.is_open(child))
+        self.cr.undo()
+        self.assertEqual(self.tree.row_count, 8)
+        self.assertListEqual(self.names(1, 2), ["P1", "P1C0"])
+
+    def test_changes_under_closed_item_do_not_change_rows(self):
+        p0 = self.root.pick_child("P0")
+        child = p0.pick_child("P0C1")
+        self.tree.open(child)
+        child.adopt(self.cr.new("New"))
+        self.assertEqual(self.tree.row_count, 3)
+        self.tree.open(p0)
+        self.assertListEqual(self.names(2, 4), ["P0C1", "P0C1G", "New", "P0C2"])
+
+    def test_sorting_children(self):
+        self.tree.sort(lambda item: item("x") if item.has_attribute("x") else None)
+        self.assertListEqual(self.names(), ["P2", "P1", "P0"])
+        self.tree.sort(lambda item: item("x") if item.has_attribute("x") else None, reverse=True)
+        self.tree.open(self.root.pick_child("P2"))
+        self.assertListEqual(self.names(2, 2), ["P2", "P2C0"])
+        self.tree.sort(None)
+        self.assertListEqual(self.names(0, 1), ["P0"])
+
+    def test_sorting_children_of_item_reorders_rows(self):
+        self.root.sort_children(reverse=True)
+        self.assertListEqual(self.names(), ["P2", "P1", "P0"])
+        self.cr.undo()
+        self.assertListEqual(self.names(), ["P0", "P1", "P2"])
+        self.assertEqual(self.changes, 2)
+
+    def test_setting_sort_key_of_child_reorders_rows(self):
+        self.tree.sort(lambda item: item("x") if item.has_attribute("x") else None)
+        self.assertListEqual(self.names(), ["P2", "P1", "P0"])
+        self.changes = 0
+        self.root.pick_child("P2").set("x", 10)
+        self.assertListEqual(self.names(), ["P1", "P0", "P2"])
+        self.assertEqual(self.changes, 1)
+        self.tree.sort(None)
+        self.root.pick_child("P2").set("x", 0)
+        self.assertEqual(self.changes, 2)
+
+    def test_index_of_hidden_item_raises_exception(self):
+        with self.assertRaises(Virtual_Tree.ItemNotShown):
+            self.tree.index(self.root.pick_child("P0").pick_child("P0C0"))
+
+    def test_large_fully_open_tree(self):
+        root = self.cr.new("Large root")
+        for i in range(100):
+            parent = self.cr.new(f"{i}")
+            parent.adopt_many(*[self.cr.new(f"{i}.{j}") for j in range(100)])
+            root.adopt(parent)
+        tree = Virtual_Tree(root)
+        for parent in root.children:
+            tree.open(parent)
+        self.assertEqual(tree.row_count, 10100)
+        self.assertListEqual([item.name for item, _ in tree.rows(5050, 3)], ["50", "50.0", "50.1"])
+        self.assertEqual(tree.index(root.pick_child("99").pick_child("99.99")), 10099)
+
+    def test_stopped_tree_no_longer_follows_items(self):
+        self.tree.stop()
+        self.root.adopt(self.cr.new("New"))
+        self.assertEqual(self.changes, 0)
+
+
+class _Fake_Treeview:
+    """Flat list of rows standing in for the Tk treeview, so the view is tested without
+    a display. The idle callbacks are run by 'update_idletasks'."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.rows: dict[str, dict] = dict()
+        self.order: list[str] = list()
+        self.selected: list[str] = list()
+        self.focused = ""
+        self.idle: list = list()
+        self.options: dict = {"height": 5}
+
+    def __setitem__(self, key: str, value) -> None:
+        self.options[key] = value
+
+    def __getitem__(self, key: str):
+        return self.options[key]
+
+    def configure(self, **kwargs) -> None:
+        self.options.update(kwargs)
+
+    def cget(self, key: str):
+        return self.options[key]
+
+    def bind(self, *args) -> None:
+        pass
+
+    def heading(self, *args, **kwargs) -> None:
+        pass
+
+    def column(self, *args, **kwargs) -> None:
+        pass
+
+    def yview(self, *args) -> None:
+        pass
+
+    def winfo_exists(self) -> bool:
+        return True
+
+    def winfo_height(self) -> int:
+        return 1
+
+    def after_idle(self, func) -> None:
+        self.idle.append(func)
+
+    def update_idletasks(self) -> None:
+        while self.idle:
+            self.idle.pop(0)()
+
+    def insert(self, parent: str, index, iid: str, text: str = "", values=()) -> str:
+        self.rows[iid] = {"text": text, "values": list(values)}
+        self.order.append(iid)
+        return iid
+
+    def item(self, iid: str, option: str = "", **kwargs):
+        self.rows[iid].update(kwargs)
+        return self.rows[iid][option] if option else self.rows[iid]
+
+    def delete(self, *iids: str) -> None:
+        for iid in iids:
+            self.rows.pop(iid)
+            self.order.remove(iid)
+
+    def get_children(self, iid: str) -> tuple[str, ...]:
+        return tuple(self.order)
+
+    def parent(self, iid: str) -> str:
+        return ""
+
+    def selection(self) -> tuple[str, ...]:
+        return tuple(self.selected)
+
+    def selection_set(self, items) -> None:
+        self.selected = [items] if isinstance(items, str) else list(items)
+
+    def focus(self, *iid: str) -> str:
+        if iid:
+            self.focused = iid[0]
+        return self.focused
+
+
+class _Fake_Widget:
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.scrolled_to: tuple = ()
+
+    def configure(self, *args, **kwargs) -> None:
+        pass
+
+    def pack(self, *args, **kwargs) -> None:
+        pass
+
+    def set(self, *args) -> None:
+        self.scrolled_to = args
+
+    def lookup(self, *args) -> int:
+        return 20
+
+
+class Test_Virtual_Case_View(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cr = ItemCreator()
+        self.root = self.cr.new("Root")
+        for i in range(30):
+            parent = self.cr.new(f"P{i}", {"y": "integer"})
+            parent.set("y", 100 - i)
+            parent.adopt(self.cr.new(f"P{i}C", {"y": "integer"}))
+            self.root.adopt(parent)
+        # the style is looked up also when drawing the rows
+        for patcher in (
+            mock.patch.object(ttk, "Treeview", _Fake_Treeview),
+            mock.patch.object(ttk, "Scrollbar", _Fake_Widget),
+            mock.patch.object(ttk, "Style", _Fake_Widget),
+            mock.patch.object(tkfont, "nametofont", lambda name: None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.view = Virtual_Case_View_Tk(None, self.root, attrs_for_display={"y": ("y",)})
+        self.tree: _Fake_Treeview = self.view.widget  # type: ignore
+        self.tree.configure(height=5)
+        self.view._draw()
+
+    def texts(self) -> list[str]:
+        return [self.tree.rows[iid]["text"].strip(" ▾▸") for iid in self.tree.order]
+
+    def test_only_rows_in_viewport_and_buffer_are_drawn(self):
+        self.assertEqual(len(self.tree.order), 5 + Virtual_Case_View_Tk.BUFFER)
+        self.assertListEqual(self.texts()[:2], ["P0", "P1"])
+        self.assertEqual(self.tree.rows[self.root.pick_child("P0").id]["values"], ["100"])
+        self.assertEqual(self.view._yscrollbar.scrolled_to, (0, 5 / 30))
+
+    def test_scrolling(self):
+        self.view._scroll("moveto", "0.5")
+        self.assertListEqual(self.texts()[:2], ["P15", "P16"])
+        self.view._scroll("scroll", "1", "pages")
+        self.assertListEqual(self.texts()[:2], ["P20", "P21"])
+        self.view._scroll("moveto", "1.0")
+        self.assertListEqual(self.texts()[:2], ["P25", "P26"])
+
+    def test_opening_item_inserts_its_children_after_it(self):
+        self.view.rows.open(self.root.pick_child("P1"))
+        self.tree.update_idletasks()
+        self.assertListEqual(self.texts()[:4], ["P0", "P1", "P1C", "P2"])
+        self.assertTrue(self.tree.rows[self.root.pick_child("P1").id]["text"].startswith("▾"))
+        self.assertTrue(self.tree.rows[self.root.pick_child("P2").id]["text"].startswith("▸"))
+
+    def test_selection_is_kept_for_rows_scrolled_out_of_view(self):
+        first = self.root.pick_child("P0")
+        self.tree.selection_set(first.id)
+        self.view._scroll("moveto", "0.5")
+        self.assertNotIn(first.id, self.tree.rows)
+        self.assertSetEqual(self.view.selected_items, {first})
+        self.view._scroll("moveto", "0")
+        self.assertListEqual(self.tree.selected, [first.id])
+
+    def test_setting_attribute_refreshes_only_drawn_rows(self):
+        item = self.root.pick_child("P1")
+        item.set("y", 5)
+        self.root.pick_child("P29").set("y", 5)
+        self.tree.update_idletasks()
+        self.assertEqual(self.tree.rows[item.id]["values"], ["5"])
+
+    def test_scrolling_to_item_opens_its_parent(self):
+        child = self.root.pick_child("P20").children[0]
+        self.view.scroll_to(child)
+        self.assertIn(child.id, self.tree.rows)
+        self.assertIn("P20", self.texts())
+
+    def test_sorting_by_column_and_by_changed_key(self):
+        self.view._sort_all_by("y")
+        self.tree.update_idletasks()
+        self.assertListEqual(self.texts()[:2], ["P29", "P28"])
+        self.root.pick_child("P0").set("y", 0)
+        self.tree.update_idletasks()
+        self.assertListEqual(self.texts()[:2], ["P0", "P29"])
+
+    def test_moving_focus_below_viewport_scrolls_the_view(self):
+        self.tree.focus(self.root.pick_child("P4").id)
+        self.view._move_focus(1)
+        self.assertEqual(self.tree.focus(), self.root.pick_child("P5").id)
+        self.assertListEqual(self.tree.selected, [self.root.pick_child("P5").id])
+        self.assertListEqual(self.texts()[:1], ["P1"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()